@@ -1,3 +1,5 @@
+-- Baseline schema. Apply the versioned changes in migrations/ afterwards with:
+--     cd legislative_scraper && python -m legislative_scraper.migrate
 -- Drop existing tables if they exist
 DROP TABLE IF EXISTS bill_votes;
 DROP TABLE IF EXISTS bill_details;
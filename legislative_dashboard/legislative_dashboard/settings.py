@@ -92,10 +92,39 @@ DATABASE_PASSWORD = os.getenv('DATABASE_PASSWORD')
 DATABASE_HOST = os.getenv('DATABASE_HOST')
 DATABASE_PORT = int(os.getenv('DATABASE_PORT', 5432))
 
+# The scraper's database; view_app reads its tables through unmanaged models
+DATABASES = {
+    'default': {
+        'ENGINE': DATABASE_ENGINE or 'django.db.backends.postgresql',
+        'NAME': DATABASE_NAME,
+        'USER': DATABASE_USER,
+        'PASSWORD': DATABASE_PASSWORD,
+        'HOST': DATABASE_HOST,
+        'PORT': DATABASE_PORT,
+    }
+}
+
 ITEM_PIPELINES = {
     'legislative_scraper.pipelines.PostgresPipeline': 300,
 }
 
+# Responses of the data endpoints are cached until the scraper writes the sessions they cover
+# (view_app/cache.py). Per process by default; DASHBOARD_CACHE_BACKEND can name any Django cache
+# backend, e.g. django.core.cache.backends.filebased.FileBasedCache with DASHBOARD_CACHE_LOCATION
+# set to a directory, to share one cache between the workers of a host
+DASHBOARD_CACHE_BACKEND = os.getenv('DASHBOARD_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+DASHBOARD_CACHE_LOCATION = os.getenv('DASHBOARD_CACHE_LOCATION', 'legislative-dashboard')
+
+CACHES = {
+    'default': {
+        'BACKEND': DASHBOARD_CACHE_BACKEND,
+        'LOCATION': DASHBOARD_CACHE_LOCATION,
+        # Entries of past generations are never read again; they expire or are culled
+        'TIMEOUT': 24 * 3600,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
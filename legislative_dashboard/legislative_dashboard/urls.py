@@ -16,7 +16,31 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
+from view_app import view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('bills/', view.bills_overview),
+    path('bills/export/', view.bills_export),
+    path('votes/', view.voting_details),
+    path('votes/export/', view.voting_export),
+    path('search/', view.search),
+    path('stats/sessions/', view.stats_sessions),
+    path('stats/sponsors/', view.stats_sponsors),
+    path('stats/<int:parliament>-<int:session>/stages/', view.stats_session_stages),
+    path('stats/<int:parliament>-<int:session>/sponsors/', view.stats_session_sponsors),
+    path('stats/<int:parliament>-<int:session>/votes/', view.stats_session_votes),
+    path('bills/<int:parliament>-<int:session>/<str:bill_number>/versions/', view.bill_versions),
+    path(
+        'bills/<int:parliament>-<int:session>/<str:bill_number>/versions/<int:version>/<str:section>.xml',
+        view.bill_version_text,
+    ),
+    path(
+        'bills/<int:parliament>-<int:session>/<str:bill_number>/versions/<int:version>/diff/<int:other>/',
+        view.bill_version_diff,
+    ),
+    path(
+        'bills/<int:parliament>-<int:session>/<str:bill_number>/versions/<int:version>/sections/<str:section_path>/',
+        view.bill_version_section,
+    ),
 ]
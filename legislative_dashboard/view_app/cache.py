@@ -0,0 +1,72 @@
+# Responses of the data endpoints, cached per data generation (migrations/0008_data_generations.sql)
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+def data_generation(parliament=None, session=None):
+    """Return the generation of a slice of the data: the sum of the generations of its
+    sessions, which grows whenever any of them is written."""
+    conditions, params = [], []
+    if parliament is not None:
+        conditions.append('parliament_number = %s')
+        params.append(parliament)
+    if session is not None:
+        conditions.append('session_number = %s')
+        params.append(session)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT coalesce(sum(generation), 0) FROM data_generations {where}", params)
+        return cursor.fetchone()[0]
+
+
+def request_slice(request, kwargs):
+    # The parliament and session a response covers, from the URL or ?parliament= / ?session=
+    parliament = kwargs.get('parliament', request.GET.get('parliament'))
+    session = kwargs.get('session', request.GET.get('session'))
+    return (
+        int(parliament) if parliament is not None else None,
+        int(session) if session is not None else None,
+    )
+
+
+def generation_cached(view):
+    """Serve a view's 200 responses from the cache until the data of the slice they cover
+    changes, with a strong ETag so clients holding the same body get a 304 Not Modified.
+
+    Only for views reading tables whose writes count up data_generations: those of the
+    scraper, and view_app_bill / view_app_voting through the triggers of migration 0006.
+    """
+    @wraps(view)
+    def cached_view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        try:
+            parliament, session = request_slice(request, kwargs)
+        except ValueError:
+            # The view reports the bad filter
+            return view(request, *args, **kwargs)
+        # Read before the view's own queries: a response rendered from newer data than its
+        # generation is only replaced early, never served stale
+        generation = data_generation(parliament, session)
+        key = 'response:' + hashlib.sha1(f"{generation}:{request.get_full_path()}".encode()).hexdigest()
+        entry = cache.get(key)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            content = response.content
+            entry = (content, response['Content-Type'], quote_etag(hashlib.sha1(content).hexdigest()))
+            cache.set(key, entry)
+        content, content_type, etag = entry
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        # Clients revalidate every time, which costs them a 304 while the data is unchanged
+        patch_cache_control(response, no_cache=True)
+        return get_conditional_response(request, etag=etag, response=response)
+    return cached_view
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('view_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillText',
+            fields=[
+                ('text_hash', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('codec', models.CharField(max_length=10)),
+                ('raw_size', models.IntegerField()),
+                ('data', models.BinaryField()),
+            ],
+            options={
+                'db_table': 'bill_texts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='BillVersion',
+            fields=[
+                ('detail_id', models.AutoField(primary_key=True, serialize=False)),
+                ('bill_number', models.CharField(max_length=50)),
+                ('parliament_number', models.IntegerField()),
+                ('session_number', models.IntegerField()),
+                ('version_number', models.IntegerField()),
+                ('title', models.TextField(null=True)),
+                ('short_title', models.TextField(null=True)),
+                ('sponsor', models.CharField(max_length=255, null=True)),
+                ('bill_ref_number', models.CharField(max_length=50, null=True)),
+                ('bill_history', models.TextField(null=True)),
+                ('introduction', models.TextField(null=True)),
+                ('body', models.TextField(null=True)),
+                ('bill_history_hash', models.CharField(max_length=40, null=True)),
+                ('introduction_hash', models.CharField(max_length=40, null=True)),
+                ('body_hash', models.CharField(max_length=40, null=True)),
+                ('content_hash', models.CharField(max_length=40, null=True)),
+            ],
+            options={
+                'db_table': 'bill_details',
+                'managed': False,
+            },
+        ),
+    ]
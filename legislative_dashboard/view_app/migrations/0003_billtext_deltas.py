@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('view_app', '0002_billtext_billversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billtext',
+            name='base_hash',
+            field=models.CharField(max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='billtext',
+            name='depth',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('view_app', '0003_billtext_deltas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillSection',
+            fields=[
+                ('pk', models.CompositePrimaryKey('bill_number', 'parliament_number', 'session_number', 'version_number', 'section_path', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('bill_number', models.CharField(max_length=50)),
+                ('parliament_number', models.IntegerField()),
+                ('session_number', models.IntegerField()),
+                ('version_number', models.IntegerField()),
+                ('section_path', models.CharField(max_length=255)),
+                ('position', models.IntegerField()),
+                ('heading', models.TextField(null=True)),
+                ('text', models.TextField(null=True)),
+                ('start_offset', models.IntegerField()),
+                ('end_offset', models.IntegerField()),
+                ('detail_hash', models.CharField(max_length=40)),
+            ],
+            options={
+                'db_table': 'bill_sections',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('view_app', '0004_billsection'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['parliament_number', 'session_number', 'id'], name='bill_session_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voting',
+            index=models.Index(fields=['vote_date', 'id'], name='voting_date_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.db import migrations
+
+# Writes to view_app_bill and view_app_voting count up the data generation of the sessions
+# they touch, as the scraper's writes do (migrations/0008_data_generations.sql, which has to
+# be applied first), so /bills/ and /votes/ can be generation_cached. Statement triggers with
+# transition tables bump each session once per statement, whatever writes the rows.
+BUMP_SQL = '''
+            INSERT INTO data_generations AS g (parliament_number, session_number)
+            SELECT DISTINCT parliament_number, session_number FROM ({rows}) AS changed
+            ORDER BY parliament_number, session_number
+            ON CONFLICT (parliament_number, session_number) DO UPDATE SET
+                generation = g.generation + 1,
+                changed_at = now();'''
+
+# The sessions of a table's changed rows, from new_rows and/or old_rows
+BILL_SESSIONS = 'SELECT parliament_number, session_number FROM {rows}'
+# A vote deleted along with its bill finds no bill here, but the bill's own delete bumped its session
+VOTING_SESSIONS = (
+    'SELECT b.parliament_number, b.session_number FROM {rows} v JOIN view_app_bill b ON b.id = v.bill_id'
+)
+TABLE_SESSIONS = {
+    'view_app_bill': BILL_SESSIONS,
+    'view_app_voting': VOTING_SESSIONS,
+}
+# event -> transition tables of its trigger
+EVENT_ROWS = {
+    'INSERT': ('new_rows',),
+    'UPDATE': ('old_rows', 'new_rows'),
+    'DELETE': ('old_rows',),
+}
+
+
+def create_function(table):
+    # A transition table can only be named in the branch of the events that declare it
+    branches = '\n'.join(
+        f"        {'IF' if index == 0 else 'ELSIF'} TG_OP = '{event}' THEN"
+        + BUMP_SQL.format(rows=' UNION ALL '.join(TABLE_SESSIONS[table].format(rows=rows) for rows in event_rows))
+        for index, (event, event_rows) in enumerate(EVENT_ROWS.items())
+    )
+    return f'''
+    CREATE FUNCTION bump_{table}_generations() RETURNS trigger AS $$
+    BEGIN
+{branches}
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql'''
+
+
+def create_triggers(table):
+    return [
+        f'''CREATE TRIGGER {table}_generations_{event.lower()} AFTER {event} ON {table}
+            REFERENCING {' '.join(f"{rows.split('_')[0].upper()} TABLE AS {rows}" for rows in event_rows)}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_{table}_generations()'''
+        for event, event_rows in EVENT_ROWS.items()
+    ]
+
+
+def drop(table):
+    return [
+        *(f"DROP TRIGGER {table}_generations_{event.lower()} ON {table}" for event in EVENT_ROWS),
+        f"DROP FUNCTION bump_{table}_generations()",
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('view_app', '0005_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [statement for table in TABLE_SESSIONS for statement in [create_function(table), *create_triggers(table)]],
+            reverse_sql=[statement for table in TABLE_SESSIONS for statement in drop(table)],
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .texts import FETCH_TEXT_CHAINS_SQL, resolve_texts
+
 class Bill(models.Model):
     bill_number = models.CharField(max_length=20)
     title = models.TextField()
@@ -11,6 +13,12 @@ class Bill(models.Model):
     royal_assent_date = models.DateField(null=True, blank=True)
     full_text_link = models.URLField()
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of /bills/ (see view.BILL_ORDERING)
+            models.Index(fields=['parliament_number', 'session_number', 'id'], name='bill_session_keyset_idx'),
+        ]
+
     def __str__(self):
         return f"{self.bill_number} - {self.title}"
 
@@ -21,6 +29,12 @@ class Voting(models.Model):
     total_abstain = models.IntegerField()
     vote_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of /votes/ (see view.VOTING_ORDERING)
+            models.Index(fields=['vote_date', 'id'], name='voting_date_keyset_idx'),
+        ]
+
     def __str__(self):
         return f"Voting for {self.bill.bill_number} on {self.vote_date}"
 
@@ -40,4 +54,117 @@ class Senator(models.Model):
     contact_info = models.TextField()
 
     def __str__(self):
-        return f"Senator {self.name} from {self.province}"
\ No newline at end of file
+        return f"Senator {self.name} from {self.province}"
+
+# Tables below are created and written by the scraper (legislativeData.sql and migrations/)
+
+TEXT_SECTIONS = ('bill_history', 'introduction', 'body')
+
+
+class BillText(models.Model):
+    """A distinct bill text section, stored compressed or as a delta against base_hash
+    (see legislative_scraper.textstore)."""
+    text_hash = models.CharField(max_length=40, primary_key=True)
+    codec = models.CharField(max_length=10)
+    raw_size = models.IntegerField()
+    data = models.BinaryField()
+    base_hash = models.CharField(max_length=40, null=True)
+    depth = models.IntegerField(default=0)
+
+    class Meta:
+        managed = False
+        db_table = 'bill_texts'
+
+    @classmethod
+    def texts(cls, hashes):
+        """Return {text_hash: text} for the given hashes."""
+        rows = {
+            row.text_hash: (row.codec, row.base_hash, row.data)
+            for row in cls.objects.raw(FETCH_TEXT_CHAINS_SQL, [list(hashes)])
+        }
+        return resolve_texts(rows, hashes)
+
+
+class BillVersionQuerySet(models.QuerySet):
+    def without_text(self):
+        # The sections are by far the largest columns; load them per object through text()
+        return self.defer(*TEXT_SECTIONS)
+
+
+class BillVersion(models.Model):
+    detail_id = models.AutoField(primary_key=True)
+    bill_number = models.CharField(max_length=50)
+    parliament_number = models.IntegerField()
+    session_number = models.IntegerField()
+    version_number = models.IntegerField()
+    title = models.TextField(null=True)
+    short_title = models.TextField(null=True)
+    sponsor = models.CharField(max_length=255, null=True)
+    bill_ref_number = models.CharField(max_length=50, null=True)
+    bill_history = models.TextField(null=True)
+    introduction = models.TextField(null=True)
+    body = models.TextField(null=True)
+    bill_history_hash = models.CharField(max_length=40, null=True)
+    introduction_hash = models.CharField(max_length=40, null=True)
+    body_hash = models.CharField(max_length=40, null=True)
+    content_hash = models.CharField(max_length=40, null=True)
+
+    objects = BillVersionQuerySet.as_manager()
+
+    class Meta:
+        managed = False
+        db_table = 'bill_details'
+
+    def __str__(self):
+        return f"{self.bill_number} version {self.version_number}"
+
+    @staticmethod
+    def load_texts(versions, section):
+        """Decompress one section of several versions with a single bill_texts query."""
+        hashes = {getattr(version, f'{section}_hash') for version in versions} - {None}
+        texts = BillText.texts(hashes) if hashes else {}
+        for version in versions:
+            digest = getattr(version, f'{section}_hash')
+            if digest is not None:
+                version.__dict__.setdefault('_texts', {})[section] = texts.get(digest)
+
+    def text(self, section):
+        """Return one text section, inline or decompressed from bill_texts, fetching it on first use."""
+        if section not in TEXT_SECTIONS:
+            raise ValueError(f"Unknown bill text section '{section}'")
+        texts = self.__dict__.setdefault('_texts', {})
+        if section not in texts:
+            digest = getattr(self, f'{section}_hash')
+            if digest is not None:
+                texts[section] = BillText.texts([digest]).get(digest)
+            else:
+                # Loads the column now if it was deferred
+                texts[section] = getattr(self, section)
+        return texts[section]
+
+
+class BillSection(models.Model):
+    """One provision of a bill version's body, indexed by the scraper as it parses the text.
+
+    section_path joins the labels down from the section (e.g. "12(1)(a)"); start_offset
+    and end_offset are the UTF-8 byte range of its XML within the version's body.
+    """
+    pk = models.CompositePrimaryKey('bill_number', 'parliament_number', 'session_number', 'version_number', 'section_path')
+    bill_number = models.CharField(max_length=50)
+    parliament_number = models.IntegerField()
+    session_number = models.IntegerField()
+    version_number = models.IntegerField()
+    section_path = models.CharField(max_length=255)
+    position = models.IntegerField()
+    heading = models.TextField(null=True)
+    text = models.TextField(null=True)
+    start_offset = models.IntegerField()
+    end_offset = models.IntegerField()
+    detail_hash = models.CharField(max_length=40)
+
+    class Meta:
+        managed = False
+        db_table = 'bill_sections'
+
+    def __str__(self):
+        return f"{self.bill_number} version {self.version_number} s. {self.section_path}"
@@ -0,0 +1,70 @@
+# Keyset pagination and streamed JSON exports of the dashboard's list endpoints
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+# Rows fetched per round trip of the server-side cursor, and per chunk of the streamed body
+EXPORT_CHUNK_SIZE = 2000
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+
+def decode_cursor(cursor, size):
+    """Return the ordering values a cursor was made from; raises ValueError if it is not one."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return values
+
+
+def after(ordering, values):
+    # (a, b, c) > (x, y, z) spelled out, as the ORM has no row comparison:
+    # a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z). The redundant a >= x is
+    # what lets the index scan start at the cursor instead of filtering from the first row.
+    condition = Q()
+    for position, field in enumerate(ordering):
+        equal = {ordering[i]: values[i] for i in range(position)}
+        condition |= Q(**equal, **{f'{field}__gt': values[position]})
+    return Q(**{f'{ordering[0]}__gte': values[0]}) & condition
+
+
+def keyset_page(queryset, fields, ordering, cursor, page_size):
+    """Return (rows, cursor of the next page or None) of ``queryset`` in ``ordering``, which must
+    be unique and ascending; each page is a range scan of an index on it, however deep."""
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        try:
+            queryset = queryset.filter(after(ordering, decode_cursor(cursor, len(ordering))))
+        except (TypeError, ValueError, ValidationError):
+            # Values of the wrong type for the ordering fields
+            raise ValueError(f"Invalid cursor '{cursor}'")
+    rows = list(queryset.values(*dict.fromkeys(fields + ordering))[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor([rows[-1][field] for field in ordering])
+
+
+def stream_json_array(queryset, fields):
+    """Yield ``queryset`` as a JSON array, read through a server-side cursor so memory stays flat."""
+    yield '['
+    separator = ''
+    chunk = []
+    for row in queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(json.dumps(row, cls=DjangoJSONEncoder))
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+    yield ']'
@@ -0,0 +1,62 @@
+# Full-text search over bill versions (migrations/0006_bill_search.sql)
+from django.db import connection, transaction
+
+# Versions are matched on search_vector and ranked on the much smaller search_summary
+# (titles, marginal notes and headings), most recent first among equals
+SEARCH_SQL = '''
+    SELECT bill_number, parliament_number, session_number, version_number, title, short_title,
+           ts_rank(search_summary, websearch_to_tsquery('english', %(query)s)) AS rank
+    FROM bill_details
+    WHERE search_vector @@ websearch_to_tsquery('english', %(query)s) {filters}
+    ORDER BY rank DESC, parliament_number DESC, session_number DESC, bill_number, version_number DESC
+    LIMIT %(limit)s OFFSET %(offset)s
+'''
+# Best matching provision of each version, highlighted; only the rows of these versions are read
+SNIPPETS_SQL = '''
+    SELECT bill_number, parliament_number, session_number, version_number, section_path,
+           ts_headline('english', coalesce(text, ''), websearch_to_tsquery('english', %(query)s), %(options)s)
+    FROM (
+        SELECT DISTINCT ON (s.bill_number, s.parliament_number, s.session_number, s.version_number)
+               s.bill_number, s.parliament_number, s.session_number, s.version_number, s.section_path, s.text
+        FROM bill_sections s
+        JOIN unnest(%(bill_numbers)s::text[], %(parliaments)s::int[], %(sessions)s::int[], %(versions)s::int[])
+            AS v (bill_number, parliament_number, session_number, version_number)
+            USING (bill_number, parliament_number, session_number, version_number)
+        WHERE s.search_vector @@ websearch_to_tsquery('english', %(query)s)
+        ORDER BY s.bill_number, s.parliament_number, s.session_number, s.version_number,
+                 ts_rank(s.search_vector, websearch_to_tsquery('english', %(query)s)) DESC, s.position
+    ) best
+'''
+SNIPPET_OPTIONS = 'MaxFragments=2, MaxWords=25, MinWords=10'
+
+
+def search_versions(query, offset, limit, parliament=None):
+    """Return (whether more matching bill versions follow, one page of them with a snippet each)."""
+    # One row past the page tells whether there is a next one, without counting every match
+    params = {'query': query, 'offset': offset, 'limit': limit + 1, 'parliament': parliament}
+    filters = 'AND parliament_number = %(parliament)s' if parliament is not None else ''
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL.format(filters=filters), params)
+        columns = [column.name for column in cursor.description]
+        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        has_next = len(results) > limit
+        results = results[:limit]
+        if not results:
+            return has_next, results
+        cursor.execute(SNIPPETS_SQL, {
+            'query': query,
+            'options': SNIPPET_OPTIONS,
+            'bill_numbers': [result['bill_number'] for result in results],
+            'parliaments': [result['parliament_number'] for result in results],
+            'sessions': [result['session_number'] for result in results],
+            'versions': [result['version_number'] for result in results],
+        })
+        snippets = {tuple(row[:4]): row[4:] for row in cursor.fetchall()}
+    for result in results:
+        section_path, snippet = snippets.get(
+            (result['bill_number'], result['parliament_number'], result['session_number'], result['version_number']),
+            (None, None),
+        )
+        result['section_path'] = section_path
+        result['snippet'] = snippet
+    return has_next, results
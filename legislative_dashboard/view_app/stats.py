@@ -0,0 +1,67 @@
+# Per-session summary tables, refreshed by the scraper (migrations/0007_session_stats.sql)
+from django.db import connection
+
+SESSIONS_SQL = '''
+    SELECT parliament_number, session_number, bills, sponsors, divisions,
+           last_stage_date, last_vote_date, refreshed_at
+    FROM session_stats {filters}
+    ORDER BY parliament_number DESC, session_number DESC
+'''
+# Sponsors across sessions; sponsor_name is the one of their latest session
+SPONSORS_SQL = '''
+    SELECT sponsor_id, (array_agg(sponsor_name ORDER BY parliament_number DESC, session_number DESC))[1] AS sponsor_name,
+           sum(bills)::int AS bills, count(*) AS sessions, max(last_stage_date) AS last_stage_date
+    FROM session_sponsor_stats {filters}
+    GROUP BY sponsor_id, CASE WHEN sponsor_id IS NULL THEN sponsor_name END
+    ORDER BY bills DESC, sponsor_name
+'''
+# table -> columns served for one session, and their order
+SESSION_TABLES = {
+    'session_stage_stats': (
+        'bill_stage, bills, last_stage_date',
+        'bills DESC, bill_stage',
+    ),
+    'session_sponsor_stats': (
+        'sponsor_id, sponsor_name, bills, last_stage_date',
+        'bills DESC, sponsor_name',
+    ),
+    'bill_vote_stats': (
+        'bill_number, divisions, min_margin, max_margin, last_margin, last_decision, last_vote_date',
+        'last_vote_date DESC NULLS LAST, bill_number',
+    ),
+}
+
+
+def fetch_dicts(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column.name for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def session_summaries(parliament=None):
+    filters = 'WHERE parliament_number = %(parliament)s' if parliament is not None else ''
+    return fetch_dicts(SESSIONS_SQL.format(filters=filters), {'parliament': parliament})
+
+
+def sponsor_summaries(parliament=None):
+    filters = 'WHERE parliament_number = %(parliament)s' if parliament is not None else ''
+    return fetch_dicts(SPONSORS_SQL.format(filters=filters), {'parliament': parliament})
+
+
+def session_table(table, parliament, session):
+    """Return (the session's summary, its rows of one summary table), or None if the session
+    was never refreshed."""
+    summaries = fetch_dicts(
+        SESSIONS_SQL.format(filters='WHERE parliament_number = %(parliament)s AND session_number = %(session)s'),
+        {'parliament': parliament, 'session': session},
+    )
+    if not summaries:
+        return None
+    columns, order = SESSION_TABLES[table]
+    rows = fetch_dicts(
+        f"SELECT {columns} FROM {table} "
+        f"WHERE parliament_number = %(parliament)s AND session_number = %(session)s ORDER BY {order}",
+        {'parliament': parliament, 'session': session},
+    )
+    return summaries[0], rows
@@ -0,0 +1,83 @@
+# Decoding of the bill_texts rows written by legislative_scraper.textstore, and
+# section-level diffs between two readings of a bill.
+# The decoder mirrors textstore's and imports nothing from Django, so that
+#     python -m legislative_scraper.textstore check
+# can load this file and check it against textstore's encoder and stored rows.
+import json
+import re
+import zlib
+import xml.etree.ElementTree as ET
+
+TOKEN_RE = re.compile(r'<[^>]*>?|[^<]+')
+
+# The requested texts and every delta base they depend on, in one query
+FETCH_TEXT_CHAINS_SQL = '''
+    WITH RECURSIVE chain (text_hash) AS (
+        SELECT text_hash FROM bill_texts WHERE text_hash = ANY(%s)
+        UNION
+        SELECT t.base_hash FROM bill_texts t JOIN chain c ON t.text_hash = c.text_hash
+        WHERE t.base_hash IS NOT NULL
+    )
+    SELECT t.text_hash, t.codec, t.base_hash, t.data FROM bill_texts t JOIN chain USING (text_hash)
+'''
+
+
+def apply_delta(base, ops):
+    # ["c", start, end] copies base tokens, ["i", text] inserts text
+    base_tokens = TOKEN_RE.findall(base)
+    return ''.join(''.join(base_tokens[op[1]:op[2]]) if op[0] == 'c' else op[1] for op in ops)
+
+
+def decompress_text(codec, data, base=None):
+    if codec == 'zlib':
+        return zlib.decompress(bytes(data)).decode('utf-8')
+    if codec == 'delta':
+        return apply_delta(base, json.loads(zlib.decompress(bytes(data))))
+    raise ValueError(f"Unknown bill text codec '{codec}'")
+
+
+def resolve_texts(rows, hashes):
+    """Return {text_hash: text} for ``hashes`` from the FETCH_TEXT_CHAINS_SQL ``rows``,
+    given as {text_hash: (codec, base_hash, data)}."""
+    texts = {}
+
+    def resolve(digest):
+        if digest not in texts:
+            codec, base_hash, data = rows[digest]
+            texts[digest] = decompress_text(codec, data, resolve(base_hash) if base_hash else None)
+        return texts[digest]
+
+    return {digest: resolve(digest) for digest in hashes if digest in rows}
+
+
+def sections(xml):
+    """Return {label: serialized element} for the top-level elements of a text section.
+
+    Elements are keyed by their Label (e.g. a Section's number) or, failing that,
+    by tag and position; repeated keys get a #n suffix.
+    """
+    result = {}
+    if not xml:
+        return result
+    for position, element in enumerate(ET.fromstring(xml)):
+        label = (element.findtext('Label') or '').strip() or f"{element.tag}[{position}]"
+        key, count = label, 1
+        while key in result:
+            count += 1
+            key = f"{label}#{count}"
+        result[key] = ET.tostring(element, encoding='unicode')
+    return result
+
+
+def diff_sections(old_xml, new_xml):
+    old = sections(old_xml)
+    new = sections(new_xml)
+    return {
+        'added': [{'label': label, 'xml': xml} for label, xml in new.items() if label not in old],
+        'removed': [{'label': label, 'xml': xml} for label, xml in old.items() if label not in new],
+        'changed': [
+            {'label': label, 'from': old[label], 'to': xml}
+            for label, xml in new.items() if label in old and old[label] != xml
+        ],
+        'unchanged': sum(1 for label, xml in new.items() if old.get(label) == xml),
+    }
@@ -1,12 +1,219 @@
 
 # views.py in a Django app
-from django.http import JsonResponse
-from .models import Bill, Voting  # Assuming you have these models
+import xml.etree.ElementTree as ET
+from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from .cache import generation_cached
+from .models import TEXT_SECTIONS, Bill, BillSection, BillVersion, Voting
+from .pagination import keyset_page, stream_json_array
+from .search import search_versions
+from .stats import session_summaries, session_table, sponsor_summaries
+from .texts import diff_sections
 
+SEARCH_MAX_PAGE_SIZE = 100
+
+BILL_FIELDS = ('bill_number', 'title', 'parliament_number', 'session_number', 'bill_type', 'status', 'introduced_date', 'royal_assent_date', 'full_text_link')
+BILL_ORDERING = ('parliament_number', 'session_number', 'id')
+VOTING_FIELDS = ('bill_id', 'total_yeas', 'total_nays', 'total_abstain', 'vote_date')
+VOTING_ORDERING = ('vote_date', 'id')
+LIST_MAX_PAGE_SIZE = 1000
+
+def session_filters(request, prefix=''):
+    # ?parliament= and ?session= of the list endpoints; raises ValueError if they are not numbers
+    filters = {}
+    try:
+        if 'parliament' in request.GET:
+            filters[f'{prefix}parliament_number'] = int(request.GET['parliament'])
+        if 'session' in request.GET:
+            filters[f'{prefix}session_number'] = int(request.GET['session'])
+    except ValueError:
+        raise ValueError("parliament and session must be integers")
+    return filters
+
+def list_page(request, queryset, fields, ordering, prefix=''):
+    # One page in a stable order: ?page_size= rows after ?cursor= (the next_cursor of the previous page)
+    try:
+        queryset = queryset.filter(**session_filters(request, prefix))
+        page_size = request.GET.get('page_size', '100')
+        if not page_size.isdigit() or not 1 <= int(page_size) <= LIST_MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 1 and {LIST_MAX_PAGE_SIZE}")
+        page_size = int(page_size)
+        rows, next_cursor = keyset_page(queryset, fields, ordering, request.GET.get('cursor'), page_size)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': rows, 'next_cursor': next_cursor})
+
+def list_export(request, queryset, fields, ordering, prefix=''):
+    # Every matching row as one JSON array, streamed as it is read
+    try:
+        queryset = queryset.filter(**session_filters(request, prefix))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return StreamingHttpResponse(
+        stream_json_array(queryset.order_by(*ordering), fields), content_type='application/json'
+    )
+
+# view_app_bill and view_app_voting count up data_generations through triggers
+# (view_app/migrations/0006_bill_voting_generations.py)
+@generation_cached
 def bills_overview(request):
-    bills = list(Bill.objects.values('bill_number', 'title', 'parliament_number', 'session_number', 'bill_type', 'status', 'introduced_date', 'royal_assent_date', 'full_text_link'))
-    return JsonResponse(bills, safe=False)
+    return list_page(request, Bill.objects.all(), BILL_FIELDS, BILL_ORDERING)
 
+def bills_export(request):
+    return list_export(request, Bill.objects.all(), BILL_FIELDS, BILL_ORDERING)
+
+@generation_cached
 def voting_details(request):
-    votes = list(Voting.objects.values('bill_id', 'total_yeas', 'total_nays', 'total_abstain', 'vote_date'))
-    return JsonResponse(votes, safe=False)
\ No newline at end of file
+    # Filtered on the parliament and session of the bill voted on
+    return list_page(request, Voting.objects.all(), VOTING_FIELDS, VOTING_ORDERING, prefix='bill__')
+
+def voting_export(request):
+    return list_export(request, Voting.objects.all(), VOTING_FIELDS, VOTING_ORDERING, prefix='bill__')
+
+@generation_cached
+def bill_versions(request, parliament, session, bill_number):
+    # Metadata only; each section is served decompressed by bill_version_text
+    versions = BillVersion.objects.without_text().filter(
+        parliament_number=parliament, session_number=session, bill_number=bill_number
+    ).order_by('version_number')
+    return JsonResponse([
+        {
+            'version_number': version.version_number,
+            'title': version.title,
+            'short_title': version.short_title,
+            'sponsor': version.sponsor,
+            'bill_ref_number': version.bill_ref_number,
+        }
+        for version in versions
+    ], safe=False)
+
+@generation_cached
+def bill_version_text(request, parliament, session, bill_number, version, section):
+    if section not in TEXT_SECTIONS:
+        raise Http404(f"Unknown bill text section '{section}'")
+    bill_version = get_object_or_404(
+        BillVersion.objects.without_text(),
+        parliament_number=parliament, session_number=session, bill_number=bill_number, version_number=version,
+    )
+    text = bill_version.text(section)
+    if text is None:
+        raise Http404(f"Bill {bill_number} version {version} has no {section}")
+    return HttpResponse(text, content_type='application/xml; charset=utf-8')
+
+@generation_cached
+def bill_version_diff(request, parliament, session, bill_number, version, other):
+    # What changed from one reading to another, element by element (?section=body by default)
+    section = request.GET.get('section', 'body')
+    if section not in TEXT_SECTIONS:
+        raise Http404(f"Unknown bill text section '{section}'")
+    versions = {
+        bill_version.version_number: bill_version
+        for bill_version in BillVersion.objects.without_text().filter(
+            parliament_number=parliament, session_number=session, bill_number=bill_number,
+            version_number__in=[version, other],
+        )
+    }
+    if version not in versions or other not in versions:
+        raise Http404(f"Bill {bill_number} has no version {version} or {other}")
+    BillVersion.load_texts(list(versions.values()), section)
+    try:
+        diff = diff_sections(versions[version].text(section), versions[other].text(section))
+    except ET.ParseError as e:
+        return JsonResponse({'error': f"Stored {section} is not valid XML: {e}"}, status=422)
+    return JsonResponse({
+        'bill_number': bill_number,
+        'parliament_number': parliament,
+        'session_number': session,
+        'section': section,
+        'from_version': version,
+        'to_version': other,
+        **diff,
+    })
+
+@generation_cached
+def bill_version_section(request, parliament, session, bill_number, version, section_path):
+    # One provision and the ones nested in it, read from bill_sections without loading the body
+    provisions = list(BillSection.objects.filter(
+        Q(section_path=section_path)
+        | Q(section_path__startswith=f"{section_path}(")
+        | Q(section_path__startswith=f"{section_path}."),
+        parliament_number=parliament, session_number=session, bill_number=bill_number, version_number=version,
+    ).order_by('position').values('section_path', 'heading', 'text', 'start_offset', 'end_offset'))
+    if not provisions:
+        raise Http404(f"Bill {bill_number} version {version} has no section {section_path}")
+    return JsonResponse({
+        'bill_number': bill_number,
+        'parliament_number': parliament,
+        'session_number': session,
+        'version_number': version,
+        'provisions': provisions,
+    })
+
+@generation_cached
+def search(request):
+    # Ranked full-text search over all bill versions: ?q=... (web search syntax), optional
+    # ?parliament=, ?page= and ?page_size=; snippets come from bill_sections, never the body
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': "Missing search query 'q'"}, status=400)
+    try:
+        parliament = int(request.GET['parliament']) if 'parliament' in request.GET else None
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', 20))
+    except ValueError:
+        return JsonResponse({'error': "parliament, page and page_size must be integers"}, status=400)
+    if page < 1 or not 1 <= page_size <= SEARCH_MAX_PAGE_SIZE:
+        return JsonResponse(
+            {'error': f"page must be at least 1 and page_size between 1 and {SEARCH_MAX_PAGE_SIZE}"}, status=400
+        )
+    has_next, results = search_versions(query, (page - 1) * page_size, page_size, parliament)
+    return JsonResponse({
+        'query': query,
+        'has_next': has_next,
+        'page': page,
+        'page_size': page_size,
+        'results': results,
+    })
+
+def parliament_filter(request):
+    # Optional ?parliament= of the stats endpoints; raises ValueError if it is not a number
+    return int(request.GET['parliament']) if 'parliament' in request.GET else None
+
+@generation_cached
+def stats_sessions(request):
+    # Bills, sponsors and divisions per session, from the summary tables the scraper refreshes
+    try:
+        parliament = parliament_filter(request)
+    except ValueError:
+        return JsonResponse({'error': "parliament must be an integer"}, status=400)
+    return JsonResponse(session_summaries(parliament), safe=False)
+
+@generation_cached
+def stats_sponsors(request):
+    # Bills per sponsor over all sessions, or those of ?parliament=
+    try:
+        parliament = parliament_filter(request)
+    except ValueError:
+        return JsonResponse({'error': "parliament must be an integer"}, status=400)
+    return JsonResponse(sponsor_summaries(parliament), safe=False)
+
+def session_stats_response(parliament, session, table, key):
+    found = session_table(table, parliament, session)
+    if found is None:
+        raise Http404(f"No statistics for session {parliament}-{session}")
+    summary, rows = found
+    return JsonResponse({'session': summary, key: rows})
+
+@generation_cached
+def stats_session_stages(request, parliament, session):
+    return session_stats_response(parliament, session, 'session_stage_stats', 'stages')
+
+@generation_cached
+def stats_session_sponsors(request, parliament, session):
+    return session_stats_response(parliament, session, 'session_sponsor_stats', 'sponsors')
+
+@generation_cached
+def stats_session_votes(request, parliament, session):
+    # Divisions held on each bill of the session and their margins (yeas - nays)
+    return session_stats_response(parliament, session, 'bill_vote_stats', 'bills')
@@ -0,0 +1,144 @@
+# benchmarks/bench_backfill.py
+#
+# Load the same recorded items through the per-row, batched and backfill
+# PostgreSQL pipelines and compare their wall-clock times.
+#
+# Usage (from the legislative_scraper project directory):
+#     scrapy crawl bill_session -O items.jsonl     # record a dataset once
+#     scrapy crawl votes -O votes.jsonl
+#     python -m benchmarks.bench_backfill items.jsonl votes.jsonl [--database NAME]
+#         [--text-storage inline|compressed]
+#
+# Each run starts from an empty schema (legislativeData.sql plus migrations/) in a
+# scratch database, created if missing, on the server configured by DATABASE_*.
+# The scratch database must differ from DATABASE_NAME since its tables are dropped.
+import argparse
+import json
+import os
+import time
+
+import psycopg2
+from scrapy import Spider
+from scrapy.utils.test import get_crawler
+
+from legislative_scraper import migrate
+from legislative_scraper.db import connection_params
+from legislative_scraper.items import BillItem, BillDetailItem, VoteItem
+from legislative_scraper.pipelines import BackfillPostgresPipeline, PostgresPipeline
+from legislative_scraper.textstore import table_sizes
+
+SCHEMA_PATH = os.path.join(migrate.MIGRATIONS_DIR, '..', 'legislativeData.sql')
+
+MODES = {
+    'per-row': (PostgresPipeline, 1),
+    'batched': (PostgresPipeline, 500),
+    'backfill': (BackfillPostgresPipeline, 500),
+}
+
+
+def load_items(paths):
+    items = []
+    for path in paths:
+        with open(path, 'r') as file:
+            for line in file:
+                data = json.loads(line)
+                if 'division_number' in data:
+                    items.append(VoteItem(data))
+                elif 'version_number' in data:
+                    items.append(BillDetailItem(data))
+                else:
+                    items.append(BillItem(data))
+    return items
+
+
+def ensure_database(name):
+    params = connection_params()
+    connection = psycopg2.connect(**params)
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_database WHERE datname = %s', (name,))
+        if cursor.fetchone() is None:
+            cursor.execute(f'CREATE DATABASE "{name}"')
+    connection.close()
+
+
+def reset_schema(until=None):
+    # Migrations from ``until`` (a file name) on are left pending
+    connection = psycopg2.connect(**connection_params())
+    with connection.cursor() as cursor, open(SCHEMA_PATH, 'r') as file:
+        # Tables added by migrations go as well; this is a scratch database
+        cursor.execute('DROP SCHEMA public CASCADE')
+        cursor.execute('CREATE SCHEMA public')
+        cursor.execute(file.read())
+        migrate.applied_migrations(cursor)
+    connection.commit()
+    for name in migrate.available_migrations(migrate.MIGRATIONS_DIR):
+        if until is not None and name >= until:
+            break
+        migrate.apply_migration(connection, migrate.MIGRATIONS_DIR, name)
+        connection.commit()
+    connection.close()
+
+
+def table_counts():
+    connection = psycopg2.connect(**connection_params())
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        counts = []
+        for table in ('bills', 'bill_details', 'bill_votes'):
+            cursor.execute(f'SELECT count(*) FROM {table}')
+            counts.append(cursor.fetchone()[0])
+        # bill_details plus bill_texts, after the dead tuples of the upserts are gone
+        cursor.execute('VACUUM FULL bill_details, bill_texts')
+        counts.append(sum(table_sizes(cursor).values()))
+    connection.close()
+    return counts
+
+
+def run(pipeline_cls, batch_size, items, text_storage):
+    crawler = get_crawler(Spider, {
+        'POSTGRES_BATCH_SIZE': batch_size,
+        'POSTGRES_BATCH_MAX_LATENCY': 0,
+        'POSTGRES_TEXT_STORAGE': text_storage,
+    })
+    spider = Spider(name='bench')
+    pipeline = pipeline_cls.from_crawler(crawler)
+    crawler.stats.open_spider(spider)
+
+    start = time.perf_counter()
+    pipeline.open_spider(spider)
+    for item in items:
+        pipeline.process_item(item, spider)
+    pipeline.close_spider(spider)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare PostgreSQL pipeline load times on recorded items.')
+    parser.add_argument('paths', nargs='+', help='JSON lines item exports')
+    parser.add_argument('--database', default='legislative_bench', help='scratch database name')
+    parser.add_argument('--modes', default=','.join(MODES), help='comma separated subset of ' + ', '.join(MODES))
+    parser.add_argument('--text-storage', choices=('inline', 'compressed'), default='inline')
+    args = parser.parse_args()
+
+    if args.database == connection_params()['dbname']:
+        parser.error('--database must not be the configured DATABASE_NAME')
+    ensure_database(args.database)
+    os.environ['DATABASE_NAME'] = args.database
+
+    items = load_items(args.paths)
+    print(f"{len(items)} items from {', '.join(args.paths)}")
+    print(f"{'mode':<10} {'time s':>9} {'items/s':>10} {'bills':>8} {'details':>8} {'votes':>8} {'text MiB':>9}")
+    for mode in args.modes.split(','):
+        pipeline_cls, batch_size = MODES[mode]
+        reset_schema()
+        elapsed = run(pipeline_cls, batch_size, items, args.text_storage)
+        bills, details, votes, text_size = table_counts()
+        print(
+            f"{mode:<10} {elapsed:>9.3f} {len(items) / elapsed:>10.0f} {bills:>8} {details:>8} {votes:>8}"
+            f" {text_size / 1024 ** 2:>9.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
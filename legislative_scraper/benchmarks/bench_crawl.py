@@ -0,0 +1,170 @@
+# benchmarks/bench_crawl.py
+#
+# End-to-end crawl benchmark: BillSessionSpider and the PostgreSQL pipeline
+# against the replay server and a scratch database, with no download delay,
+# autothrottle or HTTP cache in the way.
+#
+# Usage (from the legislative_scraper project directory):
+#     python -m benchmarks.bench_crawl [--corpus DIR] [--latency 0.05] [--concurrency 16]
+#                                      [--pipeline legislative_scraper.pipelines.PostgresPipeline]
+#                                      [--repeat N] [--json OUT] [-- extra scrapy crawl arguments]
+#
+# Without --corpus the synthetic corpus in .scrapy/fixtures/synthetic is used,
+# generated on first use (see benchmarks.fixtures). Each run starts from an
+# empty schema in --database and fresh version/validator stores, and reports
+# pages/s, items/s, peak RSS and the time spent writing to PostgreSQL.
+import argparse
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+from scrapy.utils.project import data_path
+
+from benchmarks import fixtures
+from benchmarks.bench_backfill import ensure_database, reset_schema
+from benchmarks.replay_server import Corpus
+from legislative_scraper.db import connection_params
+from legislative_scraper.sessions import format_sessions
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(corpus, port, args):
+    command = [
+        sys.executable, '-m', 'benchmarks.replay_server', corpus, '--port', str(port),
+        '--latency', str(args.latency), '--jitter', str(args.jitter), '--missing-rate', str(args.missing_rate),
+    ]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError('replay server did not start')
+
+
+def run_crawl(run_dir, sessions, server_url, args, extra):
+    if os.path.exists(run_dir):
+        shutil.rmtree(run_dir)
+    os.makedirs(run_dir)
+    stats_path = os.path.join(run_dir, 'stats.json')
+    downloader_middlewares = {
+        'benchmarks.replay_server.ReplayRewriteMiddleware': 51,
+        'legislative_scraper.middlewares.LegislativeScraperDownloaderMiddleware': 950,
+    }
+    settings = {
+        'DOWNLOAD_DELAY': 0,
+        'AUTOTHROTTLE_ENABLED': False,
+        'HTTPCACHE_ENABLED': False,
+        'CONCURRENT_REQUESTS': args.concurrency,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': args.concurrency,
+        'REPLAY_SERVER_URL': server_url,
+        'DOWNLOADER_MIDDLEWARES': json.dumps(downloader_middlewares),
+        'ITEM_PIPELINES': json.dumps({args.pipeline: 300}),
+        'BILL_VERSIONS_PATH': os.path.join(run_dir, 'bill_versions.json'),
+        'HTTP_VALIDATORS_PATH': os.path.join(run_dir, 'validators.json'),
+        'IMMUTABLE_FILTER_DIR': os.path.join(run_dir, 'immutable'),
+        'METRICS_EXPORT_JSON': os.path.join(run_dir, 'metrics.json'),
+        'METRICS_EXPORT_PROMETHEUS': '',
+        'STATS_EXPORT_PATH': stats_path,
+        'LOG_FILE': os.path.join(run_dir, 'crawl.log'),
+        'LOG_LEVEL': 'INFO',
+    }
+    command = [sys.executable, '-m', 'scrapy', 'crawl', 'bill_session', '-a', f"sessions={format_sessions(sessions)}"]
+    for name, value in settings.items():
+        command += ['-s', f"{name}={value}"]
+    command += extra
+
+    returncode = subprocess.run(command, env={**os.environ, 'DATABASE_NAME': args.database}).returncode
+    if returncode != 0 or not os.path.exists(stats_path):
+        raise RuntimeError(f"crawl failed with status {returncode}, see {settings['LOG_FILE']}")
+    with open(stats_path, 'r') as file:
+        return json.load(file)
+
+
+def summarize(stats):
+    elapsed = stats.get('elapsed_time_seconds') or 0.0
+    responses = stats.get('downloader/response_count', 0)
+    items = stats.get('item_scraped_count', 0)
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'pages': responses,
+        'items': items,
+        'pages_per_s': round(responses / elapsed, 1) if elapsed else None,
+        'items_per_s': round(items / elapsed, 1) if elapsed else None,
+        'db_write_s': round(stats.get('postgres/write_ms', 0) / 1000, 2),
+        'rows_failed': sum(value for key, value in stats.items() if key.startswith('postgres/rows_failed/')),
+        'reactor_stall_ms': stats.get('reactor/stall_total_ms'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark a full bill_session crawl against the replay server.')
+    parser.add_argument('--corpus', help='fixture corpus directory (default: generated synthetic corpus)')
+    parser.add_argument('--database', default='legislative_bench', help='scratch database name')
+    parser.add_argument('--pipeline', default='legislative_scraper.pipelines.PostgresPipeline')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.0, help='replay server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--missing-rate', type=float, default=0.0, help='share of bill texts answered with 404')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--json', help='also write the results to this file')
+    argv, extra = sys.argv[1:], []
+    if '--' in argv:
+        # Everything after -- is passed on to scrapy crawl
+        argv, extra = argv[:argv.index('--')], argv[argv.index('--') + 1:]
+    args = parser.parse_args(argv)
+
+    os.chdir(PROJECT_DIR)
+    if args.database == connection_params()['dbname']:
+        parser.error('--database must not be the configured DATABASE_NAME')
+    corpus = args.corpus or data_path(fixtures.DEFAULT_CORPUS)
+    if not os.path.exists(os.path.join(corpus, 'manifest.json')):
+        if args.corpus:
+            parser.error(f"no manifest.json in {corpus}")
+        print(f"Generating the synthetic corpus in {corpus}")
+        fixtures.generate(fixtures.generate_parser().parse_args(['--out', corpus]))
+    sessions = Corpus(corpus).sessions
+
+    ensure_database(args.database)
+    port = free_port()
+    server = start_server(corpus, port, args)
+    results = []
+    try:
+        for run in range(1, args.repeat + 1):
+            os.environ['DATABASE_NAME'] = args.database
+            reset_schema()
+            run_dir = data_path(os.path.join('bench_crawl', f"run-{run}"))
+            stats = run_crawl(run_dir, sessions, f"http://127.0.0.1:{port}", args, extra)
+            result = summarize(stats)
+            result['peak_rss_mib'] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+            results.append(result)
+            print(f"run {run}: " + ', '.join(f"{key}={value}" for key, value in result.items()))
+    finally:
+        server.terminate()
+        server.wait()
+
+    best = min(results, key=lambda result: result['elapsed_s'])
+    print(f"best: {best['pages_per_s']} pages/s, {best['items_per_s']} items/s, "
+          f"peak RSS {best['peak_rss_mib']} MiB, DB write {best['db_write_s']} s of {best['elapsed_s']} s")
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'corpus': corpus, 'pipeline': args.pipeline, 'concurrency': args.concurrency,
+                       'latency': args.latency, 'runs': results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
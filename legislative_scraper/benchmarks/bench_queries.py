@@ -0,0 +1,191 @@
+# benchmarks/bench_queries.py
+#
+# EXPLAIN ANALYZE the queries the pipelines and the dashboard make, on the schema
+# before a migration and again after it, to check that the migration's indexes and
+# partitions are actually used.
+#
+# Usage (from the legislative_scraper project directory):
+#     python -m benchmarks.bench_queries [--database NAME] [--migration FILE]
+#         [--parliaments 35-45] [--bills 500] [--divisions 1000] [--repeat 5]
+#
+# The scratch database (created if missing, on the server configured by DATABASE_*)
+# gets legislativeData.sql plus the migrations before --migration, synthetic rows for
+# --parliaments (two sessions each), then --migration itself. Times are the best of
+# --repeat runs; statements that write are rolled back.
+import argparse
+import os
+import re
+
+import psycopg2
+
+from benchmarks.bench_backfill import ensure_database, reset_schema
+from legislative_scraper import migrate
+from legislative_scraper.db import connection_params
+
+PARLIAMENT = 44
+# bills_p44, bills_p44_sponsor_id_idx, bills_default, ... -> bills_p*, bills_p*_sponsor_id_idx
+PARTITION_RE = re.compile(r'_(?:p\d+|default)(?=_|$)')
+
+# name -> statement; the bills, versions and votes of PARLIAMENT-1 exist at every scale
+QUERIES = {
+    'bill hashes of a session': f'''
+        SELECT bill_number, parliament_number, session_number, content_hash FROM bills
+        WHERE parliament_number = {PARLIAMENT} AND session_number = 1
+    ''',
+    'version hashes of a session': f'''
+        SELECT bill_number, parliament_number, session_number, version_number, content_hash FROM bill_details
+        WHERE parliament_number = {PARLIAMENT} AND session_number = 1
+    ''',
+    'divisions of a session': f'''
+        SELECT division_number FROM bill_votes WHERE parliament_number = {PARLIAMENT} AND session_number = 1
+    ''',
+    'stored division check': f'''
+        SELECT 1 FROM bill_votes
+        WHERE parliament_number = {PARLIAMENT} AND session_number = 1 AND division_number = '120'
+    ''',
+    'versions of a bill': f'''
+        SELECT version_number, title, short_title, sponsor, bill_ref_number FROM bill_details
+        WHERE parliament_number = {PARLIAMENT} AND session_number = 1 AND bill_number = 'C-10'
+        ORDER BY version_number
+    ''',
+    'bills of a sponsor': '''
+        SELECT bill_number, parliament_number, session_number FROM bills WHERE sponsor_id = 1234
+    ''',
+    'bills by stage date': '''
+        SELECT bill_number, parliament_number, session_number, bill_stage FROM bills
+        WHERE bill_stage_date >= '2015-03-01' AND bill_stage_date < '2015-04-01'
+    ''',
+    'votes of a bill by date': f'''
+        SELECT vote_date, division_number, decision FROM bill_votes
+        WHERE bill_number = 'C-10' AND parliament_number = {PARLIAMENT} AND session_number = 1
+        ORDER BY vote_date
+    ''',
+    'votes by date': '''
+        SELECT parliament_number, session_number, division_number FROM bill_votes
+        WHERE vote_date >= '2015-03-01' AND vote_date < '2015-03-08'
+    ''',
+    'delete a bill (cascades)': f'''
+        DELETE FROM bills WHERE bill_number = 'C-10' AND parliament_number = {PARLIAMENT} AND session_number = 1
+    ''',
+}
+
+# Deterministic synthetic rows; %(parliaments)s is an int[], the rest ints
+POPULATE_SQL = '''
+    INSERT INTO bills (
+        bill_number, parliament_number, session_number, bill_stage, bill_stage_date, sponsor_id, sponsor_name
+    )
+    SELECT 'C-' || n, p, s, 'Second reading',
+           TIMESTAMP '2000-01-01' + ((p * 7919 + s * 104729 + n * 31) %% 9000) * INTERVAL '1 day',
+           1000 + (p * 37 + n * 13) %% 900, 'Member ' || n
+    FROM unnest(%(parliaments)s) AS p, generate_series(1, 2) AS s, generate_series(1, %(bills)s) AS n;
+
+    INSERT INTO bill_details (
+        bill_number, parliament_number, session_number, version_number, title, short_title, sponsor,
+        bill_ref_number, body, content_hash
+    )
+    SELECT b.bill_number, b.parliament_number, b.session_number, v, 'An Act respecting ' || b.bill_number,
+           b.bill_number || ' Act', b.sponsor_name, b.bill_number || '_' || v,
+           repeat(md5(b.bill_number || v), 40), md5(b.bill_number || b.parliament_number || b.session_number || v)
+    FROM bills b, generate_series(1, 1 + b.bill_id %% 3) AS v;
+
+    INSERT INTO bill_votes (
+        parliament_number, session_number, description, decision, bill_number,
+        total_yeas, total_nays, total_abstain, vote_date, division_number
+    )
+    SELECT p, s, 'Division ' || d, CASE WHEN d %% 3 = 0 THEN 'Negatived' ELSE 'Agreed To' END,
+           CASE WHEN d %% 2 = 1 THEN 'C-' || (1 + d %% %(bills)s) END,
+           150 + d %% 50, 100 + d %% 40, 0,
+           DATE '2000-01-01' + (p * 7919 + s * 104729 + d * 7) %% 9000, d::text
+    FROM unnest(%(parliaments)s) AS p, generate_series(1, 2) AS s, generate_series(1, %(divisions)s) AS d;
+'''
+
+
+def parse_range(value):
+    first, _, last = value.partition('-')
+    return list(range(int(first), int(last or first) + 1))
+
+
+def plan_nodes(node):
+    # "Node type on relation/index" for every node of a JSON plan, partitions folded together
+    name = node['Node Type']
+    target = node.get('Index Name') or node.get('Relation Name')
+    nodes = [f"{name} on {PARTITION_RE.sub('_p*', target)}" if target else name]
+    for child in node.get('Plans', []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(connection, sql, repeat):
+    best = None
+    with connection.cursor() as cursor:
+        for _ in range(repeat):
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0][0]
+            connection.rollback()
+            if best is None or plan['Execution Time'] < best['Execution Time']:
+                best = plan
+    nodes = [node for node in plan_nodes(best['Plan']) if node not in ('Append', 'Result')]
+    # One entry per node and relation, with the number of partitions it ran on
+    counts = {}
+    for node in nodes:
+        counts[node] = counts.get(node, 0) + 1
+    summary = ', '.join(f"{node} x{count}" if count > 1 else node for node, count in counts.items())
+    # Execution Time includes the foreign key triggers of the delete
+    return best['Execution Time'], summary
+
+
+def run_queries(repeat):
+    connection = psycopg2.connect(**connection_params())
+    try:
+        return {name: explain(connection, sql, repeat) for name, sql in QUERIES.items()}
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare query plans before and after a schema migration.')
+    parser.add_argument('--database', default='legislative_bench', help='scratch database name')
+    parser.add_argument('--migration', default='0005_partition_by_parliament.sql', help='migration file to compare')
+    parser.add_argument('--parliaments', default='35-45', help='parliament range to generate, e.g. 35-45')
+    parser.add_argument('--bills', type=int, default=500, help='bills per session')
+    parser.add_argument('--divisions', type=int, default=1000, help='divisions per session')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.database == connection_params()['dbname']:
+        parser.error('--database must not be the configured DATABASE_NAME')
+    if args.migration not in migrate.available_migrations(migrate.MIGRATIONS_DIR):
+        parser.error(f"No migration {args.migration} in {migrate.MIGRATIONS_DIR}")
+    parliaments = parse_range(args.parliaments)
+    if PARLIAMENT not in parliaments:
+        parser.error(f"--parliaments must include {PARLIAMENT}")
+    ensure_database(args.database)
+    os.environ['DATABASE_NAME'] = args.database
+
+    reset_schema(until=args.migration)
+    connection = psycopg2.connect(**connection_params())
+    with connection.cursor() as cursor:
+        cursor.execute(POPULATE_SQL, {'parliaments': parliaments, 'bills': args.bills, 'divisions': args.divisions})
+        cursor.execute('ANALYZE')
+        cursor.execute('SELECT (SELECT count(*) FROM bills), (SELECT count(*) FROM bill_details), (SELECT count(*) FROM bill_votes)')
+        bills, details, votes = cursor.fetchone()
+    connection.commit()
+    print(f"{bills} bills, {details} bill versions, {votes} votes over {len(parliaments)} parliaments")
+
+    before = run_queries(args.repeat)
+    migrate.apply_migration(connection, migrate.MIGRATIONS_DIR, args.migration)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    connection.commit()
+    connection.close()
+    after = run_queries(args.repeat)
+
+    print(f"{'query':<28} {'before ms':>10} {'after ms':>10}")
+    for name in QUERIES:
+        print(f"{name:<28} {before[name][0]:>10.3f} {after[name][0]:>10.3f}")
+        print(f"    before: {before[name][1]}")
+        print(f"    after:  {after[name][1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_xmlparse.py
+#
+# Compare the original ElementTree parsing in bills.py with the streaming parsers
+# in legislative_scraper.xmlparse on recorded payloads.
+#
+# Usage (from the legislative_scraper project directory):
+#     python -m benchmarks.bench_xmlparse [PATH ...] [--repeat N]
+#
+# PATH may be an XML file or a directory; directories are searched for *.xml
+# files and Scrapy HTTP cache ``response_body`` files. Without a PATH the
+# project HTTP cache (.scrapy/httpcache) is used.
+import argparse
+import os
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from legislative_scraper.xmlparse import iter_elements, parse_bill_text
+
+LIST_FIELDS = [
+    "NumberCode", "LatestCompletedBillStageName", "LatestCompletedBillStageDateTime",
+    "SponsorPersonId", "SponsorPersonName", "SponsorAffiliationRoleName",
+]
+
+
+def legacy_bills_list(body):
+    root = ET.fromstring(body.decode('utf-8'))
+    return [[bill.findtext(field) for field in LIST_FIELDS] for bill in root.findall(".//Bill")]
+
+
+def streaming_bills_list(body):
+    return [[bill.findtext(field) for field in LIST_FIELDS] for bill in iter_elements(body, 'Bill')]
+
+
+def legacy_bill_text(body):
+    root = ET.fromstring(body.decode('utf-8'))
+    identification = root.find(".//Identification")
+    return (
+        identification.findtext("BillNumber"),
+        ET.tostring(root.find(".//BillHistory"), encoding='unicode') if root.find(".//BillHistory") else None,
+        ET.tostring(root.find(".//Introduction"), encoding='unicode') if root.find(".//Introduction") else None,
+        ET.tostring(root.find(".//Body"), encoding='unicode') if root.find(".//Body") else None,
+    )
+
+
+def streaming_bill_text(body):
+    return parse_bill_text(body)
+
+
+def find_payloads(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                if filename == 'response_body' or filename.endswith('.xml'):
+                    yield os.path.join(dirpath, filename)
+
+
+def classify(body):
+    head = body[:2048]
+    if b'<Bills' in head:
+        return 'bills_list'
+    if b'<Identification' in body:
+        return 'bill_text'
+    return None
+
+
+def measure(func, payloads, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for body in payloads:
+            func(body)
+        best = min(best, time.perf_counter() - start)
+
+    peak = 0
+    for body in payloads:
+        tracemalloc.start()
+        func(body)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare legacy and streaming XML parsing on recorded payloads.')
+    parser.add_argument('paths', nargs='*', default=[os.path.join('.scrapy', 'httpcache')])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    groups = {'bills_list': [], 'bill_text': []}
+    for path in find_payloads(args.paths):
+        with open(path, 'rb') as file:
+            body = file.read()
+        kind = classify(body)
+        if kind:
+            groups[kind].append(body)
+
+    cases = {
+        'bills_list': (legacy_bills_list, streaming_bills_list),
+        'bill_text': (legacy_bill_text, streaming_bill_text),
+    }
+    print(f"{'payload':<12} {'files':>6} {'MiB':>8} {'parser':<10} {'time s':>9} {'peak MiB':>9}")
+    for kind, (legacy, streaming) in cases.items():
+        payloads = groups[kind]
+        if not payloads:
+            print(f"{kind:<12} {0:>6} (no recorded payloads found)")
+            continue
+        size = sum(len(body) for body in payloads) / 2**20
+        for name, func in (('legacy', legacy), ('streaming', streaming)):
+            elapsed, peak = measure(func, payloads, args.repeat)
+            print(f"{kind:<12} {len(payloads):>6} {size:>8.2f} {name:<10} {elapsed:>9.3f} {peak / 2**20:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+# benchmarks/fixtures.py
+#
+# Build a fixture corpus for benchmarks.replay_server:
+#
+#     python -m benchmarks.fixtures record [--out DIR] [--spider bill_session --spider votes]
+#     python -m benchmarks.fixtures generate [--out DIR] [--bills 40] [--sections 60] [--seed 1]
+#
+# `record` exports the responses of real crawls from the SQLite HTTP cache
+# (.scrapy/httpcache/<spider>.sqlite; crawl once with HTTPCACHE_ENABLED). `generate`
+# writes a deterministic synthetic corpus with the same endpoints and XML elements
+# as parl.ca, for machines that never crawled it.
+#
+# A corpus is a directory of payload files plus manifest.json:
+#     {"sessions": [[44, 1], ...], "responses": {"/path?query": {"status": 200, "file": "..."}}}
+# URLs missing from the manifest are answered with 404 by the replay server.
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import random
+import re
+import sqlite3
+import zlib
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape
+
+from scrapy.utils.project import data_path
+
+from legislative_scraper.endpoints import url_family
+from legislative_scraper.sessions import parse_sessions_arg
+
+BILLS_LIST_SESSION = re.compile(r'parlsession=(\d+)-(\d+)')
+DEFAULT_CORPUS = os.path.join('fixtures', 'synthetic')
+DEFAULT_SESSIONS = '35-1,35-2,36-1,36-2,37-1,37-2,37-3,38-1,39-1,39-2,40-1,40-2,40-3,41-1,41-2,42-1,43-1,43-2,44-1'
+
+
+def url_key(url):
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+class CorpusWriter:
+    def __init__(self, directory):
+        self.directory = directory
+        self.responses = {}
+        self.sessions = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, url, status, body=None):
+        key = url_key(url)
+        entry = {'status': status}
+        if body:
+            entry['file'] = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.xml'
+            with open(os.path.join(self.directory, entry['file']), 'wb') as file:
+                file.write(body)
+        self.responses[key] = entry
+
+    def save(self):
+        manifest = {'sessions': sorted(self.sessions), 'responses': self.responses}
+        with open(os.path.join(self.directory, 'manifest.json'), 'w') as file:
+            json.dump(manifest, file, indent=1, sort_keys=True)
+        total = sum(
+            os.path.getsize(os.path.join(self.directory, entry['file']))
+            for entry in self.responses.values() if 'file' in entry
+        )
+        print(f"Wrote {len(self.responses)} responses ({total / 2**20:.1f} MiB) for "
+              f"{len(self.sessions)} sessions to {self.directory}")
+
+
+def record(args):
+    writer = CorpusWriter(args.out)
+    for spider in args.spider or ['bill_session', 'votes']:
+        path = data_path(os.path.join('httpcache', f"{spider}.sqlite"))
+        if not os.path.exists(path):
+            print(f"No HTTP cache for {spider} at {path}")
+            continue
+        db = sqlite3.connect(path)
+        for (blob,) in db.execute("SELECT data FROM responses"):
+            data = pickle.loads(zlib.decompress(blob))
+            writer.add(data['url'], data['status'], data['body'])
+            # Sessions are the bills lists that answered
+            match = BILLS_LIST_SESSION.search(data['url'])
+            if match and data['status'] == 200 and url_family(data['url']) == 'bills_list':
+                writer.sessions.add((int(match.group(1)), int(match.group(2))))
+        db.close()
+    writer.save()
+
+
+def bills_list_xml(bills):
+    rows = ''.join(
+        f"<Bill><NumberCode>{code}</NumberCode>"
+        f"<LatestCompletedBillStageName>{escape(stage)}</LatestCompletedBillStageName>"
+        f"<LatestCompletedBillStageDateTime>{stage_date}</LatestCompletedBillStageDateTime>"
+        f"<SponsorPersonId>{sponsor_id}</SponsorPersonId><SponsorPersonName>Member {sponsor_id}</SponsorPersonName>"
+        f"<SponsorAffiliationRoleName>Member of Parliament</SponsorAffiliationRoleName></Bill>"
+        for code, stage, stage_date, sponsor_id in bills
+    )
+    return f'<?xml version="1.0" encoding="utf-8"?><Bills>{rows}</Bills>'.encode('utf-8')
+
+
+def bill_data_xml(code, stage, stage_date, sponsor_id, government):
+    bill_type = 'House Government Bill' if government else "Private Member's Bill"
+    return (
+        f'<?xml version="1.0" encoding="utf-8"?><Bills><Bill><NumberCode>{code}</NumberCode>'
+        f"<BillTypeEn>{escape(bill_type)}</BillTypeEn>"
+        f"<LatestCompletedBillStageName>{escape(stage)}</LatestCompletedBillStageName>"
+        f"<LatestCompletedBillStageDateTime>{stage_date}</LatestCompletedBillStageDateTime>"
+        f"<SponsorPersonId>{sponsor_id}</SponsorPersonId><SponsorPersonName>Member {sponsor_id}</SponsorPersonName>"
+        f"<SponsorAffiliationTitle>Member of Parliament</SponsorAffiliationTitle></Bill></Bills>"
+    ).encode('utf-8')
+
+
+def bill_text_xml(rng, code, parliament, session, version, sections):
+    words = ['Minister', 'regulation', 'person', 'Act', 'section', 'prescribed', 'notice', 'order', 'Canada', 'amended']
+    body = []
+    for number in range(1, sections + 1):
+        if number % 10 == 1:
+            body.append(f"<Heading level=\"1\"><TitleText>Part {number // 10 + 1}</TitleText></Heading>")
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(20, 80)))
+        subsections = ''.join(
+            f"<Subsection><Label>({sub})</Label><Text>{text} {sub} v{version}</Text></Subsection>"
+            for sub in range(1, rng.randint(1, 4))
+        )
+        body.append(
+            f"<Section><Label>{number}</Label><MarginalNote>Provision {number}</MarginalNote>"
+            f"<Text>{text} v{version}</Text>{subsections}</Section>"
+        )
+    return (
+        f'<?xml version="1.0" encoding="utf-8"?><Bill><Identification>'
+        f"<BillNumber>{code}</BillNumber><Parliament><Number>{parliament}</Number><Session>{session}</Session></Parliament>"
+        f"<LongTitle>An Act respecting {code} of the {parliament}th Parliament</LongTitle>"
+        f"<ShortTitle>{code} Act</ShortTitle><BillSponsor>Member</BillSponsor><BillRefNumber>{code}_{version}</BillRefNumber>"
+        f"</Identification><BillHistory><Stages><Stage>First reading</Stage><Version>{version}</Version></Stages></BillHistory>"
+        f"<Introduction><Summary><Text>This enactment concerns {code}.</Text></Summary></Introduction>"
+        f"<Body>{''.join(body)}</Body></Bill>"
+    ).encode('utf-8')
+
+
+def votes_xml(parliament, session, divisions, bill_codes):
+    rows = ''.join(
+        f"<Vote><ParliamentNumber>{parliament}</ParliamentNumber><SessionNumber>{session}</SessionNumber>"
+        f"<DecisionEventDateTime>2024-02-{1 + number % 28:02d}T15:00:00</DecisionEventDateTime>"
+        f"<DecisionDivisionSubject>Division {number}</DecisionDivisionSubject>"
+        f"<DecisionResultName>{'Agreed To' if number % 3 else 'Negatived'}</DecisionResultName>"
+        f"<DecisionDivisionNumberOfYeas>{150 + number % 50}</DecisionDivisionNumberOfYeas>"
+        f"<DecisionDivisionNumberOfNays>{100 + number % 40}</DecisionDivisionNumberOfNays>"
+        f"<DecisionDivisionNumberOfPaired>2</DecisionDivisionNumberOfPaired>"
+        f"<DecisionDivisionNumber>{number}</DecisionDivisionNumber>"
+        f"<BillNumberCode>{bill_codes[number % len(bill_codes)] if number % 2 else ''}</BillNumberCode></Vote>"
+        for number in range(1, divisions + 1)
+    )
+    return f'<?xml version="1.0" encoding="utf-8"?><ArrayOfVote>{rows}</ArrayOfVote>'.encode('utf-8')
+
+
+def generate(args):
+    from legislative_scraper.spiders.bills import BILL_DATA_URL, BILL_DETAILS_URL, BILLS_LIST_URL, BILL_VOTES_URL
+
+    rng = random.Random(args.seed)
+    writer = CorpusWriter(args.out)
+    stages = ['First reading', 'Second reading', 'Committee report', 'Third reading', 'Royal assent']
+    for parliament, session in parse_sessions_arg(args.sessions):
+        writer.sessions.add((parliament, session))
+        bills = []
+        government_count = max(1, args.bills // 2)
+        codes = [f"C-{n}" for n in range(1, government_count + 1)]
+        codes += [f"C-{200 + n}" for n in range(1, args.bills - government_count + 1)]
+        for code in codes:
+            stage = rng.choice(stages)
+            stage_date = f"20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00-04:00"
+            sponsor_id = rng.randint(1000, 9999)
+            government = int(code.split('-')[1]) <= 200
+            bills.append((code, stage, stage_date, sponsor_id))
+            writer.add(BILL_DATA_URL.format(parliament=parliament, session=session, bill_number=code), 200,
+                       bill_data_xml(code, stage, stage_date, sponsor_id, government))
+            for version in range(1, rng.randint(1, args.max_versions) + 1):
+                url = BILL_DETAILS_URL.format(
+                    parliament=parliament, session=session, bill_type='Government' if government else 'Private',
+                    bill_number=code, count=version,
+                )
+                writer.add(url, 200, bill_text_xml(rng, code, parliament, session, version,
+                                                   rng.randint(args.sections // 2, args.sections)))
+        writer.add(BILLS_LIST_URL.format(parliament=parliament, session=session), 200, bills_list_xml(bills))
+        writer.add(BILL_VOTES_URL.format(parliament=parliament, session=session), 200,
+                   votes_xml(parliament, session, args.divisions, codes))
+    writer.save()
+
+
+def generate_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description='Write a deterministic synthetic corpus.')
+    parser.add_argument('--out', default=data_path(DEFAULT_CORPUS))
+    parser.add_argument('--sessions', default=DEFAULT_SESSIONS)
+    parser.add_argument('--bills', type=int, default=40, help='bills per session')
+    parser.add_argument('--max-versions', type=int, default=5)
+    parser.add_argument('--sections', type=int, default=60, help='maximum sections per bill text')
+    parser.add_argument('--divisions', type=int, default=50, help='votes per session')
+    parser.add_argument('--seed', type=int, default=1)
+    return parser
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a fixture corpus for the replay server.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='export responses from the SQLite HTTP cache')
+    record_parser.add_argument('--out', default=data_path(os.path.join('fixtures', 'recorded')))
+    record_parser.add_argument('--spider', action='append', help='spider caches to export (default: bill_session, votes)')
+    record_parser.set_defaults(func=record)
+
+    generate_parser(commands.add_parser('generate', help='write a deterministic synthetic corpus')).set_defaults(
+        func=generate
+    )
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
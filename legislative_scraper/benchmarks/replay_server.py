@@ -0,0 +1,140 @@
+# benchmarks/replay_server.py
+#
+# Local stand-in for parl.ca / ourcommons.ca serving a fixture corpus
+# (see benchmarks.fixtures):
+#
+#     python -m benchmarks.replay_server [CORPUS] [--port 8765] [--latency 0.05] [--jitter 0.02]
+#                                        [--missing REGEX ...] [--missing-rate 0.0]
+#
+# Every response is delayed by latency +/- jitter seconds. Paths matching a
+# --missing pattern, a deterministic --missing-rate share of the bill text
+# paths, and paths absent from the corpus are answered with 404. Bodies carry
+# an ETag, and If-None-Match is honoured, as delta crawls expect.
+#
+# Point a crawl at it with ReplayRewriteMiddleware and REPLAY_SERVER_URL.
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit
+
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+
+from legislative_scraper.endpoints import url_family
+
+
+class Corpus:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'manifest.json'), 'r') as file:
+            manifest = json.load(file)
+        self.sessions = [tuple(pair) for pair in manifest['sessions']]
+        self.responses = manifest['responses']
+
+    def lookup(self, key):
+        entry = self.responses.get(key)
+        if entry is None:
+            return 404, b''
+        body = b''
+        if 'file' in entry:
+            with open(os.path.join(self.directory, entry['file']), 'rb') as file:
+                body = file.read()
+        return entry['status'], body
+
+
+def make_handler(corpus, latency, jitter, missing, missing_rate):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def is_missing(self, key):
+            if any(pattern.search(key) for pattern in missing):
+                return True
+            if missing_rate and url_family(key) == 'bill_text':
+                # Hash based so every run drops the same paths
+                bucket = int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) / 0xffffffff
+                return bucket < missing_rate
+            return False
+
+        def do_GET(self):
+            if latency or jitter:
+                time.sleep(max(0.0, random.uniform(latency - jitter, latency + jitter)))
+            key = self.path
+            status, body = (404, b'') if self.is_missing(key) else corpus.lookup(key)
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"' if status == 200 else None
+            if etag and self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/xml; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return ReplayHandler
+
+
+class ReplayRewriteMiddleware:
+    """Send every request to the replay server at REPLAY_SERVER_URL instead of its host.
+
+    The URL is rewritten in place; with order 51 in DOWNLOADER_MIDDLEWARES it runs
+    right after the offsite filter (50), which must see the original host, and
+    every later middleware, including the HTTP cache, sees the rewritten URL.
+    Paths are kept, so URL families are unchanged.
+    """
+
+    def __init__(self, server_url):
+        parts = urlsplit(server_url)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        server_url = crawler.settings.get('REPLAY_SERVER_URL')
+        if not server_url:
+            raise NotConfigured
+        return cls(server_url)
+
+    def process_request(self, request, spider):
+        parts = urlsplit(request.url)
+        if parts.netloc != self.netloc:
+            request._set_url(urlunsplit((self.scheme, self.netloc, parts.path, parts.query, '')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a fixture corpus in place of parl.ca.')
+    parser.add_argument('corpus', nargs='?', default=data_path(os.path.join('fixtures', 'synthetic')))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--missing', action='append', default=[], help='regex of paths answered with 404')
+    parser.add_argument('--missing-rate', type=float, default=0.0, help='share of bill text paths answered with 404')
+    args = parser.parse_args()
+
+    corpus = Corpus(args.corpus)
+    handler = make_handler(corpus, args.latency, args.jitter, [re.compile(p) for p in args.missing], args.missing_rate)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    print(f"Serving {len(corpus.responses)} responses from {args.corpus} on http://{args.host}:{server.server_port}",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# legislative_scraper/checkpoints.py
+import os
+import sqlite3
+from time import time
+
+from scrapy.utils.project import data_path
+
+
+class CheckpointStore:
+    """Durable record of the crawl units already stored in the database.
+
+    One SQLite file per named crawl (``-a checkpoint=NAME``), shared by every
+    worker process of that crawl. A unit is (parliament, session, bill, version):
+    version 0 is the bills row, versions 1..n the bill_details rows. The pipelines
+    mark units once their rows are committed, and the spider records how many
+    versions a bill has once its version search ends; a bill whose row and every
+    version are marked is complete and is not requested again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+
+    @classmethod
+    def from_settings(cls, settings, name):
+        path = cls.path_for(settings, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        store = cls(path)
+        store.open()
+        return store
+
+    @staticmethod
+    def path_for(settings, name):
+        return data_path(os.path.join(settings.get('CHECKPOINT_DIR', 'checkpoints'), f"{name}.sqlite"))
+
+    @staticmethod
+    def remove(path):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    def open(self):
+        # Workers of a sharded crawl write concurrently; WAL lets readers through and
+        # the timeout makes writers queue instead of failing.
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute('''
+                CREATE TABLE IF NOT EXISTS units (
+                    parliament INTEGER NOT NULL,
+                    session INTEGER NOT NULL,
+                    bill_number TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (parliament, session, bill_number, version)
+                )
+            ''')
+            self.db.execute('''
+                CREATE TABLE IF NOT EXISTS version_counts (
+                    parliament INTEGER NOT NULL,
+                    session INTEGER NOT NULL,
+                    bill_number TEXT NOT NULL,
+                    version_count INTEGER NOT NULL,
+                    PRIMARY KEY (parliament, session, bill_number)
+                )
+            ''')
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def mark_units(self, units):
+        """Mark (parliament, session, bill_number, version) units as stored."""
+        now = time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO units VALUES (?, ?, ?, ?, ?)",
+                ((parliament, session, bill_number, version, now)
+                 for parliament, session, bill_number, version in units),
+            )
+
+    def mark_version_count(self, parliament, session, bill_number, version_count):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO version_counts VALUES (?, ?, ?, ?)",
+                (parliament, session, bill_number, version_count),
+            )
+
+    def completed_bills(self, parliament, session):
+        """Bill numbers of one session whose row and every version are stored."""
+        rows = self.db.execute('''
+            SELECT c.bill_number
+            FROM version_counts c
+            JOIN units u
+              ON u.parliament = c.parliament AND u.session = c.session AND u.bill_number = c.bill_number
+            WHERE c.parliament = ? AND c.session = ? AND u.version <= c.version_count
+            GROUP BY c.bill_number, c.version_count
+            HAVING count(*) = c.version_count + 1
+        ''', (parliament, session)).fetchall()
+        return {row[0] for row in rows}
+
+    def completed_versions(self, parliament, session, bill_number):
+        rows = self.db.execute(
+            "SELECT version FROM units WHERE parliament = ? AND session = ? AND bill_number = ? AND version > 0",
+            (parliament, session, bill_number),
+        ).fetchall()
+        return {row[0] for row in rows}
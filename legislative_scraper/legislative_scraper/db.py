@@ -0,0 +1,71 @@
+# legislative_scraper/db.py
+import os
+
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+BUMP_GENERATIONS_SQL = '''
+    INSERT INTO data_generations AS g (parliament_number, session_number) VALUES %s
+    ON CONFLICT (parliament_number, session_number) DO UPDATE SET
+        generation = g.generation + 1,
+        changed_at = now()
+'''
+
+
+def connection_params():
+    # Load environment variables
+    load_dotenv()
+    return dict(
+        host=os.getenv('DATABASE_HOST'),
+        port=int(os.getenv('DATABASE_PORT')),
+        user=os.getenv('DATABASE_USER'),
+        password=os.getenv('DATABASE_PASSWORD'),
+        dbname=os.getenv('DATABASE_NAME')
+    )
+
+
+def connect():
+    return psycopg2.connect(**connection_params())
+
+
+def fetch_stage_dates(cursor, parliament, session):
+    """Return {bill_number: bill_stage_date} for the bills stored for one session."""
+    cursor.execute('''
+        SELECT bill_number, bill_stage_date FROM bills
+        WHERE parliament_number = %s AND session_number = %s
+    ''', (parliament, session))
+    return dict(cursor.fetchall())
+
+
+def fetch_division_numbers(cursor, parliament, session):
+    """Return {division number: whether it is linked to a bill} for the divisions stored in
+    bill_votes for one session."""
+    cursor.execute('''
+        SELECT division_number, bool_or(bill_number IS NOT NULL) FROM bill_votes
+        WHERE parliament_number = %s AND session_number = %s
+        GROUP BY division_number
+    ''', (parliament, session))
+    return dict(cursor.fetchall())
+
+
+def fetch_content_hashes(cursor, table, key_columns, parliament, session):
+    """Return {key: content_hash} for the rows of ``table`` stored for one session."""
+    cursor.execute(f'''
+        SELECT {', '.join(key_columns)}, content_hash FROM {table}
+        WHERE parliament_number = %s AND session_number = %s
+    ''', (parliament, session))
+    return {tuple(row[:-1]): row[-1] for row in cursor.fetchall()}
+
+
+def bump_generations(cursor, sessions):
+    """Count up the data generation (migrations/0008_data_generations.sql) of each
+    (parliament, session); run it in the transaction writing their rows, as its last statement."""
+    # Sorted so transactions bumping the same sessions lock them in the same order; rows
+    # without a session were not written
+    sessions = sorted({
+        (int(parliament), int(session)) for parliament, session in sessions
+        if parliament is not None and session is not None
+    })
+    if sessions:
+        execute_values(cursor, BUMP_GENERATIONS_SQL, sessions, page_size=len(sessions))
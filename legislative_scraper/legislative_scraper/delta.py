@@ -0,0 +1,96 @@
+# legislative_scraper/delta.py
+import json
+import os
+from datetime import datetime
+
+from scrapy.utils.project import data_path
+
+from legislative_scraper.locks import locked
+
+
+def parse_stage_date(value):
+    """Parse a LatestCompletedBillStageDateTime value the way the bills table stores it.
+
+    bills.bill_stage_date is a TIMESTAMP without time zone, so PostgreSQL drops any
+    UTC offset on insert; the offset is dropped here as well to compare like with like.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    try:
+        return datetime.fromisoformat(value.strip()).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def stage_changed(listed_value, stored_value):
+    """True when the bill list reports a stage date the database has not seen yet."""
+    listed = parse_stage_date(listed_value)
+    stored = parse_stage_date(stored_value)
+    if listed is None or stored is None:
+        return True
+    return listed != stored
+
+
+class ValidatorStore:
+    """HTTP validators (ETag / Last-Modified) of the bills list pages, kept between runs."""
+
+    def __init__(self, path):
+        self.path = path
+        self.validators = {}
+        self.updated = {}  # url -> validators, or None once dropped
+
+    @classmethod
+    def from_settings(cls, settings):
+        path = data_path(settings.get('HTTP_VALIDATORS_PATH', 'validators.json'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        store = cls(path)
+        store.load()
+        return store
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as file:
+            self.validators = json.load(file)
+
+    def save(self):
+        # Merged into the current file, as in VersionStore.save
+        with locked(self.path):
+            self.load()
+            for url, validators in self.updated.items():
+                if validators is None:
+                    self.validators.pop(url, None)
+                else:
+                    self.validators[url] = validators
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(self.validators, file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def forget(self, url):
+        # The page is requested without validators next time
+        self.validators.pop(url, None)
+        self.updated[url] = None
+
+    def request_headers(self, url):
+        validators = self.validators.get(url, {})
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def update(self, url, response_headers):
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            self.validators.pop(url, None)
+            self.updated[url] = None
+            return
+        self.validators[url] = self.updated[url] = {
+            'etag': etag.decode('latin-1') if etag else None,
+            'last_modified': last_modified.decode('latin-1') if last_modified else None,
+        }
@@ -0,0 +1,18 @@
+# legislative_scraper/endpoints.py
+import re
+
+# URL families of the endpoints crawled by the spiders (see spiders/bills.py)
+URL_FAMILIES = [
+    ('bills_list', re.compile(r'/legisinfo/en/bills/xml', re.IGNORECASE)),
+    ('bill_data', re.compile(r'/legisinfo/en/bill/[^/]+/[^/]+/xml', re.IGNORECASE)),
+    ('bill_text', re.compile(r'/Content/Bills/', re.IGNORECASE)),
+    ('votes', re.compile(r'/Members/en/votes/xml', re.IGNORECASE)),
+]
+
+
+def url_family(url):
+    """Classify a request URL as bills_list, bill_data, bill_text, votes or other."""
+    for family, pattern in URL_FAMILIES:
+        if pattern.search(url):
+            return family
+    return 'other'
@@ -0,0 +1,89 @@
+# legislative_scraper/extensions.py
+import json
+import os
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+
+class ReactorStallMonitor:
+    """Measure how long the reactor thread is blocked (e.g. by synchronous parsing).
+
+    A LoopingCall is scheduled every REACTOR_STALL_INTERVAL seconds; any delay past
+    its due time is time the reactor could not run downloads or callbacks. Totals
+    are reported under reactor/* in the crawl stats.
+    """
+
+    def __init__(self, stats, interval, threshold):
+        self.stats = stats
+        self.interval = interval
+        self.threshold = threshold  # Delays shorter than this are scheduling noise
+        self.task = None
+        self.last = None
+        self.stall_total = 0.0
+        self.stall_max = 0.0
+        self.stall_count = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('REACTOR_STALL_MONITOR_ENABLED'):
+            raise NotConfigured
+        ext = cls(
+            crawler.stats,
+            interval=crawler.settings.getfloat('REACTOR_STALL_INTERVAL', 0.05),
+            threshold=crawler.settings.getfloat('REACTOR_STALL_THRESHOLD', 0.02),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.last = time.monotonic()
+        self.task = task.LoopingCall(self.tick)
+        self.task.start(self.interval, now=False)
+
+    def tick(self):
+        now = time.monotonic()
+        stall = now - self.last - self.interval
+        self.last = now
+        if stall < self.threshold:
+            return
+        self.stall_total += stall
+        self.stall_max = max(self.stall_max, stall)
+        self.stall_count += 1
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.stats.set_value('reactor/stall_total_ms', int(self.stall_total * 1000))
+        self.stats.set_value('reactor/stall_max_ms', int(self.stall_max * 1000))
+        self.stats.set_value('reactor/stall_count', self.stall_count)
+
+
+class StatsFileExport:
+    """Write the final crawl stats as JSON to STATS_EXPORT_PATH.
+
+    Used by the sharded launcher (legislative_scraper.launch) to aggregate the
+    stats of its worker processes. Written on engine_stopped, once the stats
+    collector has recorded finish_time and finish_reason.
+    """
+
+    def __init__(self, stats, path):
+        self.stats = stats
+        self.path = path
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get('STATS_EXPORT_PATH')
+        if not path:
+            raise NotConfigured
+        ext = cls(crawler.stats, path)
+        crawler.signals.connect(ext.engine_stopped, signal=signals.engine_stopped)
+        return ext
+
+    def engine_stopped(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'w') as file:
+            json.dump(self.stats.get_stats(), file, indent=2, sort_keys=True, default=str)
@@ -0,0 +1,192 @@
+# legislative_scraper/httpcache.py
+import logging
+import os
+import pickle
+import sqlite3
+import zlib
+from time import time
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+
+from legislative_scraper.endpoints import url_family
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteCacheStorage:
+    """HTTP cache storage keeping zlib-compressed responses in one SQLite file per spider.
+
+    Replaces FilesystemCacheStorage, which writes several files per response and
+    never evicts. Settings:
+
+    - HTTPCACHE_SQLITE_MAX_BYTES: cap on stored (compressed) bytes, across all the
+      processes sharing the file; least recently used responses are evicted past it.
+      0 disables the cap.
+    - HTTPCACHE_SQLITE_MAX_IDLE_SECS: responses not read for this long are dropped
+      when the spider opens. 0 keeps them.
+    - HTTPCACHE_FAMILY_EXPIRATION_SECS: per URL family TTL (see endpoints.url_family);
+      families not listed use HTTPCACHE_EXPIRATION_SECS. 0 means never expire, which
+      only holds for 200 responses: other statuses of such a family (a 404 for a bill
+      text version not published yet) are not stored, so they are asked again next run.
+    """
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings["HTTPCACHE_DIR"], createdir=True)
+        self.expiration_secs = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self.family_expiration_secs = settings.getdict("HTTPCACHE_FAMILY_EXPIRATION_SECS")
+        self.max_bytes = settings.getint("HTTPCACHE_SQLITE_MAX_BYTES")
+        self.max_idle_secs = settings.getint("HTTPCACHE_SQLITE_MAX_IDLE_SECS")
+        self.compression_level = settings.getint("HTTPCACHE_SQLITE_COMPRESSION_LEVEL", 6)
+        self.db = None
+
+    def open_spider(self, spider):
+        dbpath = os.path.join(self.cachedir, f"{spider.name}.sqlite")
+        self.db = sqlite3.connect(dbpath, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                fingerprint TEXT PRIMARY KEY,
+                family TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at)")
+        # Sharded crawls share the file, so the stored size is kept in it by triggers rather than
+        # counted per process; created in one transaction so a concurrent open cannot miss rows
+        self.db.execute("BEGIN IMMEDIATE")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)"
+        )
+        self.db.execute(
+            "INSERT OR IGNORE INTO cache_size (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM responses"
+        )
+        self.db.execute('''
+            CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN
+                UPDATE cache_size SET bytes = bytes + NEW.size WHERE id = 0;
+            END
+        ''')
+        self.db.execute('''
+            CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN
+                UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0;
+            END
+        ''')
+        self.db.execute('''
+            CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN
+                UPDATE cache_size SET bytes = bytes - OLD.size WHERE id = 0;
+            END
+        ''')
+        self.db.execute("COMMIT")
+
+        self.stats = spider.crawler.stats
+        self._fingerprinter = spider.crawler.request_fingerprinter
+
+        if self.max_idle_secs > 0:
+            evicted = self.db.execute(
+                "DELETE FROM responses WHERE accessed_at < ?", (time() - self.max_idle_secs,)
+            ).rowcount
+            self.stats.inc_value("httpcache/sqlite/evicted", evicted)
+        self._evict()
+
+        logger.debug(
+            "Using SQLite cache storage in %(cachepath)s (%(size)d bytes)",
+            {"cachepath": dbpath, "size": self.stored_bytes()},
+            extra={"spider": spider},
+        )
+
+    def close_spider(self, spider):
+        self.stats.set_value("httpcache/sqlite/stored_bytes", self.stored_bytes())
+        self.db.close()
+
+    def retrieve_response(self, spider, request):
+        key = self._fingerprinter.fingerprint(request).hex()
+        family = url_family(request.url)
+        row = self.db.execute(
+            "SELECT data, stored_at FROM responses WHERE fingerprint = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.stats.inc_value(f"httpcache/sqlite/miss/{family}")
+            return  # not cached
+
+        blob, stored_at = row
+        expiration_secs = self._expiration_secs(family)
+        if 0 < expiration_secs < time() - stored_at:
+            self.stats.inc_value(f"httpcache/sqlite/expired/{family}")
+            return  # expired
+
+        data = pickle.loads(zlib.decompress(blob))
+        status = data["status"]
+        if expiration_secs == 0 and status != 200:
+            # Stored before non-200 responses of never expiring families were skipped
+            self.db.execute("DELETE FROM responses WHERE fingerprint = ?", (key,))
+            self.stats.inc_value(f"httpcache/sqlite/expired/{family}")
+            return
+
+        self.db.execute("UPDATE responses SET accessed_at = ? WHERE fingerprint = ?", (time(), key))
+        self.stats.inc_value(f"httpcache/sqlite/hit/{family}")
+        url = data["url"]
+        headers = Headers(data["headers"])
+        body = data["body"]
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        response = respcls(url=url, headers=headers, status=status, body=body)
+        return response
+
+    def store_response(self, spider, request, response):
+        family = url_family(request.url)
+        if response.status != 200 and self._expiration_secs(family) == 0:
+            self.stats.inc_value(f"httpcache/sqlite/skipped/{family}")
+            return
+        key = self._fingerprinter.fingerprint(request).hex()
+        data = {
+            "status": response.status,
+            "url": response.url,
+            "headers": dict(response.headers),
+            "body": response.body,
+        }
+        blob = zlib.compress(pickle.dumps(data, protocol=4), self.compression_level)
+        now = time()
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete would not fire the size trigger
+        self.db.execute(
+            "INSERT INTO responses (fingerprint, family, data, size, stored_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (fingerprint) DO UPDATE SET family = excluded.family, data = excluded.data, "
+            "size = excluded.size, stored_at = excluded.stored_at, accessed_at = excluded.accessed_at",
+            (key, family, blob, len(blob), now, now),
+        )
+        self.stats.inc_value("httpcache/sqlite/store")
+        self._evict()
+
+    def _expiration_secs(self, family):
+        return int(self.family_expiration_secs.get(family, self.expiration_secs))
+
+    def stored_bytes(self):
+        # Includes the writes of other processes sharing the file
+        return self.db.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+
+    def _evict(self):
+        stored_bytes = self.stored_bytes()
+        if self.max_bytes <= 0 or stored_bytes <= self.max_bytes:
+            return
+        # Evict down to 90% of the cap so eviction does not run on every store
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while stored_bytes > target:
+            rows = self.db.execute(
+                "SELECT fingerprint, size FROM responses ORDER BY accessed_at LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            for fingerprint, size in rows:
+                if stored_bytes <= target:
+                    break
+                self.db.execute("DELETE FROM responses WHERE fingerprint = ?", (fingerprint,))
+                stored_bytes -= size
+                evicted += 1
+            # Other processes may have stored or evicted meanwhile
+            stored_bytes = self.stored_bytes()
+        self.stats.inc_value("httpcache/sqlite/evicted", evicted)
@@ -0,0 +1,167 @@
+# legislative_scraper/immutable.py
+import hashlib
+import json
+import math
+import os
+import time
+from urllib.parse import urlsplit
+
+from scrapy.utils.project import data_path
+
+from legislative_scraper.locks import locked
+
+
+class BloomFilter:
+    """Fixed-size set of strings with no false negatives and ~``error_rate`` false positives.
+
+    Sized for ``capacity`` entries; past that the false-positive rate grows.
+    """
+
+    def __init__(self, capacity, error_rate, bits=None, count=0, created=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+        self.created = created if created is not None else time.time()
+
+    def positions(self, key):
+        # Double hashing: k indexes from the two halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        added = False
+        for position in self.positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+    def compatible(self, other):
+        return (self.capacity, self.error_rate) == (other.capacity, other.error_rate)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            header = json.loads(file.readline())
+            bits = bytearray(file.read())
+        bloom = cls(header['capacity'], header['error_rate'], bits, header['count'], header['created'])
+        if len(bits) != (bloom.size + 7) // 8:
+            raise ValueError(f"Truncated Bloom filter in {path}")
+        return bloom
+
+    def save(self, path):
+        header = {'capacity': self.capacity, 'error_rate': self.error_rate, 'count': self.count, 'created': self.created}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(json.dumps(header).encode('utf-8') + b'\n')
+            file.write(self.bits)
+        os.replace(tmp_path, path)
+
+
+class ImmutableUrlStore:
+    """Bill text URLs that need not be requested again, kept between runs.
+
+    ``fetched`` holds published versions, which never change; ``missing`` holds
+    versions answered with 404, which are forgotten after ``missing_ttl`` seconds
+    since new versions get published. A Bloom filter cannot drop single entries, so
+    ``missing`` is two filters of ``missing_ttl / 2`` seconds each: the current one,
+    and the previous one until it is ``missing_ttl`` old. A 404 is thus remembered for
+    between half and all of ``missing_ttl``, never longer. URLs are keyed by path, so
+    the store also applies to crawls against a mirror or the replay server.
+    """
+
+    def __init__(self, directory, capacity, error_rate, missing_ttl):
+        self.fetched_path = os.path.join(directory, 'fetched.bloom')
+        self.missing_path = os.path.join(directory, 'missing.bloom')
+        self.previous_missing_path = os.path.join(directory, 'missing.previous.bloom')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.missing_ttl = missing_ttl
+        self.fetched = self.load(self.fetched_path)
+        self.missing = self.load_missing()  # [current, previous]
+        self.new_fetched = set()  # Kept apart until the run's items are known to be stored
+        self.new_missing = set()
+
+    @classmethod
+    def from_settings(cls, settings):
+        if not settings.getbool('IMMUTABLE_FILTER_ENABLED', True):
+            return None
+        directory = data_path(settings.get('IMMUTABLE_FILTER_DIR', 'immutable'))
+        os.makedirs(directory, exist_ok=True)
+        return cls(
+            directory,
+            capacity=settings.getint('IMMUTABLE_FILTER_CAPACITY', 1000000),
+            error_rate=settings.getfloat('IMMUTABLE_FILTER_ERROR_RATE', 0.001),
+            missing_ttl=settings.getfloat('IMMUTABLE_MISSING_TTL', 24 * 3600),
+        )
+
+    @staticmethod
+    def key(url):
+        return urlsplit(url).path
+
+    def load(self, path):
+        empty = BloomFilter(self.capacity, self.error_rate)
+        if not os.path.exists(path):
+            return empty
+        try:
+            bloom = BloomFilter.load(path)
+        except (OSError, ValueError):
+            return empty
+        if not bloom.compatible(empty):
+            return empty
+        return bloom
+
+    def load_missing(self):
+        now = time.time()
+        current = self.load(self.missing_path)
+        previous = self.load(self.previous_missing_path)
+        if now - current.created > self.missing_ttl / 2:
+            previous, current = current, BloomFilter(self.capacity, self.error_rate)
+        if now - previous.created > self.missing_ttl:
+            previous = BloomFilter(self.capacity, self.error_rate)
+        return [current, previous]
+
+    def status(self, url, speculative=False):
+        """Return 'fetched', 'missing' or None when the URL has to be requested.
+
+        A ``speculative`` URL, one not known to exist, is never answered 'fetched': a
+        false positive would then count a version that was never published as found.
+        """
+        key = self.key(url)
+        if not speculative and key in self.fetched:
+            return 'fetched'
+        if any(key in missing for missing in self.missing):
+            return 'missing'
+        return None
+
+    def add_fetched(self, url):
+        self.new_fetched.add(self.key(url))
+
+    def add_missing(self, url):
+        self.new_missing.add(self.key(url))
+
+    def save(self, keep_fetched=True):
+        # Sharded crawls save from several processes, so the current files are merged in
+        with locked(self.fetched_path):
+            fetched = self.load(self.fetched_path)
+            if keep_fetched:
+                for key in self.new_fetched:
+                    fetched.add(key)
+            missing = self.load_missing()
+            for key in self.new_missing:
+                missing[0].add(key)
+            fetched.save(self.fetched_path)
+            missing[0].save(self.missing_path)
+            missing[1].save(self.previous_missing_path)
+        self.fetched, self.missing = fetched, missing
+        self.new_fetched, self.new_missing = set(), set()
@@ -16,6 +16,7 @@ class BillDetailItem(scrapy.Item):
     bill_number = scrapy.Field()
     parliament_number = scrapy.Field()
     session_number = scrapy.Field()
+    version_number = scrapy.Field()
     title = scrapy.Field()
     short_title = scrapy.Field()
     bill_ref_number = scrapy.Field()
@@ -23,6 +24,8 @@ class BillDetailItem(scrapy.Item):
     bill_history = scrapy.Field()
     introduction = scrapy.Field()
     body = scrapy.Field()
+    # Provisions indexed from body, see xmlparse.body_sections
+    sections = scrapy.Field()
 
 
 class VoteItem(scrapy.Item):
@@ -0,0 +1,87 @@
+# legislative_scraper/keycache.py
+from collections import OrderedDict
+
+
+def digest(content_hash):
+    # Hex digests are kept as bytes, half their size; anything else never matches
+    try:
+        return bytes.fromhex(content_hash)
+    except (TypeError, ValueError):
+        return None
+
+
+class KnownKeyCache:
+    """Stored row keys and content hashes, loaded one (table, parliament, session) at a time.
+
+    Lets the pipelines recognise rows that are already stored unchanged without a
+    round trip. At most ``max_entries`` keys are held; past that, the least
+    recently used sessions are evicted whole and reloaded if they come back.
+    """
+
+    def __init__(self, max_entries, stats):
+        self.max_entries = max_entries
+        self.stats = stats
+        self.sessions = OrderedDict()
+        self.entries = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def session_of(table, row):
+        # bills and bill_details rows start with bill_number, parliament_number, session_number
+        return table, row[1], row[2]
+
+    def is_loaded(self, session):
+        return session in self.sessions
+
+    def load(self, session, hashes):
+        """Add the {key: content_hash} of one session as returned by db.fetch_content_hashes."""
+        entries = {key: digest(value) for key, value in hashes.items()}
+        self.sessions[session] = entries
+        self.entries += len(entries)
+        self.stats.inc_value('postgres/key_cache/loads')
+        self.evict()
+
+    def evict(self):
+        # The session just loaded is always kept, even when it alone exceeds the bound
+        while self.entries > self.max_entries and len(self.sessions) > 1:
+            _, entries = self.sessions.popitem(last=False)
+            self.entries -= len(entries)
+            self.stats.inc_value('postgres/key_cache/evicted_sessions')
+        self.stats.max_value('postgres/key_cache/peak_entries', self.entries)
+
+    def check(self, session, row, key_size):
+        """True when ``row`` is stored with the same content hash; remembers it otherwise, as
+        about to be written (see forget)."""
+        entries = self.sessions[session]
+        self.sessions.move_to_end(session)
+        key = row[:key_size]
+        row_digest = digest(row[-1])
+        if entries.get(key) == row_digest:
+            self.stats.inc_value('postgres/key_cache/hits')
+            return True
+        self.stats.inc_value('postgres/key_cache/misses')
+        if key not in entries:
+            self.entries += 1
+        entries[key] = row_digest
+        self.evict()
+        return False
+
+    def forget(self, table, rows, key_size):
+        """Drop the keys remembered by check for ``rows`` whose write failed, so the rows are
+        sent again if they come back in this run."""
+        for row in rows:
+            entries = self.sessions.get(self.session_of(table, row))
+            key = row[:key_size]
+            if entries is not None and key in entries and entries[key] == digest(row[-1]):
+                del entries[key]
+                self.entries -= 1
+                self.stats.inc_value('postgres/key_cache/forgotten')
+
+    def report(self):
+        hits = self.stats.get_value('postgres/key_cache/hits', 0)
+        misses = self.stats.get_value('postgres/key_cache/misses', 0)
+        if hits + misses:
+            self.stats.set_value('postgres/key_cache/hit_ratio', round(hits / (hits + misses), 4))
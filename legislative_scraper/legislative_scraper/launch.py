@@ -0,0 +1,132 @@
+# legislative_scraper/launch.py
+#
+# Run a checkpointed bill_session crawl over several worker processes:
+#
+#     python -m legislative_scraper.launch NAME [--workers N] [--sessions 40-1,40-2,...] [--fresh]
+#                                             [-- extra scrapy crawl arguments]
+#
+# The sessions (from --sessions or the session manifest) are split into N
+# contiguous runs of similar size, one `scrapy crawl bill_session` per run. All
+# workers share the checkpoint store NAME and the database, so re-running the
+# same command after a crash resumes every shard. Worker logs and stats are
+# written to .scrapy/launch/NAME/ and the aggregated stats are printed at the end.
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+from scrapy.utils.project import data_path, get_project_settings
+
+from legislative_scraper.checkpoints import CheckpointStore
+from legislative_scraper.sessions import SessionManifest, format_sessions, parse_sessions_arg
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def shard_sessions(sessions, workers):
+    """Split sessions into at most ``workers`` contiguous runs whose sizes differ by one at most.
+
+    Each session is crawled on its own, so a parliament may be split across shards.
+    """
+    sessions = sorted(sessions)
+    count = min(max(workers, 1), len(sessions))
+    size, extra = divmod(len(sessions), count) if count else (0, 0)
+    shards = []
+    start = 0
+    for index in range(count):
+        end = start + size + (1 if index < extra else 0)
+        shards.append(sessions[start:end])
+        start = end
+    return shards
+
+
+def aggregate_stats(all_stats):
+    """Sum counters across workers; max/peak values and times keep their extremes."""
+    total = {}
+    for stats in all_stats:
+        for key, value in stats.items():
+            if key not in total:
+                total[key] = value
+            elif key == 'start_time':
+                total[key] = min(total[key], value)
+            elif key in ('finish_time', 'elapsed_time_seconds') or 'max' in key or 'peak' in key:
+                total[key] = max(total[key], value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                total[key] += value
+            elif total[key] != value:
+                total[key] = f"{total[key]}, {value}"
+    for key in [key for key in total if key.endswith('_ratio')]:
+        del total[key]  # Not additive
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shard a checkpointed bill_session crawl over worker processes.')
+    parser.add_argument('name', help='checkpoint name shared by the workers')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--sessions', help='PARLIAMENT-SESSION list, defaults to the session manifest')
+    parser.add_argument('--fresh', action='store_true', help='discard the checkpoints of NAME and start over')
+    argv, extra = sys.argv[1:], []
+    if '--' in argv:
+        # Everything after -- is passed on to scrapy crawl
+        argv, extra = argv[:argv.index('--')], argv[argv.index('--') + 1:]
+    args = parser.parse_args(argv)
+
+    os.chdir(PROJECT_DIR)
+    settings = get_project_settings()
+    if args.sessions:
+        sessions = parse_sessions_arg(args.sessions)
+    else:
+        sessions = sorted(SessionManifest.from_settings(settings).sessions)
+    if not sessions:
+        parser.error('no sessions in the manifest; run scrapy crawl bill_session once or pass --sessions')
+
+    if args.fresh:
+        CheckpointStore.remove(CheckpointStore.path_for(settings, args.name))
+    run_dir = data_path(os.path.join('launch', args.name))
+    os.makedirs(run_dir, exist_ok=True)
+
+    started = datetime.now()
+    workers = []
+    for index, shard in enumerate(shard_sessions(sessions, args.workers)):
+        log_path = os.path.join(run_dir, f"worker-{index}.log")
+        stats_path = os.path.join(run_dir, f"worker-{index}.stats.json")
+        if os.path.exists(stats_path):
+            os.remove(stats_path)
+        command = [
+            sys.executable, '-m', 'scrapy', 'crawl', 'bill_session',
+            '-a', f"sessions={format_sessions(shard)}",
+            '-a', f"checkpoint={args.name}",
+            '-s', f"LOG_FILE={log_path}",
+            '-s', f"STATS_EXPORT_PATH={stats_path}",
+            *extra,
+        ]
+        print(f"Worker {index}: sessions {format_sessions([shard[0]])} to {format_sessions([shard[-1]])} "
+              f"({len(shard)} sessions), log {log_path}")
+        workers.append((index, stats_path, subprocess.Popen(command)))
+
+    failed = 0
+    all_stats = []
+    for index, stats_path, process in workers:
+        returncode = process.wait()
+        if returncode != 0:
+            failed += 1
+            print(f"Worker {index} exited with status {returncode}")
+        if os.path.exists(stats_path):
+            with open(stats_path, 'r') as file:
+                all_stats.append(json.load(file))
+
+    stats = aggregate_stats(all_stats)
+    stats['launch/workers'] = len(workers)
+    stats['launch/workers_failed'] = failed
+    stats['launch/elapsed_seconds'] = round((datetime.now() - started).total_seconds(), 1)
+    with open(os.path.join(run_dir, 'stats.json'), 'w') as file:
+        json.dump(stats, file, indent=2, sort_keys=True, default=str)
+    print(json.dumps(stats, indent=2, sort_keys=True, default=str))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+# legislative_scraper/locks.py
+import fcntl
+from contextlib import contextmanager
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive lock on ``path``.lock, so processes of a sharded crawl merging
+    into the same store file do it one at a time."""
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,186 @@
+# legislative_scraper/metrics.py
+import json
+import os
+from bisect import bisect_left
+from collections import defaultdict
+
+# Upper bounds in seconds; a final +Inf bucket catches the rest
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus semantics (le buckets, sum, count)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (None past the last bound)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self):
+        return {
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): total for bound, total in self.cumulative()},
+            'sum': round(self.sum, 6),
+            'count': self.count,
+        }
+
+
+class FamilyMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statuses = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.bytes = 0
+        self.cache_hits = 0
+
+    def to_dict(self):
+        return {
+            'latency_seconds': self.latency.to_dict(),
+            'statuses': dict(self.statuses),
+            'errors': dict(self.errors),
+            'bytes': self.bytes,
+            'cache_hits': self.cache_hits,
+        }
+
+
+class CrawlMetrics:
+    """Per URL family download metrics and per callback parse times of one crawl.
+
+    Shared by the spider and downloader middlewares through ``for_crawler``.
+    """
+
+    def __init__(self, spider_name=None):
+        self.spider_name = spider_name
+        self.families = defaultdict(FamilyMetrics)
+        self.callbacks = defaultdict(lambda: Histogram(PARSE_BUCKETS))
+
+    @classmethod
+    def for_crawler(cls, crawler):
+        if getattr(crawler, 'crawl_metrics', None) is None:
+            crawler.crawl_metrics = cls()
+        return crawler.crawl_metrics
+
+    def record_response(self, family, status, size, latency=None, cached=False):
+        metrics = self.families[family]
+        metrics.statuses[status] += 1
+        metrics.bytes += size
+        if cached:
+            metrics.cache_hits += 1
+        elif latency is not None:
+            metrics.latency.observe(latency)
+
+    def record_error(self, family, error):
+        self.families[family].errors[error] += 1
+
+    def record_parse(self, callback, seconds):
+        self.callbacks[callback].observe(seconds)
+
+    def to_dict(self):
+        return {
+            'spider': self.spider_name,
+            'families': {family: metrics.to_dict() for family, metrics in sorted(self.families.items())},
+            'callbacks_seconds': {name: hist.to_dict() for name, hist in sorted(self.callbacks.items())},
+        }
+
+    def to_prometheus(self):
+        lines = []
+        spider = self.spider_name or ''
+
+        def histogram(name, help_text, label, histograms):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for value, hist in sorted(histograms.items()):
+                labels = f'spider="{spider}",{label}="{value}"'
+                for bound, total in hist.cumulative():
+                    le = '+Inf' if bound == float('inf') else bound
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {total}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        def counter(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in samples:
+                label_text = ','.join([f'spider="{spider}"'] + [f'{key}="{val}"' for key, val in labels])
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        families = sorted(self.families.items())
+        histogram(
+            'legislative_scraper_download_latency_seconds', 'Download latency of non-cached responses.',
+            'family', {family: metrics.latency for family, metrics in families},
+        )
+        counter('legislative_scraper_responses_total', 'Responses by URL family and status.', [
+            ((('family', family), ('status', status)), count)
+            for family, metrics in families for status, count in sorted(metrics.statuses.items())
+        ])
+        counter('legislative_scraper_response_bytes_total', 'Response body bytes by URL family.', [
+            ((('family', family),), metrics.bytes) for family, metrics in families
+        ])
+        counter('legislative_scraper_cache_hits_total', 'Responses served from the HTTP cache.', [
+            ((('family', family),), metrics.cache_hits) for family, metrics in families
+        ])
+        counter('legislative_scraper_download_errors_total', 'Download exceptions by URL family.', [
+            ((('family', family), ('error', error)), count)
+            for family, metrics in families for error, count in sorted(metrics.errors.items())
+        ])
+        histogram(
+            'legislative_scraper_callback_seconds', 'Time spent iterating spider callbacks.',
+            'callback', dict(self.callbacks),
+        )
+        return '\n'.join(lines) + '\n'
+
+    def export(self, json_path=None, prometheus_path=None):
+        # Written atomically so scrapers of the textfile never see a partial file
+        for path, content in ((json_path, lambda: json.dumps(self.to_dict(), indent=2)),
+                              (prometheus_path, self.to_prometheus)):
+            if not path:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as file:
+                file.write(content())
+            os.replace(tmp_path, path)
+
+    def summarize(self, stats):
+        """Closing summary under metrics/* in the crawl stats."""
+        for family, metrics in self.families.items():
+            prefix = f"metrics/{family}"
+            stats.set_value(f"{prefix}/responses", sum(metrics.statuses.values()))
+            stats.set_value(f"{prefix}/bytes", metrics.bytes)
+            stats.set_value(f"{prefix}/cache_hits", metrics.cache_hits)
+            for status, count in metrics.statuses.items():
+                stats.set_value(f"{prefix}/status/{status}", count)
+            for error, count in metrics.errors.items():
+                stats.set_value(f"{prefix}/errors/{error}", count)
+            if metrics.latency.count:
+                stats.set_value(f"{prefix}/latency_mean_ms", int(metrics.latency.sum / metrics.latency.count * 1000))
+                for q in (0.5, 0.95):
+                    bound = metrics.latency.quantile(q)
+                    stats.set_value(f"{prefix}/latency_p{int(q * 100)}_le_ms", int(bound * 1000) if bound else 'inf')
+        for callback, hist in self.callbacks.items():
+            stats.set_value(f"metrics/parse/{callback}/calls", hist.count)
+            stats.set_value(f"metrics/parse/{callback}/total_ms", int(hist.sum * 1000))
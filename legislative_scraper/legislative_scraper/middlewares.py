@@ -1,103 +1,135 @@
-# Define here the models for your spider middleware
+# legislative_scraper/middlewares.py
 #
-# See documentation in:
-# https://docs.scrapy.org/en/latest/topics/spider-middleware.html
+# Crawl instrumentation. The downloader middleware classifies every request by
+# URL family (see endpoints.url_family) and records latency, status, bytes and
+# cache hits; the spider middleware times each callback. Both feed one
+# CrawlMetrics per crawl, exported every METRICS_EXPORT_INTERVAL seconds and
+# summarized under metrics/* in the closing stats.
+import time
 
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+from twisted.internet import task
 
-# useful for handling different item types with a single interface
-from itemadapter import is_item, ItemAdapter
+from legislative_scraper.endpoints import url_family
+from legislative_scraper.metrics import CrawlMetrics
 
 
-class LegislativeScraperSpiderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the spider middleware does not modify the
-    # passed objects.
-
-    @classmethod
-    def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
-        return s
-
-    def process_spider_input(self, response, spider):
-        # Called for each response that goes through the spider
-        # middleware and into the spider.
+def callback_name(response):
+    request = getattr(response, 'request', None)
+    callback = getattr(request, 'callback', None)
+    return getattr(callback, '__name__', 'parse')
 
-        # Should return None or raise an exception.
-        return None
 
-    def process_spider_output(self, response, result, spider):
-        # Called with the results returned from the Spider, after
-        # it has processed the response.
+class LegislativeScraperSpiderMiddleware:
+    """Record the time spent inside each spider callback.
 
-        # Must return an iterable of Request, or item objects.
-        for i in result:
-            yield i
+    Callbacks here are generators, so their work happens while their output is
+    iterated; only the time inside the callback's own iteration is counted. For
+    async callbacks this includes their awaits (e.g. offloaded parsing).
+    """
 
-    def process_spider_exception(self, response, exception, spider):
-        # Called when a spider or process_spider_input() method
-        # (from other spider middleware) raises an exception.
+    def __init__(self, metrics):
+        self.metrics = metrics
 
-        # Should return either None or an iterable of Request or item objects.
-        pass
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('METRICS_ENABLED'):
+            raise NotConfigured
+        return cls(CrawlMetrics.for_crawler(crawler))
 
-    def process_start_requests(self, start_requests, spider):
-        # Called with the start requests of the spider, and works
-        # similarly to the process_spider_output() method, except
-        # that it doesn’t have a response associated.
+    def process_spider_output(self, response, result, spider):
+        name = callback_name(response)
+        elapsed = 0.0
+        iterator = iter(result)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+        self.metrics.record_parse(name, elapsed)
+
+    async def process_spider_output_async(self, response, result, spider):
+        name = callback_name(response)
+        elapsed = 0.0
+        iterator = result.__aiter__()
+        while True:
+            start = time.perf_counter()
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+        self.metrics.record_parse(name, elapsed)
 
-        # Must return only requests (not items).
-        for r in start_requests:
-            yield r
 
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+class LegislativeScraperDownloaderMiddleware:
+    """Record per URL family latency, status codes, bytes, cache hits and errors.
 
+    Latency is Scrapy's download_latency, i.e. network time without slot waits.
+    Enabled after HttpCacheMiddleware in the response chain, so cached responses
+    are counted as cache hits and retried responses are counted too.
+    """
 
-class LegislativeScraperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    def __init__(self, metrics, interval, json_path, prometheus_path):
+        self.metrics = metrics
+        self.interval = interval
+        self.json_path = json_path
+        self.prometheus_path = prometheus_path
+        self.task = None
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
-        return s
-
-    def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
-        return None
+        settings = crawler.settings
+        if not settings.getbool('METRICS_ENABLED'):
+            raise NotConfigured
+        mw = cls(
+            CrawlMetrics.for_crawler(crawler),
+            interval=settings.getfloat('METRICS_EXPORT_INTERVAL', 30.0),
+            json_path=settings.get('METRICS_EXPORT_JSON'),
+            prometheus_path=settings.get('METRICS_EXPORT_PROMETHEUS'),
+        )
+        mw.stats = crawler.stats
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
 
-    def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+    def spider_opened(self, spider):
+        self.metrics.spider_name = spider.name
+        # Paths are relative to the .scrapy data dir and may use {spider}
+        self.json_path = data_path(self.json_path.format(spider=spider.name)) if self.json_path else None
+        self.prometheus_path = (
+            data_path(self.prometheus_path.format(spider=spider.name)) if self.prometheus_path else None
+        )
+        if self.interval > 0 and (self.json_path or self.prometheus_path):
+            self.task = task.LoopingCall(self.export)
+            self.task.start(self.interval, now=False)
+
+    def export(self):
+        self.metrics.export(self.json_path, self.prometheus_path)
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.export()
+        self.metrics.summarize(self.stats)
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+    def process_response(self, request, response, spider):
+        self.metrics.record_response(
+            url_family(request.url),
+            response.status,
+            len(response.body),
+            latency=request.meta.get('download_latency'),
+            cached='cached' in response.flags,
+        )
         return response
 
     def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
-
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
-
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        self.metrics.record_error(url_family(request.url), type(exception).__name__)
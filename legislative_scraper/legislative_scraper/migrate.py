@@ -0,0 +1,76 @@
+# legislative_scraper/migrate.py
+#
+# Apply the versioned schema migrations in <repo>/migrations on top of the
+# baseline schema in legislativeData.sql:
+#
+#     python -m legislative_scraper.migrate [--dir PATH] [--list]
+#
+# Each NNNN_name.sql file runs once, in its own transaction, and is recorded
+# in the schema_migrations table.
+import argparse
+import os
+
+from legislative_scraper.db import connect
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'migrations')
+
+
+def available_migrations(directory):
+    return sorted(
+        name for name in os.listdir(directory)
+        if name.endswith('.sql') and name.split('_', 1)[0].isdigit()
+    )
+
+
+def applied_migrations(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT now()
+        )
+    ''')
+    cursor.execute('SELECT version FROM schema_migrations')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply_migration(connection, directory, name):
+    with open(os.path.join(directory, name), 'r') as file:
+        sql = file.read()
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        cursor.execute('INSERT INTO schema_migrations (version) VALUES (%s)', (name,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply pending schema migrations.')
+    parser.add_argument('--dir', default=MIGRATIONS_DIR, help='migrations directory')
+    parser.add_argument('--list', action='store_true', help='only list migrations and their state')
+    args = parser.parse_args()
+
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            applied = applied_migrations(cursor)
+        connection.commit()
+
+        for name in available_migrations(args.dir):
+            if name in applied:
+                if args.list:
+                    print(f"applied  {name}")
+                continue
+            if args.list:
+                print(f"pending  {name}")
+                continue
+            print(f"Applying {name}")
+            try:
+                apply_migration(connection, args.dir, name)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
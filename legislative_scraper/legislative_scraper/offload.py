@@ -0,0 +1,74 @@
+# legislative_scraper/offload.py
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class ParseOffloader:
+    """Run heavy parse/serialize functions in a worker pool instead of on the reactor thread.
+
+    Payloads smaller than PARSE_OFFLOAD_THRESHOLD bytes are parsed inline, since
+    shipping them to a worker costs more than parsing them. Functions run in a
+    worker must be module-level and return picklable values.
+
+    Settings:
+    - PARSE_OFFLOAD_ENABLED: False parses everything inline (the previous behaviour).
+    - PARSE_OFFLOAD_THRESHOLD: payload size in bytes from which parsing is offloaded.
+    - PARSE_OFFLOAD_EXECUTOR: 'process' (default; sidesteps the GIL) or 'thread'.
+    - PARSE_OFFLOAD_WORKERS: pool size.
+    """
+
+    def __init__(self, stats, threshold, workers, executor='process', enabled=True):
+        self.stats = stats
+        self.threshold = threshold
+        self.workers = workers
+        self.executor_type = executor
+        self.enabled = enabled
+        self.executor = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            crawler.stats,
+            threshold=settings.getint('PARSE_OFFLOAD_THRESHOLD', 256 * 1024),
+            workers=settings.getint('PARSE_OFFLOAD_WORKERS') or max(1, (os.cpu_count() or 2) // 2),
+            executor=settings.get('PARSE_OFFLOAD_EXECUTOR', 'process'),
+            enabled=settings.getbool('PARSE_OFFLOAD_ENABLED', True),
+        )
+
+    def should_offload(self, data):
+        return self.enabled and len(data) >= self.threshold
+
+    def _get_executor(self):
+        if self.executor is None:
+            if self.executor_type == 'thread':
+                self.executor = ThreadPoolExecutor(max_workers=self.workers)
+            else:
+                # spawn rather than fork: the reactor process has live threads and sockets
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+        return self.executor
+
+    async def run(self, func, data):
+        """Return func(data), computed in the worker pool for large payloads."""
+        if not self.should_offload(data):
+            start = time.perf_counter()
+            result = func(data)
+            self.stats.inc_value('parse/inline', 1)
+            self.stats.inc_value('parse/inline_ms', int((time.perf_counter() - start) * 1000))
+            return result
+        start = time.perf_counter()
+        result = await asyncio.wrap_future(self._get_executor().submit(func, data))
+        self.stats.inc_value('parse/offloaded', 1)
+        self.stats.inc_value('parse/offloaded_bytes', len(data))
+        self.stats.inc_value('parse/offloaded_wait_ms', int((time.perf_counter() - start) * 1000))
+        return result
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
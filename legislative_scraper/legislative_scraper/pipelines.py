@@ -1,27 +1,478 @@
-import psycopg2
-from legislative_scraper.items import BillItem, BillDetailItem
+import hashlib
+import io
+import time
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import task, threads
+from twisted.internet.defer import DeferredList, DeferredSemaphore
+from twisted.python.threadpool import ThreadPool
+from legislative_scraper.db import (
+    bump_generations, connect, connection_params, fetch_content_hashes, fetch_division_numbers,
+)
+from legislative_scraper.items import BillItem, BillDetailItem, VoteItem
+from legislative_scraper.keycache import KnownKeyCache
+from legislative_scraper.stats import refresh_session
+from legislative_scraper.textstore import HASH_COLUMNS, pack_bill, split_texts, write_texts
 from scrapy.exceptions import NotConfigured
-import os
-from dotenv import load_dotenv
+
+# Upserts only touch rows whose content_hash changed; RETURNING reports one row per
+# insert or update, true for the inserted ones. Updates count up the row's revision
+# (xmax cannot be returned from the partitioned tables).
+UPSERT_BILLS_SQL = '''
+    INSERT INTO bills AS t (
+        bill_number, parliament_number, session_number, bill_stage, bill_stage_date,
+        sponsor_id, sponsor_name, sponsor_role, content_hash
+    ) VALUES %s
+    ON CONFLICT (bill_number, parliament_number, session_number) DO UPDATE SET
+        bill_stage = EXCLUDED.bill_stage,
+        bill_stage_date = EXCLUDED.bill_stage_date,
+        sponsor_id = EXCLUDED.sponsor_id,
+        sponsor_name = EXCLUDED.sponsor_name,
+        sponsor_role = EXCLUDED.sponsor_role,
+        content_hash = EXCLUDED.content_hash,
+        revision = t.revision + 1
+    WHERE t.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+    RETURNING (t.revision = 1) AS inserted
+'''
+
+# The search columns of a bill version start out with its titles; write_sections adds the
+# body once the version's provisions are written (see search.py)
+UPSERT_BILL_DETAILS_SQL = '''
+    INSERT INTO bill_details AS t (
+        bill_number, parliament_number, session_number, version_number, title, short_title,
+        sponsor, bill_ref_number, bill_history, introduction, body,
+        bill_history_hash, introduction_hash, body_hash, content_hash, search_vector, search_summary
+    )
+    SELECT v.*, bill_title_vector(v.title, v.short_title), bill_title_vector(v.title, v.short_title)
+    FROM (VALUES %s) AS v (
+        bill_number, parliament_number, session_number, version_number, title, short_title,
+        sponsor, bill_ref_number, bill_history, introduction, body,
+        bill_history_hash, introduction_hash, body_hash, content_hash
+    )
+    ON CONFLICT (bill_number, parliament_number, session_number, version_number) DO UPDATE SET
+        title = EXCLUDED.title,
+        short_title = EXCLUDED.short_title,
+        sponsor = EXCLUDED.sponsor,
+        bill_ref_number = EXCLUDED.bill_ref_number,
+        bill_history = EXCLUDED.bill_history,
+        introduction = EXCLUDED.introduction,
+        body = EXCLUDED.body,
+        bill_history_hash = EXCLUDED.bill_history_hash,
+        introduction_hash = EXCLUDED.introduction_hash,
+        body_hash = EXCLUDED.body_hash,
+        content_hash = EXCLUDED.content_hash,
+        search_vector = EXCLUDED.search_vector,
+        search_summary = EXCLUDED.search_summary,
+        revision = t.revision + 1
+    WHERE t.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+    RETURNING (t.revision = 1) AS inserted
+'''
+UPSERT_BILL_DETAILS_TEMPLATE = '(%s, %s::int, %s::int, %s::int, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'
+
+# detail_hash is the content_hash of the bill version a provision was read from.
+# PostgresPipeline replaces the provisions of a version as a whole (see write_sections);
+# this statement merges them in BackfillPostgresPipeline.
+UPSERT_BILL_SECTIONS_SQL = '''
+    INSERT INTO bill_sections AS t (
+        bill_number, parliament_number, session_number, version_number, section_path, position,
+        heading, text, start_offset, end_offset, detail_hash
+    ) VALUES %s
+    ON CONFLICT (bill_number, parliament_number, session_number, version_number, section_path) DO UPDATE SET
+        position = EXCLUDED.position,
+        heading = EXCLUDED.heading,
+        text = EXCLUDED.text,
+        start_offset = EXCLUDED.start_offset,
+        end_offset = EXCLUDED.end_offset,
+        detail_hash = EXCLUDED.detail_hash
+    WHERE t.detail_hash IS DISTINCT FROM EXCLUDED.detail_hash
+    RETURNING (xmax = 0) AS inserted
+'''
+
+# Provisions left over from an earlier text of the versions being written
+DELETE_STALE_SECTIONS_SQL = '''
+    DELETE FROM bill_sections s
+    USING (VALUES %s) AS v (bill_number, parliament_number, session_number, version_number, detail_hash)
+    WHERE s.bill_number = v.bill_number
+      AND s.parliament_number = v.parliament_number
+      AND s.session_number = v.session_number
+      AND s.version_number = v.version_number
+      AND s.detail_hash IS DISTINCT FROM v.detail_hash
+'''
+# Versions whose provisions are already stored for the same text
+STORED_SECTION_VERSIONS_SQL = '''
+    SELECT DISTINCT s.bill_number, s.parliament_number, s.session_number, s.version_number
+    FROM bill_sections s
+    JOIN (VALUES %s) AS v (bill_number, parliament_number, session_number, version_number, detail_hash)
+        ON s.bill_number = v.bill_number
+        AND s.parliament_number = v.parliament_number
+        AND s.session_number = v.session_number
+        AND s.version_number = v.version_number
+        AND s.detail_hash = v.detail_hash
+'''
+SECTION_VERSIONS_TEMPLATE = '(%s, %s::int, %s::int, %s::int, %s)'
+
+# The full-text search columns of bill versions, from their titles and stored provisions:
+# search_vector gets the provisions' text, search_summary their headings
+REFRESH_SEARCH_SQL = '''
+    UPDATE bill_details d SET
+        search_vector = bill_title_vector(d.title, d.short_title) || coalesce(p.body_vector, ''),
+        search_summary = bill_title_vector(d.title, d.short_title)
+            || setweight(to_tsvector('english', coalesce(p.headings, '')), 'B')
+    FROM (VALUES %s) AS v (bill_number, parliament_number, session_number, version_number),
+    LATERAL (
+        SELECT tsvector_agg(s.search_vector ORDER BY s.position) AS body_vector,
+               string_agg(DISTINCT s.heading, ' ') AS headings
+        FROM bill_sections s
+        WHERE s.bill_number = v.bill_number
+          AND s.parliament_number = v.parliament_number
+          AND s.session_number = v.session_number
+          AND s.version_number = v.version_number
+    ) p
+    WHERE d.bill_number = v.bill_number
+      AND d.parliament_number = v.parliament_number
+      AND d.session_number = v.session_number
+      AND d.version_number = v.version_number
+'''
+SEARCH_VERSIONS_TEMPLATE = '(%s, %s::int, %s::int, %s::int)'
+
+# Rows whose division number is already stored are skipped, and bill numbers
+# that are not in bills are stored as NULL so one unknown bill does not reject
+# the whole batch on the foreign key. LINK_VOTES_SQL links those divisions once
+# their bill is stored, e.g. when votes ran before bill_session for the session.
+INSERT_VOTES_SQL = '''
+    INSERT INTO bill_votes (
+        parliament_number, session_number, description, decision, bill_number,
+        total_yeas, total_nays, total_abstain, vote_date, division_number
+    )
+    SELECT v.parliament_number, v.session_number, v.description, v.decision, b.bill_number,
+           v.total_yeas, v.total_nays, v.total_abstain, v.vote_date, v.division_number
+    FROM (VALUES %s) AS v (
+        parliament_number, session_number, description, decision, bill_number,
+        total_yeas, total_nays, total_abstain, vote_date, division_number
+    )
+    LEFT JOIN bills b
+        ON b.bill_number = v.bill_number
+        AND b.parliament_number = v.parliament_number
+        AND b.session_number = v.session_number
+    WHERE NOT EXISTS (
+        SELECT 1 FROM bill_votes bv
+        WHERE bv.parliament_number = v.parliament_number
+          AND bv.session_number = v.session_number
+          AND bv.division_number = v.division_number
+    )
+    RETURNING true AS inserted
+'''
+INSERT_VOTES_TEMPLATE = '(%s::int, %s::int, %s, %s, %s, %s::int, %s::int, %s::int, %s::date, %s)'
+LINK_VOTES_SQL = '''
+    UPDATE bill_votes bv SET bill_number = b.bill_number
+    FROM (VALUES %s) AS v (
+        parliament_number, session_number, description, decision, bill_number,
+        total_yeas, total_nays, total_abstain, vote_date, division_number
+    )
+    JOIN bills b
+        ON b.bill_number = v.bill_number
+        AND b.parliament_number = v.parliament_number
+        AND b.session_number = v.session_number
+    WHERE bv.parliament_number = v.parliament_number
+      AND bv.session_number = v.session_number
+      AND bv.division_number = v.division_number
+      AND bv.bill_number IS NULL
+    RETURNING false AS inserted
+'''
+
+# table -> (statement, execute_values template)
+TABLE_STATEMENTS = {
+    'bills': (UPSERT_BILLS_SQL, None),
+    'bill_details': (UPSERT_BILL_DETAILS_SQL, UPSERT_BILL_DETAILS_TEMPLATE),
+    'bill_sections': (UPSERT_BILL_SECTIONS_SQL, None),
+    'bill_votes': (INSERT_VOTES_SQL, INSERT_VOTES_TEMPLATE),
+}
+# table -> statement run after TABLE_STATEMENTS on the same rows, its rows counted as updated
+TABLE_REPAIRS = {
+    'bill_votes': LINK_VOTES_SQL,
+}
+
+# Number of leading row values forming the conflict key. ON CONFLICT DO UPDATE
+# cannot touch the same row twice in one statement, so only the last row per key
+# is sent.
+TABLE_KEY_SIZES = {
+    'bills': 3,
+    'bill_details': 4,
+}
+
+# Rows referencing bills are written after the pending bills rows
+TABLE_PARENTS = {
+    'bill_details': 'bills',
+    'bill_sections': 'bill_details',
+    'bill_votes': 'bills',
+}
+
+
+# Where (parliament_number, session_number) sits in the rows of each table
+SESSION_COLUMNS = {
+    'bills': slice(1, 3),
+    'bill_details': slice(1, 3),
+    'bill_sections': slice(1, 3),
+    'bill_votes': slice(0, 2),
+}
+# Tables the session summary tables are aggregated from
+SUMMARY_TABLES = ('bills', 'bill_votes')
+
+# Row columns in the order of bill_row, bill_detail_row, section_rows and vote_row, and the
+# identity of a row when staging tables are merged
+TABLE_COLUMNS = {
+    'bills': (
+        'bill_number', 'parliament_number', 'session_number', 'bill_stage', 'bill_stage_date',
+        'sponsor_id', 'sponsor_name', 'sponsor_role', 'content_hash',
+    ),
+    'bill_details': (
+        'bill_number', 'parliament_number', 'session_number', 'version_number', 'title', 'short_title',
+        'sponsor', 'bill_ref_number', 'bill_history', 'introduction', 'body',
+        'bill_history_hash', 'introduction_hash', 'body_hash', 'content_hash',
+    ),
+    'bill_sections': (
+        'bill_number', 'parliament_number', 'session_number', 'version_number', 'section_path', 'position',
+        'heading', 'text', 'start_offset', 'end_offset', 'detail_hash',
+    ),
+    'bill_votes': (
+        'parliament_number', 'session_number', 'description', 'decision', 'bill_number',
+        'total_yeas', 'total_nays', 'total_abstain', 'vote_date', 'division_number',
+    ),
+}
+MERGE_KEYS = {
+    'bills': ('bill_number', 'parliament_number', 'session_number'),
+    'bill_details': ('bill_number', 'parliament_number', 'session_number', 'version_number'),
+    'bill_sections': ('bill_number', 'parliament_number', 'session_number', 'version_number', 'section_path'),
+    'bill_votes': ('parliament_number', 'session_number', 'division_number'),
+}
+
+# Staged rows whose parent row is missing would break the restored foreign keys
+STAGED_PARENT_EXISTS_SQL = {
+    'bill_details': '''EXISTS (
+        SELECT 1 FROM bills b
+        WHERE b.bill_number = s.bill_number
+          AND b.parliament_number = s.parliament_number
+          AND b.session_number = s.session_number
+    )''',
+    'bill_sections': '''EXISTS (
+        SELECT 1 FROM bill_details d
+        WHERE d.bill_number = s.bill_number
+          AND d.parliament_number = s.parliament_number
+          AND d.session_number = s.session_number
+          AND d.version_number = s.version_number
+    )''',
+}
+
+
+def content_hash(row):
+    """Stable digest of a row's values, compared with the stored one to skip no-op writes."""
+    digest = hashlib.sha1()
+    for value in row:
+        digest.update(b'\x00' if value is None else str(value).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def checkpoint_unit(table, row):
+    # (parliament, session, bill_number, version) of a bills or bill_details row, see CheckpointStore
+    return row[1], row[2], row[0], row[3] if table == 'bill_details' else 0
+
+
+def latest_per_key(rows, key_size):
+    return list({row[:key_size]: row for row in rows}.values())
+
+
+def copy_value(value):
+    # COPY text format: \N is NULL, backslash escapes for the delimiters
+    if value is None:
+        return '\\N'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copy_buffer(rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def to_int(value):
+    value = value.strip() if isinstance(value, str) else value
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def bill_row(item):
+    # Safely convert sponsor_id to integer or set to None
+    sponsor_id_raw = item.get('sponsor_id')
+    sponsor_id = int(sponsor_id_raw) if sponsor_id_raw and sponsor_id_raw.strip().isdigit() else None
+    row = (
+        item.get('bill_number'),
+        item.get('parliament_number'),
+        item.get('session_number'),
+        item.get('bill_stage') or None,
+        item.get('bill_stage_date') or None,
+        sponsor_id,
+        item.get('sponsor_name') or None,
+        item.get('sponsor_role') or None
+    )
+    return row + (content_hash(row),)
+
+
+def bill_detail_row(item):
+    row = (
+        item.get('bill_number'),
+        item.get('parliament_number'),
+        item.get('session_number'),
+        item.get('version_number'),
+        item.get('title'),
+        item.get('short_title'),
+        item.get('sponsor'),
+        item.get('bill_ref_number'),
+        item.get('bill_history'),
+        item.get('introduction'),
+        item.get('body'),
+    )
+    # The *_hash columns reference bill_texts and are only set at write time in compressed storage
+    return row + (None, None, None, content_hash(row))
+
+
+def section_rows(item, detail_row):
+    key = detail_row[:4]
+    return [
+        key + (
+            section['path'], position, section['heading'], section['text'],
+            section['start_offset'], section['end_offset'], detail_row[-1],
+        )
+        for position, section in enumerate(item.get('sections') or [])
+    ]
+
+
+def row_sessions(table, rows):
+    columns = SESSION_COLUMNS[table]
+    return {tuple(row[columns]) for row in rows}
+
+
+def vote_row(item):
+    return (
+        item.get('parliament_number'),
+        item.get('session_number'),
+        item.get('description'),
+        item.get('decision'),
+        item.get('bill_number'),
+        to_int(item.get('total_yeas')),
+        to_int(item.get('total_nays')),
+        to_int(item.get('total_abstain')),
+        item.get('vote_date'),
+        item.get('division_number'),
+    )
+
 
 class PostgresPipeline:
+    """Buffer rows per table and write them as multi-row upserts.
+
+    A table's buffer is flushed once it holds POSTGRES_BATCH_SIZE rows, once its
+    oldest row is POSTGRES_BATCH_MAX_LATENCY seconds old, and at close_spider.
+    If a batch fails, its rows are retried one by one so a bad row only loses itself.
+    Bills and bill versions carry a content_hash, so rows that did not change since
+    the last run are counted as unchanged instead of being rewritten. The stored
+    keys and hashes of each session are also cached (up to POSTGRES_KEY_CACHE_MAX_ENTRIES
+    keys) so that unchanged rows are not even sent. With POSTGRES_TEXT_STORAGE set to
+    "compressed", the text sections of bill versions are written to bill_texts instead,
+    and at close_spider the bills written during the crawl have each version stored as
+    a delta against the previous one (up to POSTGRES_TEXT_DELTA_MAX_DEPTH deep, 0 to skip).
+    The provisions indexed from each bill version written go to bill_sections, after the
+    version itself, and the full-text search columns of the version are then filled in from
+    them (see search.py). Unless POSTGRES_REFRESH_SUMMARIES is off, the summary tables of
+    the sessions bills or votes were written for are refreshed at close_spider (see stats.py).
+    Every transaction that writes rows counts up the data generation of their sessions, which
+    the dashboard's response cache is keyed on (see db.bump_generations).
+    """
+
+    def __init__(self, batch_size=500, max_latency=5.0, key_cache_entries=500000, text_storage='inline',
+                 text_delta_depth=8, refresh_summaries=True):
+        if text_storage not in ('inline', 'compressed'):
+            raise NotConfigured(f"Unknown POSTGRES_TEXT_STORAGE '{text_storage}', expected 'inline' or 'compressed'")
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.key_cache_entries = key_cache_entries
+        self.text_storage = text_storage
+        self.text_delta_depth = text_delta_depth if text_storage == 'compressed' else 0
+        self.delta_bills = set()
+        self.refresh_summaries = refresh_summaries
+        self.summary_sessions = set()
+        self.buffers = {table: [] for table in TABLE_STATEMENTS}
+        self.buffered_since = {}
+        self.known_divisions = {}
+        self.stats = None
+        self.flush_task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(
+            batch_size=crawler.settings.getint('POSTGRES_BATCH_SIZE', 500),
+            max_latency=crawler.settings.getfloat('POSTGRES_BATCH_MAX_LATENCY', 5.0),
+            key_cache_entries=crawler.settings.getint('POSTGRES_KEY_CACHE_MAX_ENTRIES', 500000),
+            text_storage=crawler.settings.get('POSTGRES_TEXT_STORAGE', 'inline'),
+            text_delta_depth=crawler.settings.getint('POSTGRES_TEXT_DELTA_MAX_DEPTH', 8),
+            refresh_summaries=crawler.settings.getbool('POSTGRES_REFRESH_SUMMARIES', True),
+        )
+        pipeline.stats = crawler.stats
+        return pipeline
+
     def open_spider(self, spider):
-        # Load environment variables
-        load_dotenv()
         try:
-            self.connection = psycopg2.connect(
-                host=os.getenv('DATABASE_HOST'),
-                port=int(os.getenv('DATABASE_PORT')),
-                user=os.getenv('DATABASE_USER'),
-                password=os.getenv('DATABASE_PASSWORD'),
-                dbname=os.getenv('DATABASE_NAME')
-            )
+            self.connection = connect()
             self.cursor = self.connection.cursor()
         except Exception as e:
             spider.logger.error(f"Failed to connect to database: {e}")
             raise NotConfigured("Database connection failed")
+        self.key_cache = KnownKeyCache(self.key_cache_entries, self.stats)
+        for session in self.key_cache_sessions(spider):
+            self.key_cache.load(session, self.read_content_hashes(self.connection, *session))
+        self.start_flush_task(spider)
+
+    def key_cache_sessions(self, spider):
+        # Sessions passed with -a sessions=... are loaded up front, any other one on its first row
+        if not self.key_cache_entries:
+            return []
+        return [
+            (table, parliament, session)
+            for parliament, session in getattr(spider, 'sessions', None) or []
+            for table in TABLE_KEY_SIZES
+        ]
+
+    @staticmethod
+    def read_content_hashes(connection, table, parliament, session):
+        with connection.cursor() as cursor:
+            hashes = fetch_content_hashes(cursor, table, MERGE_KEYS[table], parliament, session)
+        connection.commit()
+        return hashes
+
+    def start_flush_task(self, spider):
+        if self.max_latency > 0:
+            # Quiet periods (e.g. a long version probe chain) must not hold rows back indefinitely
+            self.flush_task = task.LoopingCall(self.flush_stale, spider)
+            self.flush_task.start(self.max_latency / 2, now=False)
+
+    def stop_flush_task(self):
+        if self.flush_task is not None and self.flush_task.running:
+            self.flush_task.stop()
 
     def close_spider(self, spider):
+        self.stop_flush_task()
+        if hasattr(self, 'connection'):
+            self.flush_all(spider)
+            self.key_cache.report()
+            self.record_pack(self.pack_texts(self.connection, spider))
+            self.record_summaries(self.refresh_session_summaries(self.connection, spider))
         if hasattr(self, 'cursor'):
             self.cursor.close()
         if hasattr(self, 'connection'):
@@ -29,66 +480,627 @@ class PostgresPipeline:
 
     def process_item(self, item, spider):
         if isinstance(item, BillItem):
+            self.buffer_changed_row('bills', bill_row(item), spider)
+        elif isinstance(item, BillDetailItem):
+            row = bill_detail_row(item)
+            self.buffer_changed_row('bill_details', row, spider, section_rows(item, row))
+        elif isinstance(item, VoteItem):
+            key = (item.get('parliament_number'), item.get('session_number'))
+            if key not in self.known_divisions:
+                # One lookup per session lets re-runs skip stored divisions without touching the table again
+                self.known_divisions[key] = fetch_division_numbers(self.cursor, *key)
+                self.connection.commit()
+            if not self.is_known_division(item):
+                self.buffer_row('bill_votes', vote_row(item), spider)
+        return item
+
+    def is_known_division(self, item):
+        known = self.known_divisions[(item.get('parliament_number'), item.get('session_number'))]
+        division_number = item.get('division_number')
+        # A division stored without its bill is sent again, so it is linked once the bill is stored
+        if known.get(division_number) or (division_number in known and not item.get('bill_number')):
+            self.stats.inc_value('votes/skipped_existing')
+            return True
+        known[division_number] = True
+        return False
+
+    def buffer_changed_row(self, table, row, spider, sections=()):
+        session = None
+        if self.key_cache.enabled:
+            session = self.key_cache.session_of(table, row)
+            if not self.key_cache.is_loaded(session):
+                self.key_cache.load(session, self.read_content_hashes(self.connection, *session))
+        return self.buffer_if_changed(table, row, session, spider, sections)
+
+    def buffer_if_changed(self, table, row, session, spider, sections=()):
+        # The bill_sections rows of a bill version are only written along with the version
+        if session is not None and self.key_cache.check(session, row, TABLE_KEY_SIZES[table]):
+            self.mark_checkpoints(table, [row], spider)
+            return None
+        flushed = self.buffer_row(table, row, spider)
+        if sections:
+            flushed = self.buffer_rows('bill_sections', sections, spider) or flushed
+        return flushed
+
+    def mark_checkpoints(self, table, rows, spider):
+        checkpoints = getattr(spider, 'checkpoints', None)
+        if checkpoints is not None and table in TABLE_KEY_SIZES:
+            checkpoints.mark_units(checkpoint_unit(table, row) for row in rows)
+
+    def buffer_row(self, table, row, spider):
+        return self.buffer_rows(table, [row], spider)
+
+    def buffer_rows(self, table, rows, spider):
+        # Rows buffered together are written in the same batch
+        if table == 'bill_details' and self.text_delta_depth:
+            self.delta_bills.update(row[:3] for row in rows)
+        if table in SUMMARY_TABLES and self.refresh_summaries:
+            self.summary_sessions.update(row_sessions(table, rows))
+        buffer = self.buffers[table]
+        if not buffer:
+            self.buffered_since[table] = time.monotonic()
+        buffer.extend(rows)
+        if len(buffer) >= self.batch_size:
+            return self.flush(table, spider)
+
+    def flush_stale(self, spider):
+        now = time.monotonic()
+        for table, buffer in self.buffers.items():
+            if buffer and now - self.buffered_since[table] >= self.max_latency:
+                self.flush(table, spider)
+
+    def flush_all(self, spider):
+        return [self.flush(table, spider) for table in self.buffers]
+
+    def take_rows(self, table):
+        rows = self.buffers[table]
+        self.buffers[table] = []
+        return rows
+
+    def flush(self, table, spider):
+        if table in TABLE_PARENTS:
+            self.flush(TABLE_PARENTS[table], spider)
+        rows = self.take_rows(table)
+        if not rows:
+            return
+        self.flushed(table, rows, *self.timed_write_rows(self.connection, table, rows, spider), spider)
+
+    def flushed(self, table, rows, result, elapsed, spider):
+        self.stats.inc_value('postgres/write_ms', int(elapsed * 1000))
+        self.record_flush(table, *result)
+        if result[-1]:
+            self.forget_keys(table, rows)
+            self.mark_failed_sessions(row_sessions(table, rows), spider)
+        else:
+            # Batches with failed rows are left unmarked so a resumed crawl fetches them again
+            self.mark_checkpoints(table, rows, spider)
+
+    @staticmethod
+    def mark_failed_sessions(sessions, spider):
+        # Lets the spider request these sessions' lists without validators next run (see bills.py)
+        failed_sessions = getattr(spider, 'failed_sessions', None)
+        if failed_sessions is not None:
+            failed_sessions.update(sessions)
+
+    def forget_keys(self, table, rows):
+        # Which rows of the batch failed is not known, so none of them count as stored; a row
+        # that was written is then only sent again, and its upsert finds it unchanged
+        if table in TABLE_KEY_SIZES and self.key_cache.enabled:
+            self.key_cache.forget(table, rows, TABLE_KEY_SIZES[table])
+
+    def record_flush(self, table, inserted, updated, unchanged, failed):
+        self.stats.inc_value('postgres/flushes')
+        self.stats.inc_value(f'postgres/inserted/{table}', inserted)
+        self.stats.inc_value(f'postgres/updated/{table}', updated)
+        self.stats.inc_value(f'postgres/unchanged/{table}', unchanged)
+        if failed:
+            self.stats.inc_value(f'postgres/rows_failed/{table}', failed)
+
+    def pack_texts(self, connection, spider):
+        """Delta-encode the text sections of the bills written during the crawl, once all
+        their versions are stored; returns (texts packed, bytes saved)."""
+        packed = saved = 0
+        for bill in sorted(self.delta_bills):
             try:
-                # Safely convert sponsor_id to integer or set to None
-                sponsor_id_raw = item.get('sponsor_id')
-                sponsor_id = int(sponsor_id_raw) if sponsor_id_raw and sponsor_id_raw.strip().isdigit() else None
-
-                values = (
-                    item.get('bill_number'),
-                    item.get('parliament_number'),
-                    item.get('session_number'),
-                    item.get('bill_stage') or None,
-                    item.get('bill_stage_date') or None,
-                    sponsor_id,
-                    item.get('sponsor_name') or None,
-                    item.get('sponsor_role') or None
-                )
+                with connection.cursor() as cursor:
+                    bill_packed, bill_saved = pack_bill(cursor, bill, self.text_delta_depth)
+                connection.commit()
+            except Exception as e:
+                # The versions stay stored whole
+                connection.rollback()
+                spider.logger.error(f"Failed to pack the text versions of Bill {bill[0]}: {e}")
+                continue
+            packed += bill_packed
+            saved += bill_saved
+        return packed, saved
 
-                # Log the values for debugging
-                spider.logger.debug(f"Inserting BillItem with values: {values}")
+    def record_pack(self, result):
+        packed, saved = result
+        if packed:
+            self.stats.inc_value('postgres/text_deltas/packed', packed)
+            self.stats.inc_value('postgres/text_deltas/bytes_saved', saved)
 
-                # Execute the SQL statement
-                self.cursor.execute('''
-                    INSERT INTO bills (
-                        bill_number, parliament_number, session_number, bill_stage, bill_stage_date,
-                        sponsor_id, sponsor_name, sponsor_role
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (bill_number, parliament_number, session_number) DO NOTHING
-                ''', values)
+    def refresh_session_summaries(self, connection, spider):
+        """Refresh the summary tables of the sessions written during the crawl, once their rows
+        are stored; returns the number of sessions refreshed."""
+        refreshed = 0
+        for parliament, session in sorted(self.summary_sessions):
+            try:
+                with connection.cursor() as cursor:
+                    refresh_session(cursor, parliament, session)
+                connection.commit()
+            except Exception as e:
+                # The session keeps its previous summary until the next crawl or stats refresh
+                connection.rollback()
+                spider.logger.error(f"Failed to refresh the summary tables of session {parliament}-{session}: {e}")
+                continue
+            refreshed += 1
+        return refreshed
 
-                self.connection.commit()
+    def record_summaries(self, refreshed):
+        if refreshed:
+            self.stats.inc_value('postgres/summary_sessions_refreshed', refreshed)
+
+    def timed_write_rows(self, connection, table, rows, spider):
+        start = time.perf_counter()
+        result = self.write_rows(connection, table, rows, spider)
+        return result, time.perf_counter() - start
+
+    def split_texts(self, table, rows):
+        # Compression runs wherever the rows are written, i.e. off the reactor in AsyncPostgresPipeline
+        if table != 'bill_details' or self.text_storage != 'compressed':
+            return rows, []
+        return split_texts(rows, TABLE_COLUMNS[table])
+
+    def write_rows(self, connection, table, rows, spider):
+        """Write one batch on ``connection``.
+
+        Returns (rows inserted, rows updated, rows unchanged, rows failed); unchanged
+        covers rows skipped by the content hash or division check and rows superseded
+        by a later row for the same key in the batch.
+        """
+        if table == 'bill_sections':
+            return self.write_sections(connection, rows, spider)
+        batch = latest_per_key(rows, TABLE_KEY_SIZES[table]) if table in TABLE_KEY_SIZES else rows
+        batch, texts = self.split_texts(table, batch)
+        with connection.cursor() as cursor:
+            try:
+                write_texts(cursor, texts)
+                written = self.execute_batch(cursor, table, batch)
+                if written:
+                    bump_generations(cursor, row_sessions(table, batch))
+                connection.commit()
+                inserted = sum(1 for (is_insert,) in written if is_insert)
+                spider.logger.debug(f"Flushed {len(batch)} rows into {table}")
+                return inserted, len(written) - inserted, len(rows) - len(written), 0
             except Exception as e:
-                # Rollback the transaction to reset the database state
-                self.connection.rollback()
-                spider.logger.error(f"Error inserting BillItem: {e}")
-                spider.logger.debug(f"Values attempted: {values}")
-        elif isinstance(item, BillDetailItem):
+                # Rollback the transaction to reset the database state, then isolate the bad rows
+                connection.rollback()
+                spider.logger.warning(f"Batch of {len(batch)} rows into {table} failed, retrying row by row: {e}")
+
+            failed_texts = self.write_texts_isolated(cursor, texts, spider)
+            hash_positions = [TABLE_COLUMNS[table].index(column) for column in HASH_COLUMNS] if failed_texts else []
+            inserted = updated = failed = 0
+            for row in batch:
+                if any(row[position] in failed_texts for position in hash_positions):
+                    # Its row would reference a text that is not stored
+                    failed += 1
+                    spider.logger.error(f"Skipped row into {table} whose text failed to store")
+                    spider.logger.debug(f"Values attempted: {row}")
+                    continue
+                cursor.execute('SAVEPOINT pipeline_row')
+                try:
+                    for (is_insert,) in self.execute_batch(cursor, table, [row]):
+                        if is_insert:
+                            inserted += 1
+                        else:
+                            updated += 1
+                    cursor.execute('RELEASE SAVEPOINT pipeline_row')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO SAVEPOINT pipeline_row')
+                    failed += 1
+                    spider.logger.error(f"Error inserting row into {table}: {e}")
+                    spider.logger.debug(f"Values attempted: {row}")
+            if inserted or updated:
+                bump_generations(cursor, row_sessions(table, batch))
+            connection.commit()
+            return inserted, updated, len(rows) - inserted - updated - failed, failed
+
+    @staticmethod
+    def execute_batch(cursor, table, rows):
+        sql, template = TABLE_STATEMENTS[table]
+        written = execute_values(cursor, sql, rows, template=template, page_size=len(rows), fetch=True)
+        if table in TABLE_REPAIRS:
+            written += execute_values(cursor, TABLE_REPAIRS[table], rows, template=template,
+                                      page_size=len(rows), fetch=True)
+        return written
+
+    @staticmethod
+    def write_texts_isolated(cursor, texts, spider):
+        """Write the bill_texts values of a failed batch, one by one if they fail together;
+        returns the hashes of the texts that could not be written."""
+        cursor.execute('SAVEPOINT pipeline_texts')
+        try:
+            write_texts(cursor, texts)
+            cursor.execute('RELEASE SAVEPOINT pipeline_texts')
+            return set()
+        except Exception:
+            cursor.execute('ROLLBACK TO SAVEPOINT pipeline_texts')
+        failed = set()
+        for text in texts:
+            cursor.execute('SAVEPOINT pipeline_texts')
+            try:
+                write_texts(cursor, [text])
+                cursor.execute('RELEASE SAVEPOINT pipeline_texts')
+            except Exception as e:
+                cursor.execute('ROLLBACK TO SAVEPOINT pipeline_texts')
+                failed.add(text[0])
+                spider.logger.error(f"Error storing bill text {text[0]}: {e}")
+        return failed
+
+    def write_sections(self, connection, rows, spider):
+        """Replace the stored provisions of the bill versions in one batch of bill_sections rows.
+
+        A version's rows are always buffered, and so written, together: versions already
+        stored from the same text (detail_hash) are skipped, the others have their rows
+        deleted and COPYed again. Returns the same counts as write_rows, with replaced
+        rows counted as inserted.
+        """
+        texts = {row[:4]: row[-1] for row in rows}
+        # A version buffered twice keeps the rows of its last text
+        batch = latest_per_key([row for row in rows if row[-1] == texts[row[:4]]], len(MERGE_KEYS['bill_sections']))
+        with connection.cursor() as cursor:
             try:
-                values = (
-                    item.get('bill_number'),
-                    item.get('parliament_number'),
-                    item.get('session_number'),
-                    item.get('title'),
-                    item.get('short_title'),
-                    item.get('sponsor'),
-                    item.get('bill_ref_number'),
-                    item.get('bill_history'),
-                    item.get('introduction'),
-                    item.get('body'),
+                stored = execute_values(
+                    cursor, STORED_SECTION_VERSIONS_SQL, [key + (text,) for key, text in texts.items()],
+                    template=SECTION_VERSIONS_TEMPLATE, page_size=len(texts), fetch=True,
                 )
+                stored = {tuple(key) for key in stored}
+                changed = [row for row in batch if row[:4] not in stored]
+                self.copy_sections(cursor, changed, {key: text for key, text in texts.items() if key not in stored})
+                connection.commit()
+                spider.logger.debug(f"Flushed {len(changed)} rows into bill_sections")
+                return len(changed), 0, len(rows) - len(changed), 0
+            except Exception as e:
+                connection.rollback()
+                spider.logger.warning(f"Batch of {len(rows)} rows into bill_sections failed, retrying version by version: {e}")
+
+            inserted = failed = 0
+            for key, text in texts.items():
+                version_rows = [row for row in batch if row[:4] == key]
+                cursor.execute('SAVEPOINT pipeline_row')
+                try:
+                    # Stored rows of the same text are replaced as well here
+                    self.copy_sections(cursor, version_rows, {key: None})
+                    cursor.execute('RELEASE SAVEPOINT pipeline_row')
+                    inserted += len(version_rows)
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO SAVEPOINT pipeline_row')
+                    failed += len(version_rows)
+                    spider.logger.error(f"Error inserting the sections of Bill {key[0]} version {key[3]}: {e}")
+            connection.commit()
+            return inserted, 0, len(rows) - inserted - failed, failed
+
+    @staticmethod
+    def copy_sections(cursor, rows, texts):
+        # texts maps each version to the detail_hash of the rows to keep (None keeps none);
+        # the search columns of these versions are refreshed from their new rows, and the
+        # data generation of their sessions counted up
+        if texts:
+            execute_values(
+                cursor, DELETE_STALE_SECTIONS_SQL, [key + (text,) for key, text in texts.items()],
+                template=SECTION_VERSIONS_TEMPLATE, page_size=len(texts),
+            )
+        if rows:
+            columns = ', '.join(TABLE_COLUMNS['bill_sections'])
+            cursor.copy_expert(f"COPY bill_sections ({columns}) FROM STDIN", copy_buffer(rows))
+        if texts:
+            execute_values(
+                cursor, REFRESH_SEARCH_SQL, list(texts), template=SEARCH_VERSIONS_TEMPLATE, page_size=len(texts),
+            )
+            bump_generations(cursor, row_sessions('bill_sections', texts))
+
+
+class AsyncPostgresPipeline(PostgresPipeline):
+    """PostgresPipeline variant that never blocks the reactor on the database.
+
+    Batches are written from a thread pool, each thread borrowing a connection from
+    a pool of POSTGRES_POOL_SIZE connections, and process_item returns while the
+    write is in flight. Once more than POSTGRES_MAX_PENDING_WRITES batches are
+    queued or running, process_item waits for its batch, which stalls the scraper
+    slot and so pauses downloads until the database catches up.
+    """
+
+    def __init__(self, batch_size=500, max_latency=5.0, key_cache_entries=500000, text_storage='inline',
+                 text_delta_depth=8, refresh_summaries=True, pool_size=4, max_pending=8):
+        super().__init__(
+            batch_size=batch_size, max_latency=max_latency, key_cache_entries=key_cache_entries,
+            text_storage=text_storage, text_delta_depth=text_delta_depth, refresh_summaries=refresh_summaries,
+        )
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self.pending = set()
+        self.pending_by_table = {table: set() for table in TABLE_STATEMENTS}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(
+            batch_size=crawler.settings.getint('POSTGRES_BATCH_SIZE', 500),
+            max_latency=crawler.settings.getfloat('POSTGRES_BATCH_MAX_LATENCY', 5.0),
+            key_cache_entries=crawler.settings.getint('POSTGRES_KEY_CACHE_MAX_ENTRIES', 500000),
+            text_storage=crawler.settings.get('POSTGRES_TEXT_STORAGE', 'inline'),
+            text_delta_depth=crawler.settings.getint('POSTGRES_TEXT_DELTA_MAX_DEPTH', 8),
+            refresh_summaries=crawler.settings.getbool('POSTGRES_REFRESH_SUMMARIES', True),
+            pool_size=crawler.settings.getint('POSTGRES_POOL_SIZE', 4),
+            max_pending=crawler.settings.getint('POSTGRES_MAX_PENDING_WRITES', 8),
+        )
+        pipeline.stats = crawler.stats
+        return pipeline
+
+    def open_spider(self, spider):
+        try:
+            self.pool = ThreadedConnectionPool(1, self.pool_size, **connection_params())
+        except Exception as e:
+            spider.logger.error(f"Failed to connect to database: {e}")
+            raise NotConfigured("Database connection failed")
+        self.threadpool = ThreadPool(minthreads=1, maxthreads=self.pool_size, name='postgres-pipeline')
+        self.threadpool.start()
+        self.semaphore = DeferredSemaphore(self.pool_size)
+        self.key_cache = KnownKeyCache(self.key_cache_entries, self.stats)
+        self.start_flush_task(spider)
+
+        loads = []
+        for session in self.key_cache_sessions(spider):
+            d = self.run_in_pool(self.read_content_hashes, *session)
+            d.addCallback(lambda hashes, session=session: self.key_cache.load(session, hashes))
+            loads.append(d)
+        return DeferredList(loads, fireOnOneErrback=True)
+
+    def run_in_pool(self, func, *args):
+        from twisted.internet import reactor
+        return threads.deferToThreadPool(reactor, self.threadpool, self.with_connection, func, *args)
+
+    def with_connection(self, func, *args):
+        # Runs in a pool thread
+        connection = self.pool.getconn()
+        try:
+            return func(connection, *args)
+        finally:
+            self.pool.putconn(connection)
+
+    async def process_item(self, item, spider):
+        if isinstance(item, BillItem):
+            flushed = await self.buffer_changed_row('bills', bill_row(item), spider)
+        elif isinstance(item, BillDetailItem):
+            row = bill_detail_row(item)
+            flushed = await self.buffer_changed_row('bill_details', row, spider, section_rows(item, row))
+        elif isinstance(item, VoteItem):
+            key = (item.get('parliament_number'), item.get('session_number'))
+            if key not in self.known_divisions:
+                known = await maybe_deferred_to_future(self.run_in_pool(self.read_division_numbers, *key))
+                self.known_divisions.setdefault(key, known)
+            flushed = None
+            if not self.is_known_division(item):
+                flushed = self.buffer_row('bill_votes', vote_row(item), spider)
+        else:
+            flushed = None
+
+        if flushed is not None and len(self.pending) > self.max_pending:
+            self.stats.inc_value('postgres/backpressure_waits')
+            await maybe_deferred_to_future(flushed)
+        return item
+
+    async def buffer_changed_row(self, table, row, spider, sections=()):
+        session = None
+        if self.key_cache.enabled:
+            session = self.key_cache.session_of(table, row)
+            if not self.key_cache.is_loaded(session):
+                hashes = await maybe_deferred_to_future(self.run_in_pool(self.read_content_hashes, *session))
+                if not self.key_cache.is_loaded(session):
+                    self.key_cache.load(session, hashes)
+        return self.buffer_if_changed(table, row, session, spider, sections)
+
+    @staticmethod
+    def read_division_numbers(connection, parliament, session):
+        with connection.cursor() as cursor:
+            known = fetch_division_numbers(cursor, parliament, session)
+        connection.commit()
+        return known
+
+    def flush(self, table, spider):
+        parent_writes = []
+        if table in TABLE_PARENTS:
+            self.flush(TABLE_PARENTS[table], spider)
+            # Not filtered on .called: a semaphore.run deferred is called as soon as the slot is taken
+            parent_writes = list(self.pending_by_table[TABLE_PARENTS[table]])
+        rows = self.take_rows(table)
+        if not rows:
+            return None
+        if parent_writes:
+            # Start only once every parent batch still in flight is committed, not just the last
+            # one: the semaphore lets earlier batches finish after later ones. DeferredList
+            # leaves their results untouched
+            d = DeferredList(parent_writes)
+            d.addCallback(lambda _: self.semaphore.run(self.run_in_pool, self.timed_write_rows, table, rows, spider))
+        else:
+            d = self.semaphore.run(self.run_in_pool, self.timed_write_rows, table, rows, spider)
+        self.pending.add(d)
+        self.pending_by_table[table].add(d)
+        self.stats.max_value('postgres/max_pending_writes', len(self.pending))
+
+        def done(timed_result):
+            self.pending.discard(d)
+            self.pending_by_table[table].discard(d)
+            self.flushed(table, rows, *timed_result, spider)
+
+        def failed(failure):
+            self.pending.discard(d)
+            self.pending_by_table[table].discard(d)
+            self.stats.inc_value(f'postgres/rows_failed/{table}', len(rows))
+            self.forget_keys(table, rows)
+            self.mark_failed_sessions(row_sessions(table, rows), spider)
+            spider.logger.error(f"Error writing {len(rows)} rows into {table}: {failure.value}")
+
+        d.addCallbacks(done, failed)
+        return d
+
+    def close_spider(self, spider):
+        self.stop_flush_task()
+        self.flush_all(spider)
+        self.key_cache.report()
+        d = DeferredList(list(self.pending))
+        d.addCallback(lambda _: self.run_in_pool(self.pack_texts, spider))
+        d.addCallback(self.record_pack)
+        d.addCallback(lambda _: self.run_in_pool(self.refresh_session_summaries, spider))
+        d.addCallback(self.record_summaries)
+
+        def shutdown(_):
+            self.threadpool.stop()
+            self.pool.closeall()
+
+        d.addBoth(shutdown)
+        return d
+
+
+class BackfillPostgresPipeline(PostgresPipeline):
+    """Bulk load mode for first-time crawls of all parliaments.
 
-                # Execute the SQL statement
-                self.cursor.execute('''
-                    INSERT INTO bill_details (
-                        bill_number, parliament_number, session_number, title, short_title, sponsor,
-                        bill_ref_number, bill_history, introduction, body
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (bill_number, parliament_number, session_number) DO NOTHING
-                ''', values)
+    Rows are streamed with COPY into UNLOGGED staging tables (staging_<spider>_<table>)
+    and merged into bills, bill_details and bill_votes by one set-based statement per
+    table at close_spider, using the same content-hash upserts as PostgresPipeline.
+    The merge runs in a single transaction that drops the foreign keys and secondary
+    indexes of the three tables first and recreates them afterwards, so they are built
+    and validated once rather than maintained row by row. Unique constraints stay, as
+    the upserts need them. The tables are locked for the whole merge.
+    """
+
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.staging = {table: f"staging_{spider.name}_{table}" for table in TABLE_STATEMENTS}
+        for table, staging in self.staging.items():
+            # Leftovers of an interrupted run are discarded
+            self.cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            self.cursor.execute(
+                f"CREATE UNLOGGED TABLE {staging} AS "
+                f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} WITH NO DATA"
+            )
+            # Staging order decides which row wins when a key was staged twice
+            self.cursor.execute(f"ALTER TABLE {staging} ADD COLUMN staged_id BIGSERIAL")
+        self.connection.commit()
+
+    def flush(self, table, spider):
+        rows = self.take_rows(table)
+        if not rows:
+            return
+        columns = ', '.join(TABLE_COLUMNS[table])
+        start = time.perf_counter()
+        # Texts go straight to bill_texts; unreferenced ones are harmless if the merge fails
+        rows, texts = self.split_texts(table, rows)
+        write_texts(self.cursor, texts)
+        self.cursor.copy_expert(f"COPY {self.staging[table]} ({columns}) FROM STDIN", copy_buffer(rows))
+        self.connection.commit()
+        self.stats.inc_value('postgres/write_ms', int((time.perf_counter() - start) * 1000))
+        self.stats.inc_value('postgres/flushes')
+        self.stats.inc_value(f'postgres/backfill/staged/{table}', len(rows))
+
+    def close_spider(self, spider):
+        self.stop_flush_task()
+        if hasattr(self, 'connection'):
+            self.flush_all(spider)
+            start = time.monotonic()
+            try:
+                self.merge(spider)
                 self.connection.commit()
             except Exception as e:
-                spider.logger.error(f"Error inserting BillDetailItem: {e}")
-                spider.logger.debug(f"Values attempted: {values}")
-                raise e  # Optionally re-raise the exception
-        return item
\ No newline at end of file
+                self.connection.rollback()
+                spider.logger.error(f"Backfill merge failed, staging tables kept for inspection: {e}")
+            else:
+                for staging in self.staging.values():
+                    self.cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+                self.connection.commit()
+                self.stats.set_value('postgres/backfill/merge_seconds', round(time.monotonic() - start, 3))
+                self.stats.inc_value('postgres/write_ms', int((time.monotonic() - start) * 1000))
+        super().close_spider(spider)
+
+    def merge(self, spider):
+        tables = list(TABLE_STATEMENTS)
+        self.cursor.execute('''
+            SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE contype = 'f' AND conrelid = ANY(%s::regclass[])
+              AND conparentid = 0  -- partition level copies go with their parent constraint
+        ''', (tables,))
+        foreign_keys = self.cursor.fetchall()
+        self.cursor.execute('''
+            SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            WHERE i.indrelid = ANY(%s::regclass[])
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        ''', (tables,))
+        indexes = self.cursor.fetchall()
+
+        for table, name, _ in foreign_keys:
+            self.cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+        for name, _ in indexes:
+            self.cursor.execute(f"DROP INDEX {name}")
+
+        # bills first: bill_details rows need their bill, bill_sections rows their version,
+        # and votes look their bill up
+        for table in tables:
+            self.merge_table(table, spider)
+
+        for _, definition in indexes:
+            self.cursor.execute(definition)
+        for table, name, definition in foreign_keys:
+            self.cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+        self.cursor.execute(f"ANALYZE {', '.join(tables)}")
+
+    def merge_table(self, table, spider):
+        staging = self.staging[table]
+        columns = ', '.join(TABLE_COLUMNS[table])
+        key = ', '.join(MERGE_KEYS[table])
+        # The per-row path loses rows without a parent row on the foreign key;
+        # they are left out here so the key can be restored
+        parent_exists = STAGED_PARENT_EXISTS_SQL.get(table)
+        condition = f"WHERE {parent_exists}" if parent_exists else ''
+        source = (
+            f"SELECT DISTINCT ON ({key}) {columns} FROM {staging} s {condition} "
+            f"ORDER BY {key}, staged_id DESC"
+        )
+        sql, _ = TABLE_STATEMENTS[table]
+        sql = sql.replace('(VALUES %s)', f'({source})') if table == 'bill_votes' else sql.replace('VALUES %s', source)
+
+        if table == 'bill_sections':
+            self.cursor.execute(DELETE_STALE_SECTIONS_SQL.replace(
+                'VALUES %s', f"SELECT DISTINCT {', '.join(MERGE_KEYS['bill_details'])}, detail_hash FROM {staging}"
+            ))
+        self.cursor.execute(f"SELECT count(*) FROM {staging}")
+        staged = self.cursor.fetchone()[0]
+        self.cursor.execute(
+            f"WITH merged AS ({sql}) SELECT count(*) FILTER (WHERE inserted), count(*) FROM merged"
+        )
+        inserted, written = self.cursor.fetchone()
+        if table in TABLE_REPAIRS:
+            self.cursor.execute(TABLE_REPAIRS[table].replace('(VALUES %s)', f'({source})'))
+            written += self.cursor.rowcount
+        if written:
+            self.cursor.execute(f"SELECT DISTINCT parliament_number, session_number FROM {staging}")
+            bump_generations(self.cursor, self.cursor.fetchall())
+        if table == 'bill_sections':
+            # As in copy_sections, for every version provisions were staged for
+            self.cursor.execute(REFRESH_SEARCH_SQL.replace(
+                'VALUES %s', f"SELECT DISTINCT {', '.join(MERGE_KEYS['bill_details'])} FROM {staging}"
+            ))
+        failed = 0
+        if condition:
+            self.cursor.execute(
+                f"SELECT parliament_number, session_number, count(DISTINCT ({key})) FROM {staging} s "
+                f"WHERE NOT {parent_exists} GROUP BY parliament_number, session_number"
+            )
+            dropped = self.cursor.fetchall()
+            failed = sum(count for _, _, count in dropped)
+            if failed:
+                spider.logger.error(f"Dropped {failed} {table} rows whose {TABLE_PARENTS[table]} row is missing")
+                self.mark_failed_sessions([(parliament, session) for parliament, session, _ in dropped], spider)
+        self.record_flush(table, inserted, written - inserted, staged - written - failed, failed)
+        spider.logger.info(f"Merged {staged} staged rows into {table}: {inserted} inserted, {written - inserted} updated")
@@ -0,0 +1,85 @@
+# legislative_scraper/scheduler.py
+import shutil
+import tempfile
+
+from scrapy.core.scheduler import Scheduler
+from scrapy.utils.project import data_path
+
+
+class SpillingScheduler(Scheduler):
+    """Keep up to SCHEDULER_MEMORY_QUEUE_LIMIT pending requests in memory and spill the rest to disk.
+
+    Without a JOBDIR, the overflow goes to a disk queue in a temporary directory under
+    SCHEDULER_SPILL_DIR that is removed when the spider closes. Requests are popped from
+    whichever queue holds the highest priority, so spilled bill data still goes ahead of
+    speculative probes kept in memory. With a JOBDIR the stock behaviour is kept (every
+    request on disk) so a paused crawl can resume.
+    """
+
+    def __init__(self, *args, memory_limit=0, spill_dir=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.spilling = False
+        self.peak_memory = 0
+        self.peak_disk = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = super().from_crawler(crawler)
+        scheduler.memory_limit = crawler.settings.getint('SCHEDULER_MEMORY_QUEUE_LIMIT', 0)
+        scheduler.spill_dir = crawler.settings.get('SCHEDULER_SPILL_DIR', 'scheduler')
+        return scheduler
+
+    def open(self, spider):
+        if self.dqdir is None and self.memory_limit > 0:
+            root = data_path(self.spill_dir, createdir=True)
+            self.dqdir = tempfile.mkdtemp(prefix=f"{spider.name}-", dir=root)
+            self.spilling = True
+            spider.logger.info(
+                f"Spilling scheduled requests past {self.memory_limit} in memory to {self.dqdir}"
+            )
+        return super().open(spider)
+
+    def close(self, reason):
+        if not self.spilling:
+            return super().close(reason)
+        self.stats.set_value('scheduler/spill/peak_memory', self.peak_memory, spider=self.spider)
+        self.stats.set_value('scheduler/spill/peak_disk', self.peak_disk, spider=self.spider)
+        # Spilled requests only outlive the process with a JOBDIR
+        self.dqs.close()
+        shutil.rmtree(self.dqdir, ignore_errors=True)
+        return self.df.close(reason)
+
+    def enqueue_request(self, request):
+        if not self.spilling:
+            return super().enqueue_request(request)
+        if not request.dont_filter and self.df.request_seen(request):
+            self.df.log(request, self.spider)
+            return False
+        if len(self.mqs) < self.memory_limit or not self._dqpush(request):
+            self._mqpush(request)
+            self.peak_memory = max(self.peak_memory, len(self.mqs))
+            self.stats.inc_value('scheduler/enqueued/memory', spider=self.spider)
+        else:
+            self.peak_disk = max(self.peak_disk, len(self.dqs))
+            self.stats.inc_value('scheduler/enqueued/disk', spider=self.spider)
+        self.stats.inc_value('scheduler/enqueued', spider=self.spider)
+        return True
+
+    def next_request(self):
+        if not self.spilling or not self.disk_first():
+            return super().next_request()
+        request = self._dqpop()
+        self.stats.inc_value('scheduler/dequeued/disk', spider=self.spider)
+        self.stats.inc_value('scheduler/dequeued', spider=self.spider)
+        return request
+
+    def disk_first(self):
+        # ScrapyPriorityQueue keeps its best bucket in curprio (-request.priority); with
+        # other queue classes memory simply goes first, as in the stock scheduler
+        disk = getattr(self.dqs, 'curprio', None) if len(self.dqs) else None
+        if disk is None:
+            return False
+        memory = getattr(self.mqs, 'curprio', None) if len(self.mqs) else None
+        return memory is None or disk < memory
@@ -0,0 +1,94 @@
+# legislative_scraper/search.py
+#
+# Full-text search columns of bill_details (migrations/0006_bill_search.sql):
+#
+#     python -m legislative_scraper.search index [--all] [--batch-size N]
+#
+# The pipelines fill them in as they write bill versions. index does it for the
+# versions stored before (with --all, for every version), first indexing the
+# provisions of the ones without bill_sections rows from their stored body.
+import argparse
+import xml.etree.ElementTree as ET
+
+from legislative_scraper.db import connect
+from legislative_scraper.pipelines import PostgresPipeline, section_rows
+from legislative_scraper.textstore import fetch_texts
+from legislative_scraper.xmlparse import body_sections
+
+
+def stored_sections(body):
+    # The body was stored as parse_bill_text serialized it, so the offsets come out the same
+    return body_sections(ET.fromstring(body), body)
+
+
+def index_stored(connection, batch_size, reindex_all=False):
+    """Fill in the search columns batch by batch; returns (versions indexed, versions whose
+    provisions were read from their body, versions whose body is not valid XML)."""
+    condition = '' if reindex_all else 'AND d.search_vector IS NULL'
+    last_id = indexed = parsed = failed = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(f'''
+                SELECT d.detail_id, d.bill_number, d.parliament_number, d.session_number, d.version_number,
+                       d.content_hash, d.body_hash, EXISTS (
+                           SELECT 1 FROM bill_sections s
+                           WHERE s.bill_number = d.bill_number
+                             AND s.parliament_number = d.parliament_number
+                             AND s.session_number = d.session_number
+                             AND s.version_number = d.version_number
+                             AND s.detail_hash = d.content_hash
+                       )
+                FROM bill_details d
+                WHERE d.detail_id > %s {condition}
+                ORDER BY d.detail_id LIMIT %s
+            ''', (last_id, batch_size))
+            versions = cursor.fetchall()
+            if not versions:
+                return indexed, parsed, failed
+            # Bodies are only read for the versions without provisions of their current text
+            missing = [version for version in versions if not version[7]]
+            cursor.execute(
+                'SELECT detail_id, body FROM bill_details WHERE detail_id = ANY(%s) AND body IS NOT NULL',
+                ([version[0] for version in missing],),
+            )
+            bodies = dict(cursor.fetchall())
+            texts = fetch_texts(cursor, {version[6] for version in missing if version[6] is not None})
+            rows = []
+            for version in missing:
+                body = texts.get(version[6]) if version[6] is not None else bodies.get(version[0])
+                if body is None or version[5] is None:
+                    # Rows written before content hashes existed are indexed on their next write
+                    continue
+                try:
+                    sections = stored_sections(body)
+                except ET.ParseError:
+                    failed += 1
+                    continue
+                rows.extend(section_rows({'sections': sections}, version[1:6]))
+                parsed += 1
+            # Also replaces provisions left from an earlier text and refreshes the search columns
+            PostgresPipeline.copy_sections(cursor, rows, {version[1:5]: version[5] for version in versions})
+        connection.commit()
+        last_id = versions[-1][0]
+        indexed += len(versions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the full-text search columns of stored bill versions.")
+    parser.add_argument('command', choices=('index',))
+    parser.add_argument('--all', action='store_true', help="reindex every version, not only unindexed ones")
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    connection = connect()
+    try:
+        indexed, parsed, failed = index_stored(connection, args.batch_size, args.all)
+        print(f"index: {indexed} bill versions indexed, provisions of {parsed} read from their body")
+        if failed:
+            print(f"index: the stored body of {failed} bill versions is not valid XML, indexed without it")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# legislative_scraper/sessions.py
+import json
+import os
+from datetime import datetime, timezone
+
+from scrapy.utils.project import data_path
+
+FIRST_PARLIAMENT = 35  # Earliest parliament published in LEGISinfo
+
+
+def parse_sessions_arg(value):
+    """Parse a "44-1,44-2" style spider argument into (parliament, session) tuples."""
+    sessions = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        parliament, _, session = part.partition('-')
+        if not session:
+            raise ValueError(f"Invalid session '{part}', expected PARLIAMENT-SESSION (e.g. 44-1)")
+        sessions.append((int(parliament), int(session)))
+    return sorted(set(sessions))
+
+
+def format_sessions(sessions):
+    return ','.join(f"{parliament}-{session}" for parliament, session in sessions)
+
+
+class SessionManifest:
+    """Local cache of the (parliament, session) pairs known to exist on parl.ca.
+
+    The manifest is a small JSON file so operators can inspect or edit it; the
+    same list can be passed back to the spider with ``-a sessions=...``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sessions = set()
+        self.updated = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        path = data_path(settings.get('SESSION_MANIFEST_PATH', 'sessions.json'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        manifest = cls(path)
+        manifest.load()
+        return manifest
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as file:
+            data = json.load(file)
+        self.sessions = {(int(p), int(s)) for p, s in data.get('sessions', [])}
+        self.updated = data.get('updated')
+
+    def save(self):
+        self.updated = datetime.now(timezone.utc).isoformat()
+        data = {
+            'sessions': [list(pair) for pair in sorted(self.sessions)],
+            'updated': self.updated,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def add(self, parliament, session):
+        self.sessions.add((parliament, session))
+
+    @property
+    def newest_parliament(self):
+        if not self.sessions:
+            return None
+        return max(parliament for parliament, _ in self.sessions)
@@ -15,6 +15,35 @@ NEWSPIDER_MODULE = "legislative_scraper.spiders"
 ITEM_PIPELINES = {
     'legislative_scraper.pipelines.PostgresPipeline': 300,
 }
+# PostgresPipeline writes multi-row inserts per table once a buffer reaches
+# POSTGRES_BATCH_SIZE rows or its oldest row is POSTGRES_BATCH_MAX_LATENCY seconds old
+POSTGRES_BATCH_SIZE = 500
+POSTGRES_BATCH_MAX_LATENCY = 5.0
+# Stored keys and content hashes of the sessions being written are cached so unchanged bills and
+# bill versions are skipped without a round trip; whole sessions are evicted past this many keys
+# (0 disables the cache)
+POSTGRES_KEY_CACHE_MAX_ENTRIES = 500000
+# "compressed" stores the bill_history / introduction / body of bill versions zlib-compressed in
+# bill_texts, once per distinct text (migrations/0002_bill_texts.sql); "inline" keeps them in
+# bill_details. Convert stored rows with python -m legislative_scraper.textstore compress
+POSTGRES_TEXT_STORAGE = "inline"
+# With "compressed" storage, each version of the bills written in a crawl is then stored as a
+# delta against the previous version where that is smaller; reading a version applies at most
+# this many deltas (0 keeps every version whole); python -m legislative_scraper.textstore pack
+# packs bills stored earlier
+POSTGRES_TEXT_DELTA_MAX_DEPTH = 8
+# Once a crawl's rows are stored, the summary tables (migrations/0007_session_stats.sql) of the
+# sessions it wrote bills or votes for are refreshed; python -m legislative_scraper.stats refresh
+# refreshes others
+POSTGRES_REFRESH_SUMMARIES = True
+# AsyncPostgresPipeline (use it in ITEM_PIPELINES instead of PostgresPipeline) writes batches
+# from a thread pool over POSTGRES_POOL_SIZE connections and stops taking items once more than
+# POSTGRES_MAX_PENDING_WRITES batches are in flight
+POSTGRES_POOL_SIZE = 4
+POSTGRES_MAX_PENDING_WRITES = 8
+# BackfillPostgresPipeline (for first-time crawls, e.g. -s 'ITEM_PIPELINES={"legislative_scraper.pipelines.BackfillPostgresPipeline": 300}')
+# COPYs each POSTGRES_BATCH_SIZE batch into unlogged staging tables and merges them at close,
+# rebuilding secondary indexes and foreign keys once
 
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.121 Safari/537.36'
 
@@ -28,6 +57,13 @@ DOWNLOAD_DELAY = 1
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
 CONCURRENT_REQUESTS = 32
 
+# Pending requests past SCHEDULER_MEMORY_QUEUE_LIMIT are pickled to a temporary queue under
+# .scrapy/SCHEDULER_SPILL_DIR, so memory stays bounded while bills lists fan out (0 keeps
+# everything in memory; with a JOBDIR every request goes to the job's disk queue as usual)
+SCHEDULER = "legislative_scraper.scheduler.SpillingScheduler"
+SCHEDULER_MEMORY_QUEUE_LIMIT = 5000
+SCHEDULER_SPILL_DIR = "scheduler"
+
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
 # See also autothrottle settings and docs
@@ -50,22 +86,45 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 16
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
-#    "legislative_scraper.middlewares.LegislativeScraperSpiderMiddleware": 543,
-#}
+SPIDER_MIDDLEWARES = {
+    # Highest order so only the callback itself is timed
+    "legislative_scraper.middlewares.LegislativeScraperSpiderMiddleware": 950,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "legislative_scraper.middlewares.LegislativeScraperDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    # Next to the downloader, so every raw and cached response is seen before retries/redirects
+    "legislative_scraper.middlewares.LegislativeScraperDownloaderMiddleware": 950,
+}
+
+# Per URL family crawl metrics from the middlewares above; exported every METRICS_EXPORT_INTERVAL
+# seconds to these paths (relative to .scrapy, {spider} = spider name, empty to skip one) and
+# summarized under metrics/* in the closing stats. The .prom file suits node_exporter's
+# textfile collector.
+METRICS_ENABLED = True
+METRICS_EXPORT_INTERVAL = 30
+METRICS_EXPORT_JSON = "metrics/{spider}.json"
+METRICS_EXPORT_PROMETHEUS = "metrics/{spider}.prom"
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
 EXTENSIONS = {
     "scrapy.extensions.telnet.TelnetConsole": None,
+    "legislative_scraper.extensions.ReactorStallMonitor": 500,
+    "legislative_scraper.extensions.StatsFileExport": 900,
 }
 
+# Report time the reactor thread was blocked under reactor/* in the crawl stats
+REACTOR_STALL_MONITOR_ENABLED = True
+
+# Parse bills lists / bill text of at least PARSE_OFFLOAD_THRESHOLD bytes in a worker pool
+# (set PARSE_OFFLOAD_ENABLED = False to parse everything on the reactor thread)
+PARSE_OFFLOAD_ENABLED = True
+PARSE_OFFLOAD_THRESHOLD = 256 * 1024
+PARSE_OFFLOAD_EXECUTOR = "process"
+PARSE_OFFLOAD_WORKERS = 2
+
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 #ITEM_PIPELINES = {
@@ -95,7 +154,42 @@ HTTPCACHE_ENABLED = True
 HTTPCACHE_EXPIRATION_SECS = 0
 HTTPCACHE_DIR = "httpcache"
 HTTPCACHE_IGNORE_HTTP_CODES = []
-HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_STORAGE = "legislative_scraper.httpcache.SqliteCacheStorage"
+# Compressed responses in .scrapy/httpcache/<spider>.sqlite, least recently used evicted past the cap
+HTTPCACHE_SQLITE_MAX_BYTES = 2 * 1024 ** 3
+HTTPCACHE_SQLITE_MAX_IDLE_SECS = 90 * 24 * 3600
+# Per URL family TTLs in seconds (0 = never expire, for 200 responses only; other statuses of
+# such a family are not cached); bill text versions never change once published
+HTTPCACHE_FAMILY_EXPIRATION_SECS = {
+    "bills_list": 6 * 3600,
+    "bill_data": 24 * 3600,
+    "bill_text": 0,
+    "votes": 6 * 3600,
+}
+
+# Local manifest of discovered (parliament, session) pairs, relative to the .scrapy data dir.
+# Override the crawl with: scrapy crawl bill_session -a sessions=44-1,44-2
+SESSION_MANIFEST_PATH = "sessions.json"
+# Last known version count per bill, used to seed bill text version discovery.
+BILL_VERSIONS_PATH = "bill_versions.json"
+# ETag / Last-Modified of the bills list pages, sent as validators by: scrapy crawl bill_session -a mode=delta
+HTTP_VALIDATORS_PATH = "validators.json"
+# Bill text versions already fetched (published versions never change) and versions answered
+# with 404 recently are not requested again. A 404 is remembered for between half and all of
+# IMMUTABLE_MISSING_TTL seconds, and "fetched" only skips versions up to a bill's last known
+# count, so Bloom filter false positives cannot make up new versions. Both sets are
+# Bloom filters in .scrapy/IMMUTABLE_FILTER_DIR sized for IMMUTABLE_FILTER_CAPACITY URLs at
+# IMMUTABLE_FILTER_ERROR_RATE false positives; delete the directory after emptying the database
+IMMUTABLE_FILTER_ENABLED = True
+IMMUTABLE_FILTER_DIR = "immutable"
+IMMUTABLE_FILTER_CAPACITY = 1000000
+IMMUTABLE_FILTER_ERROR_RATE = 0.001
+IMMUTABLE_MISSING_TTL = 24 * 3600
+# Checkpoint stores of named crawls (scrapy crawl bill_session -a checkpoint=NAME), one SQLite
+# file per name; run python -m legislative_scraper.launch to shard such a crawl over processes
+CHECKPOINT_DIR = "checkpoints"
+# Final crawl stats are written here as JSON when set (the launcher sets it per worker)
+STATS_EXPORT_PATH = None
 
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
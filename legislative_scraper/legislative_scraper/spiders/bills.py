@@ -1,13 +1,29 @@
 import scrapy
 import xml.etree.ElementTree as ET
 from scrapy.http import Request
+from legislative_scraper.checkpoints import CheckpointStore
+from legislative_scraper.db import connect, fetch_stage_dates
+from legislative_scraper.delta import ValidatorStore, stage_changed
+from legislative_scraper.immutable import ImmutableUrlStore
 from legislative_scraper.items import BillItem, BillDetailItem
+from legislative_scraper.sessions import FIRST_PARLIAMENT, SessionManifest, format_sessions, parse_sessions_arg
+from legislative_scraper.versions import VersionSearch, VersionStore, infer_bill_type
+from legislative_scraper.offload import ParseOffloader
+from legislative_scraper.xmlparse import iter_bills_list, parse_bill_text, read_bills_list
 
 BASE_URL = "https://www.parl.ca"
 BILLS_LIST_URL = f"{BASE_URL}/legisinfo/en/bills/xml?parlsession={{parliament}}-{{session}}"
 BILL_DATA_URL = f"{BASE_URL}/LegisInfo/en/bill/{{parliament}}-{{session}}/{{bill_number}}/xml"
 BILL_DETAILS_URL = f"{BASE_URL}/Content/Bills/{{parliament}}{{session}}/{{bill_type}}/{{bill_number}}/{{bill_number}}_{{count}}/{{bill_number}}_E.xml"
 BILL_VOTES_URL = f"https://www.ourcommons.ca/Members/en/votes/xml?parlSession={{parliament}}/{{session}}"
+
+# Scheduler priorities (higher first): confirmed data is fetched before speculative version
+# probes, and bills lists, which fan out into most of the queue, come last
+BILL_TEXT_PRIORITY = 30  # Versions known to exist
+BILL_DATA_PRIORITY = 20
+VERSION_PROBE_PRIORITY = 10
+BILLS_LIST_PRIORITY = 0
+
 class BillSessionSpider(scrapy.Spider):
     name = "bill_session"
     allowed_domains = ["parl.ca", "ourcommons.ca"]
@@ -15,47 +31,181 @@ class BillSessionSpider(scrapy.Spider):
     max_sessions = 4  # Optional limit for sessions
     max_counts = 100  # Optional limit for counts
 
+    def __init__(self, sessions=None, rediscover=False, mode='full', checkpoint=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # -a mode=delta only follows bills whose LatestCompletedBillStageDateTime changed
+        if mode not in ('full', 'delta'):
+            raise ValueError(f"Unknown crawl mode '{mode}', expected 'full' or 'delta'")
+        self.mode = mode
+        # -a sessions=44-1,44-2 crawls exactly those sessions and skips discovery
+        self.sessions = parse_sessions_arg(sessions) if sessions else None
+        # -a rediscover=1 ignores the manifest and probes again from FIRST_PARLIAMENT
+        self.rediscover = str(rediscover).lower() in ('1', 'true', 'yes')
+        # -a checkpoint=NAME records stored bills and versions under NAME; a crawl restarted
+        # with the same NAME skips them
+        self.checkpoint_name = checkpoint
+        self.checkpoints = None
+        self.manifest = None
+        self.version_store = None
+        self.validator_store = None
+        self.immutable = None
+        self.db_connection = None
+        self.stage_dates = {}
+        self.offloader = None
+        # Sessions with a bill or bill version that was not fetched or not stored in this run;
+        # the pipelines add the sessions of rows that failed to store
+        self.failed_sessions = set()
+
     def start_requests(self):
-        parliament = 35  # Starting from parliament 35
-        while parliament <= self.max_parliaments:
-            session = 1
-            while session <= self.max_sessions:
-                url = BILLS_LIST_URL.format(parliament=parliament, session=session)
-                self.logger.info(f"Requesting bills list URL: {url}")
-                yield Request(
-                    url,
-                    callback=self.parse_bills_list,
-                    cb_kwargs={"parliament": parliament, "session": session},
-                    errback=lambda failure, p=parliament, s=session: self.handle_error(failure, p, s),
-                    meta={
-                        'dont_redirect': True,
-                        'handle_httpstatus_list': [200, 301, 302, 404]
-                    }
-                )
-                session += 1
-            parliament += 1
+        self.version_store = VersionStore.from_settings(self.settings)
+        self.validator_store = ValidatorStore.from_settings(self.settings)
+        self.immutable = ImmutableUrlStore.from_settings(self.settings)
+        self.offloader = ParseOffloader.from_crawler(self.crawler)
+        if self.checkpoint_name:
+            self.checkpoints = CheckpointStore.from_settings(self.settings, self.checkpoint_name)
+            self.logger.info(f"Checkpointing stored bills and versions in {self.checkpoints.path}")
+        if self.mode == 'delta':
+            try:
+                self.db_connection = connect()
+            except Exception as e:
+                self.logger.error(f"Delta mode cannot read stored stage dates, following every bill: {e}")
+        if self.sessions:
+            self.logger.info(f"Crawling sessions given on the command line: {format_sessions(self.sessions)}")
+            for parliament, session in self.sessions:
+                yield self.bills_list_request(parliament, session)
+            return
 
-    def handle_error(self, failure, parliament, session):
-        response = failure.value.response
-        if response.status in [404, 301, 302]:
-            self.logger.info(f"Received status {response.status} for Parliament {parliament}, Session {session}. No further requests for this session.")
-        else:
-            self.logger.error(f"Request failed for URL: {response.url} with status {response.status}")
+        self.manifest = SessionManifest.from_settings(self.settings)
+        known = set() if self.rediscover else set(self.manifest.sessions)
+        newest = max((p for p, _ in known), default=FIRST_PARLIAMENT)
+        self.logger.info(
+            f"Loaded {len(known)} known sessions from {self.manifest.path}; re-probing from Parliament {newest}"
+        )
+
+        # Sessions of older parliaments are closed, so they are requested directly.
+        for parliament, session in sorted(known):
+            if parliament < newest:
+                yield self.bills_list_request(parliament, session)
+
+        # The newest parliament may have gained sessions (or a successor) since the last run.
+        yield self.bills_list_request(newest, 1, probe=True)
+
+    def bills_list_request(self, parliament, session, probe=False):
+        url = BILLS_LIST_URL.format(parliament=parliament, session=session)
+        self.logger.info(f"Requesting bills list URL: {url}")
+        meta = {
+            'dont_redirect': True,
+            'handle_httpstatus_list': [200, 301, 302, 304, 404]
+        }
+        headers = {}
+        if self.mode == 'delta':
+            # Revalidate against parl.ca instead of trusting the never-expiring HTTP cache.
+            headers = self.validator_store.request_headers(url)
+            meta['dont_cache'] = True
+        return Request(
+            url,
+            callback=self.parse_bills_list,
+            cb_kwargs={"parliament": parliament, "session": session, "probe": probe},
+            errback=self.handle_bills_list_error,
+            headers=headers,
+            meta=meta,
+            priority=BILLS_LIST_PRIORITY
+        )
+
+    def stored_stage_dates(self, parliament, session):
+        if self.db_connection is None:
+            return None
+        if (parliament, session) not in self.stage_dates:
+            with self.db_connection.cursor() as cursor:
+                self.stage_dates[(parliament, session)] = fetch_stage_dates(cursor, parliament, session)
+        return self.stage_dates[(parliament, session)]
 
-    def parse_bills_list(self, response, parliament, session):
+    def next_probe(self, parliament, session, exists):
+        # Probe sessions in order; the first parliament without a session 1 ends discovery.
+        if exists and session < self.max_sessions:
+            return self.bills_list_request(parliament, session + 1, probe=True)
+        if (exists or session > 1) and parliament < self.max_parliaments:
+            return self.bills_list_request(parliament + 1, 1, probe=True)
+        self.logger.info(f"Session discovery finished at Parliament {parliament}, Session {session}.")
+        self.save_manifest()
+        return None
+
+    def save_manifest(self):
+        if self.manifest is None:
+            return
+        self.manifest.save()
+        self.crawler.stats.set_value('sessions/known', len(self.manifest.sessions))
+        self.logger.info(
+            f"Session manifest written to {self.manifest.path}: {format_sessions(sorted(self.manifest.sessions))}"
+        )
+
+    def closed(self, reason):
+        self.save_manifest()
+        if self.version_store is not None:
+            self.version_store.save()
+        if self.validator_store is not None:
+            # Pipelines close first. A session with a bill that was not fetched or stored must not
+            # come back 304 Not Modified next run, or the bill would be skipped until the list changes
+            for parliament, session in sorted(self.failed_sessions):
+                self.validator_store.forget(BILLS_LIST_URL.format(parliament=parliament, session=session))
+            self.crawler.stats.set_value('delta/sessions_failed', len(self.failed_sessions))
+            self.validator_store.save()
+        if self.immutable is not None:
+            # Pipelines close first; bill text whose rows failed to store must be fetched again
+            failed = self.crawler.stats.get_value('postgres/rows_failed/bill_details', 0)
+            self.immutable.save(keep_fetched=not failed)
+            self.crawler.stats.set_value('immutable/fetched_entries', self.immutable.fetched.count)
+        if self.db_connection is not None:
+            self.db_connection.close()
+        if self.offloader is not None:
+            self.offloader.close()
+        if self.checkpoints is not None:
+            self.checkpoints.close()
+
+    def record_failed(self, bill_data):
+        self.failed_sessions.add((bill_data['parliament_number'], bill_data['session_number']))
+
+    def handle_bills_list_error(self, failure):
+        parliament = failure.request.cb_kwargs['parliament']
+        session = failure.request.cb_kwargs['session']
+        self.logger.error(f"Request failed for Parliament {parliament}, Session {session}: {failure.value}")
+        if failure.request.cb_kwargs.get('probe'):
+            self.logger.warning("Session discovery stopped early; the manifest keeps the sessions found so far.")
+
+    async def parse_bills_list(self, response, parliament, session, probe=False):
         if response.status in [301, 302, 404]:
             self.logger.info(f"Received status {response.status} for Parliament {parliament}, Session {session}. Skipping.")
+            if probe:
+                next_request = self.next_probe(parliament, session, exists=False)
+                if next_request is not None:
+                    yield next_request
             return
 
-        try:
-            root = ET.fromstring(response.text)
-            bills = root.findall(".//Bill")
-            if not bills:
-                self.logger.info(f"No bills found for Parliament {parliament}, Session {session}.")
-                return
+        if response.status == 304:
+            self.logger.info(f"Bills list for Parliament {parliament}, Session {session} not modified. Skipping.")
+            self.crawler.stats.inc_value('delta/sessions_not_modified')
+            if probe:
+                if self.manifest is not None:
+                    self.manifest.add(parliament, session)
+                next_request = self.next_probe(parliament, session, exists=True)
+                if next_request is not None:
+                    yield next_request
+            return
 
+        self.validator_store.update(BILLS_LIST_URL.format(parliament=parliament, session=session), response.headers)
+        stored = self.stored_stage_dates(parliament, session) if self.mode == 'delta' else None
+        completed = self.checkpoints.completed_bills(parliament, session) if self.checkpoints else set()
+        bill_count = 0
+        try:
+            if self.offloader.should_offload(response.body):
+                # Large session lists are parsed in a worker so the reactor keeps downloading.
+                bills = await self.offloader.run(read_bills_list, response.body)
+            else:
+                # Bills are streamed off the raw body and discarded once their requests are built.
+                bills = iter_bills_list(response.body)
             for bill in bills:
-                bill_number = bill.findtext("NumberCode")
+                bill_count += 1
+                bill_number = bill['bill_number']
                 if not bill_number:
                     self.logger.warning(f"No bill number found for a bill in Parliament {parliament}, Session {session}.")
                     continue
@@ -65,13 +215,21 @@ class BillSessionSpider(scrapy.Spider):
                     'bill_number': bill_number,
                     'parliament_number': parliament,
                     'session_number': session,
-                    'bill_stage': bill.findtext("LatestCompletedBillStageName"),
-                    'bill_stage_date': bill.findtext("LatestCompletedBillStageDateTime"),
-                    'sponsor_id': bill.findtext("SponsorPersonId"),
-                    'sponsor_name': bill.findtext("SponsorPersonName"),
-                    'sponsor_role': bill.findtext("SponsorAffiliationRoleName")
+                    'bill_stage': bill['bill_stage'],
+                    'bill_stage_date': bill['bill_stage_date'],
+                    'sponsor_id': bill['sponsor_id'],
+                    'sponsor_name': bill['sponsor_name'],
+                    'sponsor_role': bill['sponsor_role']
                 }
 
+                if bill_number in completed:
+                    self.crawler.stats.inc_value('checkpoint/bills_skipped')
+                    continue
+                if stored is not None and bill_number in stored and not stage_changed(bill_data['bill_stage_date'], stored[bill_number]):
+                    self.crawler.stats.inc_value('delta/bills_unchanged')
+                    continue
+                self.crawler.stats.inc_value('delta/bills_changed' if stored is not None else 'bills/followed')
+
                 # Generate the bill data URL
                 bill_data_url = BILL_DATA_URL.format(
                     parliament=parliament,
@@ -83,57 +241,129 @@ class BillSessionSpider(scrapy.Spider):
                     bill_data_url,
                     callback=self.parse_bill_data,
                     cb_kwargs=bill_data,
-                    errback=lambda failure: self.handle_error(failure, parliament, session),
+                    errback=self.handle_bill_data_error,
                     meta={
                         'dont_redirect': True,
                         'handle_httpstatus_list': [200, 301, 302, 404]
-                    }
+                    },
+                    priority=BILL_DATA_PRIORITY
                 )
 
-                # Generate initial bill details requests
-                yield from self.generate_bill_details_requests(bill_data)
-
         except ET.ParseError as e:
             self.logger.error(f"Failed to parse XML for Parliament {parliament}, Session {session}: {e}")
             self.logger.debug(f"Response content: {response.text}")
 
-    def generate_bill_details_requests(self, bill_data):
-        # Extract variables from bill_data
+        if probe:
+            if bill_count and self.manifest is not None:
+                self.manifest.add(parliament, session)
+            next_request = self.next_probe(parliament, session, exists=bool(bill_count))
+            if next_request is not None:
+                yield next_request
+        if not bill_count:
+            self.logger.info(f"No bills found for Parliament {parliament}, Session {session}.")
+
+    def generate_bill_details_requests(self, bill_data, bill_type):
+        # Bill versions are discovered after the bill data, which tells us the bill type.
         parliament = bill_data['parliament_number']
         session = bill_data['session_number']
         bill_number = bill_data['bill_number']
 
-        for bill_type in ['Government', 'Private']:
-            count = 1  # Start with the first version
-            bill_details_url = BILL_DETAILS_URL.format(
-                parliament=parliament,
-                session=session,
-                bill_type=bill_type,
-                bill_number=bill_number,
-                count=count
+        known_count = self.version_store.get(parliament, session, bill_number)
+        completed = self.checkpoints.completed_versions(parliament, session, bill_number) if self.checkpoints else ()
+        search = VersionSearch(
+            bill_data, bill_type, known_count=known_count, max_count=self.max_counts, completed=completed
+        )
+        self.logger.info(f"Discovering {bill_type} versions of Bill {bill_number} starting after version {known_count}")
+        # Versions found by an earlier run exist, so they are fetched while probing for newer ones.
+        yield from self.known_version_requests(search, search.take_known_counts())
+        yield from self.next_version_requests(search)
+
+    def known_version_requests(self, search, counts):
+        for count in counts:
+            if self.known_outcome(search, count) is not None:
+                continue
+            yield self.bill_details_request(
+                search.bill_data, search.bill_type, count, self.parse_bill_details, priority=BILL_TEXT_PRIORITY
             )
-            self.logger.info(f"Generated Bill Details URL: {bill_details_url}")
-            request_meta = {
-                'bill_data': bill_data,
-                'bill_type': bill_type,
-                'count': count,
+
+    def known_outcome(self, search, count):
+        # Whether a version exists when that is known without requesting it, else None
+        if count in search.completed:
+            # Stored by an earlier run of this checkpoint, so it exists
+            self.crawler.stats.inc_value('checkpoint/versions_skipped')
+            return True
+        if self.immutable is None:
+            return None
+        # Counts above the last known one are speculative probes, which must be requested
+        status = self.immutable.status(
+            self.bill_details_url(search.bill_data, search.bill_type, count), speculative=count > search.known_count
+        )
+        if status is not None:
+            self.crawler.stats.inc_value(f'immutable/skipped_{status}')
+            return status == 'fetched'
+        return None
+
+    def bill_details_url(self, bill_data, bill_type, count):
+        return BILL_DETAILS_URL.format(
+            parliament=bill_data['parliament_number'],
+            session=bill_data['session_number'],
+            bill_type=bill_type,
+            bill_number=bill_data['bill_number'],
+            count=count
+        )
+
+    def bill_details_request(self, bill_data, bill_type, count, callback, priority, **cb_kwargs):
+        bill_details_url = self.bill_details_url(bill_data, bill_type, count)
+        self.logger.info(f"Generated Bill Details URL: {bill_details_url}")
+        return Request(
+            bill_details_url,
+            callback=callback,
+            cb_kwargs={'bill_data': bill_data, 'count': count, **cb_kwargs},
+            errback=self.handle_bill_details_error,
+            meta={
                 'dont_redirect': True,
                 'handle_httpstatus_list': [200, 301, 302, 404]
-            }
-            yield Request(
-                bill_details_url,
-                callback=self.parse_bill_details,
-                meta=request_meta,
-                errback=self.handle_bill_details_error
+            },
+            priority=priority
+        )
+
+    def next_version_requests(self, search):
+        count = search.next_count()
+        while count is not None:
+            exists = self.known_outcome(search, count)
+            if exists is None:
+                break
+            search.record(count, exists)
+            count = search.next_count()
+        if count is not None:
+            # Probes are serialized, but exponential-then-binary search needs only O(log n) of them.
+            yield self.bill_details_request(
+                search.bill_data, search.bill_type, count, self.parse_version_probe,
+                priority=VERSION_PROBE_PRIORITY, search=search
             )
+            return
+
+        bill_data = search.bill_data
+        bill_number = bill_data['bill_number']
+        self.logger.info(f"Bill {bill_number} has {search.found} {search.bill_type} version(s)")
+        if search.found:
+            self.version_store.set(bill_data['parliament_number'], bill_data['session_number'], bill_number, search.found)
+        if self.checkpoints is not None:
+            self.checkpoints.mark_version_count(
+                bill_data['parliament_number'], bill_data['session_number'], bill_number, search.found
+            )
+        # Every version below the highest one exists, so the rest are fetched concurrently.
+        yield from self.known_version_requests(search, search.remaining_counts())
 
     def parse_bill_data(self, response, **bill_data):
         if response.status in [301, 302, 404]:
             self.logger.info(f"Received status {response.status} for Bill Data URL: {response.url}. Skipping.")
+            self.record_failed(bill_data)
+            yield from self.generate_bill_details_requests(bill_data, infer_bill_type(bill_data['bill_number']))
             return
 
         try:
-            root = ET.fromstring(response.text)
+            root = ET.fromstring(response.body)
 
             # Extract the bill stage and sponsor details
             bill_stage = root.findtext(".//LatestCompletedBillStageName")
@@ -141,6 +371,7 @@ class BillSessionSpider(scrapy.Spider):
             sponsor_id = root.findtext(".//SponsorPersonId")
             sponsor_name = root.findtext(".//SponsorPersonName")
             sponsor_role = root.findtext(".//SponsorAffiliationTitle") 
+            bill_type = infer_bill_type(bill_data['bill_number'], root.findtext(".//BillTypeEn"))
 
 
             bill_item = BillItem(
@@ -160,87 +391,69 @@ class BillSessionSpider(scrapy.Spider):
         except ET.ParseError as e:
             self.logger.error(f"Failed to parse XML for Bill Data: {e}")
             self.logger.debug(f"Response content: {response.text}")
+            self.record_failed(bill_data)
+            bill_type = infer_bill_type(bill_data['bill_number'])
+
+        yield from self.generate_bill_details_requests(bill_data, bill_type)
+
+    def handle_bill_data_error(self, failure):
+        bill_data = failure.request.cb_kwargs
+        self.logger.error(f"Request failed for Bill Data URL: {failure.request.url}: {failure.value}")
+        self.record_failed(bill_data)
+        yield from self.generate_bill_details_requests(bill_data, infer_bill_type(bill_data['bill_number']))
 
-    def parse_bill_details(self, response):
-        bill_data = response.meta['bill_data']
-        bill_type = response.meta['bill_type']
-        count = response.meta['count']
+    async def parse_version_probe(self, response, bill_data, count, search):
+        exists = response.status == 200
+        if exists:
+            async for item in self.parse_bill_details(response, bill_data, count):
+                yield item
+        elif response.status == 404:
+            if self.immutable is not None:
+                self.immutable.add_missing(response.url)
+        else:
+            self.record_failed(bill_data)
+        search.record(count, exists)
+        for request in self.next_version_requests(search):
+            yield request
 
+    async def parse_bill_details(self, response, bill_data, count):
         if response.status in [301, 302, 404]:
-            self.logger.info(f"Received status {response.status} for Bill Details URL: {response.url}. No further requests for this bill version.")
-            return  # Do not generate further requests
+            self.logger.info(f"Received status {response.status} for Bill Details URL: {response.url}.")
+            self.record_failed(bill_data)
+            return
 
         try:
-            root = ET.fromstring(response.text)
-            identification = root.find(".//Identification")
-            if identification is not None:
+            bill_text = await self.offloader.run(parse_bill_text, response.body)
+            if bill_text is not None:
                 bill_detail_item = BillDetailItem(
-                    bill_number=identification.findtext("BillNumber"),
-                    session_number=identification.findtext("Parliament/Session"),
-                    title=identification.findtext("LongTitle"),
-                    short_title=identification.findtext("ShortTitle"),
-                    sponsor=identification.findtext("BillSponsor"),
-                    bill_ref_number=identification.findtext("BillRefNumber"),
-                    bill_history=ET.tostring(root.find(".//BillHistory"), encoding='unicode') if root.find(".//BillHistory") else None,
-                    introduction=ET.tostring(root.find(".//Introduction"), encoding='unicode') if root.find(".//Introduction") else None,
-                    body=ET.tostring(root.find(".//Body"), encoding='unicode') if root.find(".//Body") else None,
+                    bill_number=bill_text['bill_number'] or bill_data['bill_number'],
+                    parliament_number=bill_data['parliament_number'],
+                    session_number=bill_data['session_number'],
+                    version_number=count,
+                    title=bill_text['title'],
+                    short_title=bill_text['short_title'],
+                    sponsor=bill_text['sponsor'],
+                    bill_ref_number=bill_text['bill_ref_number'],
+                    bill_history=bill_text['bill_history'],
+                    introduction=bill_text['introduction'],
+                    body=bill_text['body'],
+                    sections=bill_text['sections'],
                 )
-                self.logger.info(f"Extracted details for Bill: {bill_detail_item['bill_number']}")
+                self.logger.info(f"Extracted details for Bill: {bill_detail_item['bill_number']} version {count}")
                 yield bill_detail_item
+                if self.immutable is not None:
+                    self.immutable.add_fetched(response.url)
             else:
                 self.logger.warning(f"Identification section not found for URL: {response.url}")
         except ET.ParseError as e:
             self.logger.error(f"Failed to parse XML for Bill Details {response.url}: {e}")
             self.logger.debug(f"Response content: {response.text}")
-            return  # Do not generate further requests on parse error
-
-        # Generate the next bill details request if within max_counts limit
-        next_count = count + 1
-        if next_count <= self.max_counts:
-            parliament = bill_data['parliament_number']
-            session = bill_data['session_number']
-            bill_number = bill_data['bill_number']
-
-            next_bill_details_url = BILL_DETAILS_URL.format(
-                parliament=parliament,
-                session=session,
-                bill_type=bill_type,
-                bill_number=bill_number,
-                count=next_count
-            )
-
-            # Before generating the next request, check if the current response was valid
-            # If not, do not generate further requests
-            if response.status == 200:
-                self.logger.info(f"Generated next Bill Details URL: {next_bill_details_url}")
-                request_meta = {
-                    'bill_data': bill_data,
-                    'bill_type': bill_type,
-                    'count': next_count,
-                    'dont_redirect': True,
-                    'handle_httpstatus_list': [200, 301, 302, 404]
-                }
-                yield Request(
-                    next_bill_details_url,
-                    callback=self.parse_bill_details,
-                    meta=request_meta,
-                    errback=self.handle_bill_details_error
-                )
-            else:
-                self.logger.info(f"Stopping further requests for Bill {bill_number}, Bill Type {bill_type}, due to status {response.status}")
-        else:
-            self.logger.info(f"Reached max counts for Bill {bill_number}, Bill Type {bill_type}")
+            self.record_failed(bill_data)
 
     def handle_bill_details_error(self, failure):
-        response = failure.value.response
-        bill_data = response.meta['bill_data']
-        bill_type = response.meta['bill_type']
-        count = response.meta['count']
-        bill_number = bill_data['bill_number']
-
-        if response.status in [404, 301, 302]:
-            self.logger.info(f"Received status {response.status} for Bill Details URL: {response.url}. No further requests for this bill version.")
-        else:
-            self.logger.error(f"Request failed for URL: {response.url} with status {response.status}")
-
-        # Do not generate further requests since an error occurred
\ No newline at end of file
+        bill_data = failure.request.cb_kwargs['bill_data']
+        self.logger.error(
+            f"Request failed for Bill {bill_data['bill_number']} details URL: {failure.request.url}: {failure.value}"
+        )
+        self.record_failed(bill_data)
+        # A failed probe ends the search; the version store keeps the previous count.
@@ -0,0 +1,81 @@
+import scrapy
+import xml.etree.ElementTree as ET
+from scrapy.http import Request
+from legislative_scraper.items import VoteItem
+from legislative_scraper.sessions import SessionManifest, format_sessions, parse_sessions_arg
+from legislative_scraper.spiders.bills import BILL_VOTES_URL
+from legislative_scraper.xmlparse import iter_elements
+
+
+class VotesSpider(scrapy.Spider):
+    name = "votes"
+    allowed_domains = ["ourcommons.ca"]
+
+    def __init__(self, sessions=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # -a sessions=44-1,44-2 overrides the sessions discovered by bill_session
+        self.sessions = parse_sessions_arg(sessions) if sessions else None
+
+    def start_requests(self):
+        sessions = self.sessions
+        if not sessions:
+            manifest = SessionManifest.from_settings(self.settings)
+            sessions = sorted(manifest.sessions)
+            if not sessions:
+                self.logger.error(
+                    f"No sessions in {manifest.path}; run bill_session first or pass -a sessions=PARLIAMENT-SESSION"
+                )
+                return
+        self.logger.info(f"Requesting votes for sessions: {format_sessions(sessions)}")
+
+        for parliament, session in sessions:
+            url = BILL_VOTES_URL.format(parliament=parliament, session=session)
+            self.logger.info(f"Requesting votes URL: {url}")
+            yield Request(
+                url,
+                callback=self.parse_votes,
+                cb_kwargs={"parliament": parliament, "session": session},
+                errback=self.handle_votes_error,
+                meta={
+                    'dont_redirect': True,
+                    'handle_httpstatus_list': [200, 301, 302, 404]
+                }
+            )
+
+    def handle_votes_error(self, failure):
+        parliament = failure.request.cb_kwargs['parliament']
+        session = failure.request.cb_kwargs['session']
+        self.logger.error(f"Votes request failed for Parliament {parliament}, Session {session}: {failure.value}")
+
+    def parse_votes(self, response, parliament, session):
+        if response.status in [301, 302, 404]:
+            self.logger.info(f"Received status {response.status} for votes of Parliament {parliament}, Session {session}. Skipping.")
+            return
+
+        division_count = 0
+        try:
+            # One document per session; divisions are streamed out of it one at a time.
+            for vote in iter_elements(response.body, 'Vote'):
+                division_number = vote.findtext("DecisionDivisionNumber")
+                if not division_number:
+                    continue
+                division_count += 1
+                vote_date = vote.findtext("DecisionEventDateTime")
+                yield VoteItem(
+                    bill_number=vote.findtext("BillNumberCode") or None,
+                    parliament_number=parliament,
+                    session_number=session,
+                    description=vote.findtext("DecisionDivisionSubject"),
+                    decision=vote.findtext("DecisionResultName"),
+                    total_yeas=vote.findtext("DecisionDivisionNumberOfYeas"),
+                    total_nays=vote.findtext("DecisionDivisionNumberOfNays"),
+                    total_abstain=None,  # Not published in the votes XML
+                    total_paired=vote.findtext("DecisionDivisionNumberOfPaired"),
+                    vote_date=vote_date[:10] if vote_date else None,
+                    division_number=division_number.strip(),
+                )
+        except ET.ParseError as e:
+            self.logger.error(f"Failed to parse votes XML for Parliament {parliament}, Session {session}: {e}")
+            self.logger.debug(f"Response content: {response.text}")
+
+        self.logger.info(f"Extracted {division_count} divisions for Parliament {parliament}, Session {session}")
@@ -0,0 +1,130 @@
+# legislative_scraper/stats.py
+#
+# Per-session summary tables of the dashboard's /stats/ endpoints (migrations/0007_session_stats.sql):
+#
+#     python -m legislative_scraper.stats refresh [--all] [--sessions 44-1,44-2]
+#
+# The pipelines refresh the sessions a crawl wrote bills or votes for when it closes.
+# refresh does it for the given sessions, or with --all for every session stored.
+import argparse
+
+from legislative_scraper.db import bump_generations, connect
+from legislative_scraper.sessions import parse_sessions_arg
+
+# The session_stats row is upserted first: its row lock keeps two refreshes of the same
+# session from interleaving their deletes and inserts
+REFRESH_SESSION_SQL = '''
+    INSERT INTO session_stats AS t (
+        parliament_number, session_number, bills, sponsors, divisions, last_stage_date, last_vote_date
+    )
+    SELECT %(parliament)s, %(session)s, b.bills, b.sponsors, v.divisions, b.last_stage_date, v.last_vote_date
+    FROM (
+        SELECT count(*) AS bills, count(DISTINCT (sponsor_id, sponsor_name)) AS sponsors,
+               max(bill_stage_date) AS last_stage_date
+        FROM bills WHERE parliament_number = %(parliament)s AND session_number = %(session)s
+    ) b, (
+        SELECT count(*) AS divisions, max(vote_date) AS last_vote_date
+        FROM bill_votes WHERE parliament_number = %(parliament)s AND session_number = %(session)s
+    ) v
+    ON CONFLICT (parliament_number, session_number) DO UPDATE SET
+        bills = EXCLUDED.bills,
+        sponsors = EXCLUDED.sponsors,
+        divisions = EXCLUDED.divisions,
+        last_stage_date = EXCLUDED.last_stage_date,
+        last_vote_date = EXCLUDED.last_vote_date,
+        refreshed_at = now()
+'''
+
+# Latest division of a bill first; division numbers are counted up within a session
+LATEST_DIVISION_ORDER = 'vote_date DESC NULLS LAST, length(division_number) DESC, division_number DESC'
+
+# table -> statement rebuilding one session's rows of it
+REFRESH_TABLE_SQL = {
+    'session_stage_stats': '''
+        INSERT INTO session_stage_stats (parliament_number, session_number, bill_stage, bills, last_stage_date)
+        SELECT parliament_number, session_number, bill_stage, count(*), max(bill_stage_date)
+        FROM bills WHERE parliament_number = %(parliament)s AND session_number = %(session)s
+        GROUP BY parliament_number, session_number, bill_stage
+    ''',
+    'session_sponsor_stats': '''
+        INSERT INTO session_sponsor_stats (
+            parliament_number, session_number, sponsor_id, sponsor_name, bills, last_stage_date
+        )
+        SELECT parliament_number, session_number, sponsor_id, sponsor_name, count(*), max(bill_stage_date)
+        FROM bills WHERE parliament_number = %(parliament)s AND session_number = %(session)s
+        GROUP BY parliament_number, session_number, sponsor_id, sponsor_name
+    ''',
+    'bill_vote_stats': f'''
+        INSERT INTO bill_vote_stats (
+            bill_number, parliament_number, session_number, divisions, min_margin, max_margin,
+            last_margin, last_decision, last_vote_date
+        )
+        SELECT bill_number, parliament_number, session_number, count(*),
+               min(total_yeas - total_nays), max(total_yeas - total_nays),
+               (array_agg(total_yeas - total_nays ORDER BY {LATEST_DIVISION_ORDER}))[1],
+               (array_agg(decision ORDER BY {LATEST_DIVISION_ORDER}))[1],
+               max(vote_date)
+        FROM bill_votes
+        WHERE parliament_number = %(parliament)s AND session_number = %(session)s AND bill_number IS NOT NULL
+        GROUP BY bill_number, parliament_number, session_number
+    ''',
+}
+
+
+def refresh_session(cursor, parliament, session):
+    """Replace the summary rows of one session with ones aggregated from bills and bill_votes,
+    counting up its data generation."""
+    params = {'parliament': parliament, 'session': session}
+    cursor.execute(REFRESH_SESSION_SQL, params)
+    for table, sql in REFRESH_TABLE_SQL.items():
+        cursor.execute(
+            f"DELETE FROM {table} WHERE parliament_number = %(parliament)s AND session_number = %(session)s", params
+        )
+        cursor.execute(sql, params)
+    bump_generations(cursor, [(parliament, session)])
+
+
+def stored_sessions(cursor):
+    cursor.execute('''
+        SELECT parliament_number, session_number FROM bills
+        UNION SELECT parliament_number, session_number FROM bill_votes
+        UNION SELECT parliament_number, session_number FROM session_stats
+        ORDER BY 1, 2
+    ''')
+    return cursor.fetchall()
+
+
+def refresh_sessions(connection, sessions):
+    """Refresh each session in its own transaction; returns the number refreshed."""
+    for parliament, session in sessions:
+        with connection.cursor() as cursor:
+            refresh_session(cursor, parliament, session)
+        connection.commit()
+    return len(sessions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the per-session summary tables.")
+    parser.add_argument('command', choices=('refresh',))
+    parser.add_argument('--all', action='store_true', help="refresh every session stored")
+    parser.add_argument('--sessions', type=parse_sessions_arg, default=[], help="sessions to refresh, e.g. 44-1,44-2")
+    args = parser.parse_args()
+    if not args.all and not args.sessions:
+        parser.error("give --all or --sessions")
+
+    connection = connect()
+    try:
+        if args.all:
+            with connection.cursor() as cursor:
+                sessions = stored_sessions(cursor)
+            connection.commit()
+        else:
+            sessions = args.sessions
+        refreshed = refresh_sessions(connection, sessions)
+        print(f"refresh: summary tables of {refreshed} sessions refreshed")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
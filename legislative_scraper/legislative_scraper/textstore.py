@@ -0,0 +1,393 @@
+# legislative_scraper/textstore.py
+#
+# Compressed storage of the bill_details text sections (migrations/0002_bill_texts.sql):
+#
+#     python -m legislative_scraper.textstore sizes
+#     python -m legislative_scraper.textstore compress [--batch-size N] [--vacuum]
+#     python -m legislative_scraper.textstore inline [--batch-size N] [--vacuum]
+#     python -m legislative_scraper.textstore pack [--max-depth N] [--vacuum]
+#     python -m legislative_scraper.textstore check [--sample N]
+#
+# compress moves the inline bill_history / introduction / body of stored rows into
+# bill_texts, inline moves them back; pack stores each version's sections as deltas
+# against the previous version (migrations/0003_bill_text_deltas.sql). All of them
+# print the table sizes before and after. check runs the dashboard's copy of the
+# decoder (legislative_dashboard/view_app/texts.py) against encode_delta and against
+# up to N stored deltas, and exits with status 1 if it decodes anything differently.
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sys
+import zlib
+from difflib import SequenceMatcher
+
+from psycopg2.extras import execute_values
+
+from legislative_scraper.db import connect
+
+TEXT_COLUMNS = ('bill_history', 'introduction', 'body')
+HASH_COLUMNS = tuple(f"{column}_hash" for column in TEXT_COLUMNS)
+CODEC = 'zlib'
+COMPRESSION_LEVEL = 6
+# Longest chain of deltas from a full text, i.e. the most rows read to rebuild one version
+DELTA_MAX_DEPTH = 8
+# Tags and the text between them; joining the tokens gives back the text exactly
+TOKEN_RE = re.compile(r'<[^>]*>?|[^<]+')
+
+DASHBOARD_TEXTS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'legislative_dashboard', 'view_app', 'texts.py'
+)
+# Round-tripped by check even when no delta is stored yet
+CHECK_SAMPLES = (
+    ('<Body><Section><Label>1</Label><Text>Old text</Text></Section></Body>',
+     '<Body><Section><Label>1</Label><Text>New text</Text></Section><Section><Label>2</Label></Section></Body>'),
+    ('<Body>a &amp; b<Text/></Body>', 'a < b <Body'),
+)
+
+INSERT_TEXTS_SQL = '''
+    INSERT INTO bill_texts (text_hash, codec, raw_size, data) VALUES %s
+    ON CONFLICT (text_hash) DO NOTHING
+'''
+
+SET_COLUMNS_SQL = '''
+    UPDATE bill_details d SET {assignments}
+    FROM (VALUES %s) AS v (detail_id, {columns})
+    WHERE d.detail_id = v.detail_id
+'''
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+# Reconstructs texts and every base they depend on in one round trip
+FETCH_TEXT_CHAINS_SQL = '''
+    WITH RECURSIVE chain (text_hash) AS (
+        SELECT text_hash FROM bill_texts WHERE text_hash = ANY(%s)
+        UNION
+        SELECT t.base_hash FROM bill_texts t JOIN chain c ON t.text_hash = c.text_hash
+        WHERE t.base_hash IS NOT NULL
+    )
+    SELECT t.text_hash, t.codec, t.base_hash, t.data FROM bill_texts t JOIN chain USING (text_hash)
+'''
+
+
+def decompress_text(codec, data, base=None):
+    if codec == 'zlib':
+        return zlib.decompress(bytes(data)).decode('utf-8')
+    if codec == 'delta':
+        return apply_delta(base, json.loads(zlib.decompress(bytes(data))))
+    raise ValueError(f"Unknown bill text codec '{codec}'")
+
+
+def encode_delta(base, text):
+    """Return the ops rebuilding ``text`` from ``base``.
+
+    ["c", start, end] copies base tokens start..end, ["i", text] inserts text.
+    """
+    base_tokens = TOKEN_RE.findall(base)
+    text_tokens = TOKEN_RE.findall(text)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, base_tokens, text_tokens).get_opcodes():
+        if tag == 'equal':
+            ops.append(['c', i1, i2])
+        elif j2 > j1:
+            ops.append(['i', ''.join(text_tokens[j1:j2])])
+    return ops
+
+
+def apply_delta(base, ops):
+    base_tokens = TOKEN_RE.findall(base)
+    return ''.join(''.join(base_tokens[op[1]:op[2]]) if op[0] == 'c' else op[1] for op in ops)
+
+
+def split_texts(rows, columns):
+    """Move the text sections of ``rows`` (laid out as ``columns``) into bill_texts values.
+
+    Returns the rows with each text replaced by None and its hash set, and the
+    (text_hash, codec, raw_size, data) values to insert, one per distinct text.
+    """
+    positions = [(columns.index(text), columns.index(name)) for text, name in zip(TEXT_COLUMNS, HASH_COLUMNS)]
+    blobs = {}
+    split = []
+    for row in rows:
+        values = list(row)
+        for text_position, hash_position in positions:
+            text = values[text_position]
+            if text is None:
+                continue
+            digest = text_hash(text)
+            if digest not in blobs:
+                raw = text.encode('utf-8')
+                blobs[digest] = (digest, CODEC, len(raw), zlib.compress(raw, COMPRESSION_LEVEL))
+            values[text_position] = None
+            values[hash_position] = digest
+        split.append(tuple(values))
+    return split, list(blobs.values())
+
+
+def write_texts(cursor, blobs):
+    if blobs:
+        execute_values(cursor, INSERT_TEXTS_SQL, blobs, page_size=len(blobs))
+
+
+def fetch_texts(cursor, hashes):
+    """Return {text_hash: text} for the given hashes, applying deltas as needed."""
+    cursor.execute(FETCH_TEXT_CHAINS_SQL, (list(hashes),))
+    rows = {digest: (codec, base_hash, data) for digest, codec, base_hash, data in cursor.fetchall()}
+    texts = {}
+
+    def resolve(digest):
+        if digest not in texts:
+            codec, base_hash, data = rows[digest]
+            texts[digest] = decompress_text(codec, data, resolve(base_hash) if base_hash else None)
+        return texts[digest]
+
+    return {digest: resolve(digest) for digest in hashes if digest in rows}
+
+
+def pack_bill(cursor, bill, max_depth=DELTA_MAX_DEPTH):
+    """Store the sections of each version of ``bill`` (bill_number, parliament, session) as
+    deltas against the previous version where that is smaller.
+
+    Texts something else is already based on are left whole, which keeps chains acyclic
+    and their recorded depths exact. Returns (texts packed, bytes saved).
+    """
+    cursor.execute(f'''
+        SELECT {', '.join(HASH_COLUMNS)} FROM bill_details
+        WHERE bill_number = %s AND parliament_number = %s AND session_number = %s
+        ORDER BY version_number
+    ''', bill)
+    versions = cursor.fetchall()
+    pairs = []
+    for position in range(len(HASH_COLUMNS)):
+        previous = None
+        for version in versions:
+            digest = version[position]
+            if digest and previous and digest != previous:
+                pairs.append((previous, digest))
+            previous = digest or previous
+    if not pairs:
+        return 0, 0
+
+    texts = fetch_texts(cursor, {digest for pair in pairs for digest in pair})
+    packed = saved = 0
+    for base, target in pairs:
+        # Both rows are locked so concurrent packers cannot base them on each other
+        cursor.execute('''
+            SELECT text_hash, codec, depth, length(data) FROM bill_texts
+            WHERE text_hash IN (%s, %s) ORDER BY text_hash FOR UPDATE
+        ''', (base, target))
+        locked = {row[0]: row[1:] for row in cursor.fetchall()}
+        if base not in locked or target not in locked or locked[target][0] != CODEC:
+            continue
+        depth = locked[base][1] + 1
+        if depth > max_depth:
+            continue
+        cursor.execute('SELECT 1 FROM bill_texts WHERE base_hash = %s LIMIT 1', (target,))
+        if cursor.fetchone() is not None:
+            continue
+        ops = encode_delta(texts[base], texts[target])
+        data = zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'), COMPRESSION_LEVEL)
+        if len(data) >= locked[target][2]:
+            continue
+        cursor.execute(
+            "UPDATE bill_texts SET codec = 'delta', base_hash = %s, depth = %s, data = %s WHERE text_hash = %s",
+            (base, depth, data, target),
+        )
+        packed += 1
+        saved += locked[target][2] - len(data)
+    return packed, saved
+
+
+def table_sizes(cursor):
+    cursor.execute('''
+        SELECT relname, COALESCE(
+            -- bill_details is partitioned from migration 0005 on
+            (SELECT sum(pg_total_relation_size(relid)) FROM pg_partition_tree(oid)),
+            pg_total_relation_size(oid)
+        )
+        FROM pg_class
+        WHERE relname IN ('bill_details', 'bill_texts') AND relkind IN ('r', 'p')
+        ORDER BY relname
+    ''')
+    return dict(cursor.fetchall())
+
+
+def print_sizes(label, sizes):
+    total = sum(sizes.values())
+    details = ', '.join(f"{table} {size / 1024 ** 2:.1f} MiB" for table, size in sizes.items())
+    print(f"{label}: {details} (total {total / 1024 ** 2:.1f} MiB)")
+
+
+def update_rows(cursor, rows, columns):
+    # rows are (detail_id, *values of columns)
+    assignments = ', '.join(f"{column} = v.{column}" for column in columns)
+    sql = SET_COLUMNS_SQL.format(assignments=assignments, columns=', '.join(columns))
+    execute_values(cursor, sql, rows, page_size=len(rows))
+
+
+def convert_batches(connection, select_columns, batch_size, convert):
+    # Walks bill_details by detail_id, one transaction per batch, so a large table is never locked for long
+    condition = ' OR '.join(f"{column} IS NOT NULL" for column in select_columns)
+    last_id = converted = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(f'''
+                SELECT detail_id, {', '.join(TEXT_COLUMNS + HASH_COLUMNS)} FROM bill_details
+                WHERE detail_id > %s AND ({condition})
+                ORDER BY detail_id LIMIT %s
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                return converted
+            update_rows(cursor, convert(cursor, rows), TEXT_COLUMNS + HASH_COLUMNS)
+        connection.commit()
+        last_id = rows[-1][0]
+        converted += len(rows)
+
+
+def compress_rows(cursor, rows):
+    split, blobs = split_texts(rows, ('detail_id',) + TEXT_COLUMNS + HASH_COLUMNS)
+    write_texts(cursor, blobs)
+    return split
+
+
+def inline_rows(cursor, rows):
+    hashes = [row[1 + len(TEXT_COLUMNS):] for row in rows]
+    texts = fetch_texts(cursor, {digest for row_hashes in hashes for digest in row_hashes if digest})
+    return [
+        (row[0],)
+        + tuple(texts[digest] if digest else text for text, digest in zip(row[1:1 + len(TEXT_COLUMNS)], row_hashes))
+        + (None,) * len(HASH_COLUMNS)
+        for row, row_hashes in zip(rows, hashes)
+    ]
+
+
+def prune_texts(cursor):
+    """Delete the texts neither a bill version nor a delta references any more; returns how many."""
+    referenced = ' UNION '.join(
+        [f"SELECT {column} FROM bill_details" for column in HASH_COLUMNS] + ['SELECT base_hash FROM bill_texts']
+    )
+    pruned = 0
+    while True:
+        # Deleting a delta can leave its base unreferenced
+        cursor.execute(f'''
+            DELETE FROM bill_texts t
+            WHERE NOT EXISTS (SELECT 1 FROM ({referenced}) r (text_hash) WHERE r.text_hash = t.text_hash)
+        ''')
+        if not cursor.rowcount:
+            return pruned
+        pruned += cursor.rowcount
+
+
+def pack_stored(connection, max_depth):
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            SELECT DISTINCT bill_number, parliament_number, session_number FROM bill_details
+            WHERE {' OR '.join(f"{column} IS NOT NULL" for column in HASH_COLUMNS)}
+        ''')
+        bills = cursor.fetchall()
+    connection.commit()
+    packed = saved = 0
+    for bill in bills:
+        with connection.cursor() as cursor:
+            bill_packed, bill_saved = pack_bill(cursor, bill, max_depth)
+        connection.commit()
+        packed += bill_packed
+        saved += bill_saved
+    return packed, saved
+
+
+def load_dashboard_texts(path=DASHBOARD_TEXTS_PATH):
+    spec = importlib.util.spec_from_file_location('dashboard_texts', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def check_dashboard(cursor, dashboard, sample):
+    """Return (stored texts decoded, deltas encoded, mismatches) of the dashboard decoder
+    against this module's."""
+    mismatches = []
+    if dashboard.TOKEN_RE.pattern != TOKEN_RE.pattern:
+        mismatches.append(f"TOKEN_RE differs: {dashboard.TOKEN_RE.pattern!r} != {TOKEN_RE.pattern!r}")
+
+    cursor.execute(
+        "SELECT base_hash, text_hash FROM bill_texts WHERE codec = 'delta' ORDER BY depth DESC, text_hash LIMIT %s",
+        (sample,),
+    )
+    pairs = cursor.fetchall()
+    hashes = {digest for pair in pairs for digest in pair}
+    texts = fetch_texts(cursor, hashes)
+    cursor.execute(dashboard.FETCH_TEXT_CHAINS_SQL, (list(hashes),))
+    rows = {digest: (codec, base_hash, data) for digest, codec, base_hash, data in cursor.fetchall()}
+    dashboard_texts = dashboard.resolve_texts(rows, hashes)
+    for digest in sorted(hashes):
+        if dashboard_texts.get(digest) != texts.get(digest):
+            mismatches.append(f"stored text {digest} decodes differently")
+
+    for base, text in CHECK_SAMPLES + tuple((texts[base], texts[target]) for base, target in pairs):
+        data = zlib.compress(json.dumps(encode_delta(base, text), separators=(',', ':')).encode('utf-8'))
+        if dashboard.decompress_text('delta', data, base) != text:
+            mismatches.append(f"delta of {text_hash(text)} against {text_hash(base)} decodes differently")
+    return len(hashes), len(CHECK_SAMPLES) + len(pairs), mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move bill_details texts between inline and compressed storage.")
+    parser.add_argument('command', choices=('sizes', 'compress', 'inline', 'pack', 'check'))
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--max-depth', type=int, default=DELTA_MAX_DEPTH, help="longest delta chain (pack)")
+    parser.add_argument('--vacuum', action='store_true', help="VACUUM FULL afterwards so freed space is returned")
+    parser.add_argument('--sample', type=int, default=1000, help="stored deltas decoded by the dashboard (check)")
+    args = parser.parse_args()
+
+    connection = connect()
+    try:
+        if args.command == 'check':
+            with connection.cursor() as cursor:
+                decoded, encoded, mismatches = check_dashboard(cursor, load_dashboard_texts(), args.sample)
+            connection.commit()
+            for mismatch in mismatches:
+                print(f"check: {mismatch}")
+            print(f"check: {decoded} stored texts decoded, {encoded} deltas encoded, {len(mismatches)} mismatches")
+            if mismatches:
+                sys.exit(1)
+            return
+
+        with connection.cursor() as cursor:
+            before = table_sizes(cursor)
+        connection.commit()
+        print_sizes('before' if args.command != 'sizes' else 'sizes', before)
+        if args.command == 'sizes':
+            return
+
+        if args.command == 'pack':
+            packed, saved = pack_stored(connection, args.max_depth)
+            print(f"pack: {packed} texts stored as deltas, {saved / 1024 ** 2:.1f} MiB saved")
+        else:
+            if args.command == 'compress':
+                converted = convert_batches(connection, TEXT_COLUMNS, args.batch_size, compress_rows)
+            else:
+                converted = convert_batches(connection, HASH_COLUMNS, args.batch_size, inline_rows)
+            with connection.cursor() as cursor:
+                pruned = prune_texts(cursor)
+            connection.commit()
+            print(f"{args.command}: {converted} bill versions converted, {pruned} unreferenced texts deleted")
+
+        if args.vacuum:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM FULL ANALYZE bill_details, bill_texts')
+        with connection.cursor() as cursor:
+            print_sizes('after', table_sizes(cursor))
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# legislative_scraper/versions.py
+import json
+import os
+
+from scrapy.utils.project import data_path
+
+from legislative_scraper.locks import locked
+
+# House (C-) and Senate (S-) bills numbered up to 200 are government bills;
+# 201 and above are private members' / Senate public bills.
+GOVERNMENT_BILL_MAX_NUMBER = 200
+
+
+def infer_bill_type(number_code, bill_type_name=None):
+    """Return the BILL_DETAILS_URL path segment ('Government' or 'Private') for a bill.
+
+    ``bill_type_name`` is the BillTypeEn text from the bill data XML when available;
+    otherwise the type is inferred from the NumberCode (e.g. C-69, S-201).
+    """
+    if bill_type_name:
+        return 'Government' if 'government' in bill_type_name.lower() else 'Private'
+    _, _, number = (number_code or '').partition('-')
+    digits = ''.join(ch for ch in number if ch.isdigit())
+    if digits and int(digits) > GOVERNMENT_BILL_MAX_NUMBER:
+        return 'Private'
+    return 'Government'
+
+
+class VersionSearch:
+    """Find the highest published version of a bill with as few round trips as possible.
+
+    Probes grow exponentially from the last known count (found + 1, + 2, + 4, ...)
+    until a version is missing, then binary search narrows the gap. Versions are
+    published contiguously, so every count up to the result exists.
+    """
+
+    def __init__(self, bill_data, bill_type, known_count=0, max_count=100, completed=()):
+        self.bill_data = bill_data
+        self.bill_type = bill_type
+        self.max_count = max_count
+        self.completed = set(completed)  # Counts already stored by a checkpointed run
+        self.known_count = min(known_count, max_count)  # Highest count found by an earlier run
+        self.found = self.known_count  # Highest count known to exist
+        self.missing = None  # Lowest count known not to exist
+        self.step = 1
+        self.probed = set()  # Counts already requested, by a probe or as a known version
+
+    def next_count(self):
+        if self.missing is None:
+            count = self.found + self.step
+            if count > self.max_count:
+                self.missing = self.max_count + 1
+            else:
+                return count
+        if self.missing - self.found > 1:
+            return (self.found + self.missing) // 2
+        return None
+
+    def record(self, count, exists):
+        self.probed.add(count)
+        if exists:
+            self.found = max(self.found, count)
+            self.step *= 2
+        elif self.missing is None or count < self.missing:
+            self.missing = count
+
+    @property
+    def done(self):
+        return self.next_count() is None
+
+    def take_known_counts(self):
+        """Return the counts up to the last known one; remaining_counts will not repeat them."""
+        counts = self.remaining_counts()
+        self.probed.update(counts)
+        return counts
+
+    def remaining_counts(self):
+        return [count for count in range(1, self.found + 1) if count not in self.probed]
+
+
+class VersionStore:
+    """Last known version count per bill, kept between runs to seed VersionSearch."""
+
+    def __init__(self, path):
+        self.path = path
+        self.counts = {}
+        self.updated = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        path = data_path(settings.get('BILL_VERSIONS_PATH', 'bill_versions.json'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        store = cls(path)
+        store.load()
+        return store
+
+    @staticmethod
+    def key(parliament, session, bill_number):
+        return f"{parliament}-{session}/{bill_number}"
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as file:
+            self.counts = json.load(file)
+
+    def save(self):
+        # Sharded crawls save from several processes; apply this run's counts to the
+        # current file instead of overwriting the other workers' ones
+        with locked(self.path):
+            self.load()
+            self.counts.update(self.updated)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(self.counts, file, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def get(self, parliament, session, bill_number):
+        return self.counts.get(self.key(parliament, session, bill_number), 0)
+
+    def set(self, parliament, session, bill_number, count):
+        key = self.key(parliament, session, bill_number)
+        self.counts[key] = count
+        self.updated[key] = count
@@ -0,0 +1,163 @@
+# legislative_scraper/xmlparse.py
+import io
+import re
+import xml.etree.ElementTree as ET
+
+IDENTIFICATION_FIELDS = {
+    'bill_number': 'BillNumber',
+    'title': 'LongTitle',
+    'short_title': 'ShortTitle',
+    'sponsor': 'BillSponsor',
+    'bill_ref_number': 'BillRefNumber',
+}
+
+# Bill text subtrees stored verbatim, keyed by BillDetailItem field
+TEXT_SECTIONS = {
+    'BillHistory': 'bill_history',
+    'Introduction': 'introduction',
+    'Body': 'body',
+}
+
+# Numbered provisions of a bill body, from the outermost down
+PROVISION_TAGS = ('Section', 'Subsection', 'Paragraph', 'Subparagraph', 'Clause', 'Subclause')
+# Provision parts that are not part of its text
+PROVISION_META_TAGS = ('Label', 'MarginalNote')
+# Start and end tags as ElementTree serializes them ('<' and '>' are always escaped elsewhere)
+TAG_RE = re.compile(rb'<(/?)[^\s/>]+[^>]*?(/?)>')
+
+
+def iter_elements(data, tag):
+    """Yield each ``tag`` element of the XML bytes ``data`` as soon as it is parsed.
+
+    Elements are cleared once the caller moves on, so only one of them is held
+    in memory at a time (the parent keeps an empty shell per element).
+    """
+    for _, elem in ET.iterparse(io.BytesIO(data)):
+        if elem.tag == tag:
+            yield elem
+            elem.clear()
+
+
+def parse_bill_text(data):
+    """Extract the Identification fields and the serialized text subtrees of a bill in one pass.
+
+    Returns None when the document has no Identification section.
+    """
+    result = {}
+    identification_found = False
+    for _, elem in ET.iterparse(io.BytesIO(data)):
+        if elem.tag == 'Identification' and not identification_found:
+            identification_found = True
+            for field, path in IDENTIFICATION_FIELDS.items():
+                result[field] = elem.findtext(path)
+        elif elem.tag in TEXT_SECTIONS and TEXT_SECTIONS[elem.tag] not in result:
+            result[TEXT_SECTIONS[elem.tag]] = ET.tostring(elem, encoding='unicode')
+            if elem.tag == 'Body':
+                # The subtree is still complete here, so the index needs no second parse
+                result['sections'] = body_sections(elem, result['body'])
+        else:
+            continue
+        # Drop subtrees as soon as they have been read
+        elem.clear()
+
+    if not identification_found:
+        return None
+    for field in TEXT_SECTIONS.values():
+        result.setdefault(field, None)
+    result.setdefault('sections', [])
+    return result
+
+
+def element_spans(root, xml):
+    """Return {element: (start, end)}, the UTF-8 byte range of each element of ``root``
+    within ``xml``, its ElementTree serialization."""
+    elements = root.iter()
+    spans = {}
+    stack = []
+    for match in TAG_RE.finditer(xml.encode('utf-8')):
+        if match.group(1):
+            element, start = stack.pop()
+            spans[element] = (start, match.end())
+        elif match.group(2):
+            spans[next(elements)] = (match.start(), match.end())
+        else:
+            stack.append((next(elements), match.start()))
+    return spans
+
+
+def flat_text(element):
+    return ' '.join(''.join(element.itertext()).split()) if element is not None else None
+
+
+def provision_text(element):
+    parts = [element.text or '']
+    for child in element:
+        if child.tag not in PROVISION_TAGS and child.tag not in PROVISION_META_TAGS:
+            parts.extend(child.itertext())
+        parts.append(child.tail or '')
+    return ' '.join(''.join(parts).split()) or None
+
+
+def body_sections(body, xml):
+    """Index the provisions of a bill ``body`` element serialized as ``xml``.
+
+    Returns one dict per Section, Subsection, Paragraph, ... in document order with its
+    path (labels joined, e.g. "12(1)(a)"; unlabelled provisions are numbered by position
+    and repeated paths get a #n suffix), heading (its marginal note, else the one it
+    inherits from its parent or the preceding Heading), own text (nested provisions
+    excluded) and UTF-8 byte offsets in ``xml``.
+    """
+    spans = element_spans(body, xml)
+    sections = []
+    seen = set()
+
+    def visit(element, parent_path, heading):
+        for position, child in enumerate(element):
+            if child.tag == 'Heading':
+                heading = flat_text(child.find('TitleText')) or heading
+                continue
+            if child.tag not in PROVISION_TAGS:
+                continue
+            label = flat_text(child.find('Label')) or f"[{position}]"
+            if parent_path and not label.startswith(('(', '[')):
+                label = f".{label}"
+            path = key = parent_path + label
+            count = 1
+            while key in seen:
+                count += 1
+                key = f"{path}#{count}"
+            seen.add(key)
+            child_heading = flat_text(child.find('MarginalNote')) or heading
+            start, end = spans[child]
+            sections.append({
+                'path': key,
+                'heading': child_heading,
+                'text': provision_text(child),
+                'start_offset': start,
+                'end_offset': end,
+            })
+            visit(child, key, child_heading)
+
+    visit(body, '', None)
+    return sections
+
+
+BILLS_LIST_FIELDS = {
+    'bill_number': 'NumberCode',
+    'bill_stage': 'LatestCompletedBillStageName',
+    'bill_stage_date': 'LatestCompletedBillStageDateTime',
+    'sponsor_id': 'SponsorPersonId',
+    'sponsor_name': 'SponsorPersonName',
+    'sponsor_role': 'SponsorAffiliationRoleName',
+}
+
+
+def iter_bills_list(data):
+    """Yield one dict of BILLS_LIST_FIELDS per Bill in a bills list document."""
+    for bill in iter_elements(data, 'Bill'):
+        yield {field: bill.findtext(path) for field, path in BILLS_LIST_FIELDS.items()}
+
+
+def read_bills_list(data):
+    # Materialized variant of iter_bills_list for worker processes
+    return list(iter_bills_list(data))
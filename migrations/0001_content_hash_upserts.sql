@@ -0,0 +1,26 @@
+-- Content hashes for change detection, and a real upsert key for bill_details.
+-- bill_details holds one row per published version of a bill's text.
+
+ALTER TABLE bills ADD COLUMN content_hash VARCHAR(40);
+
+ALTER TABLE bill_details ADD COLUMN version_number INTEGER;
+ALTER TABLE bill_details ADD COLUMN content_hash VARCHAR(40);
+-- Long titles regularly exceed 255 characters
+ALTER TABLE bill_details ALTER COLUMN title TYPE TEXT;
+ALTER TABLE bill_details ALTER COLUMN short_title TYPE TEXT;
+
+-- Number any existing rows in insertion order so the new key can be enforced
+UPDATE bill_details d
+SET version_number = v.version_number
+FROM (
+    SELECT detail_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY bill_number, parliament_number, session_number ORDER BY detail_id
+           ) AS version_number
+    FROM bill_details
+) v
+WHERE d.detail_id = v.detail_id;
+
+ALTER TABLE bill_details ALTER COLUMN version_number SET NOT NULL;
+ALTER TABLE bill_details ADD CONSTRAINT bill_details_bill_version_key
+    UNIQUE (bill_number, parliament_number, session_number, version_number);
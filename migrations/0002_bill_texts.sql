@@ -0,0 +1,19 @@
+-- Compressed, deduplicated storage for the serialized XML sections of bill_details.
+-- Each distinct text is stored once in bill_texts, keyed by the SHA-1 of the text;
+-- bill_details rows written with POSTGRES_TEXT_STORAGE = "compressed" leave
+-- bill_history / introduction / body NULL and reference the texts by hash instead.
+-- Existing rows stay inline until converted with:
+--     cd legislative_scraper && python -m legislative_scraper.textstore compress
+
+CREATE TABLE bill_texts (
+    text_hash VARCHAR(40) PRIMARY KEY,
+    codec VARCHAR(10) NOT NULL,
+    raw_size INTEGER NOT NULL,
+    data BYTEA NOT NULL
+);
+-- Already compressed, so TOAST should not try again
+ALTER TABLE bill_texts ALTER COLUMN data SET STORAGE EXTERNAL;
+
+ALTER TABLE bill_details ADD COLUMN bill_history_hash VARCHAR(40);
+ALTER TABLE bill_details ADD COLUMN introduction_hash VARCHAR(40);
+ALTER TABLE bill_details ADD COLUMN body_hash VARCHAR(40);
@@ -0,0 +1,7 @@
+-- bill_texts rows may hold a delta against another text instead of the full text:
+-- codec 'delta' rows are reconstructed from base_hash, at most depth steps from a
+-- full ('zlib') text. See legislative_scraper.textstore.
+
+ALTER TABLE bill_texts ADD COLUMN base_hash VARCHAR(40) REFERENCES bill_texts (text_hash);
+ALTER TABLE bill_texts ADD COLUMN depth INTEGER NOT NULL DEFAULT 0;
+CREATE INDEX idx_bill_texts_base_hash ON bill_texts (base_hash);
@@ -0,0 +1,25 @@
+-- Provision-level index of bill bodies, written along with bill_details so single
+-- clauses can be read without loading or parsing the whole body. section_path joins
+-- the labels down from the section (e.g. '12(1)(a)'); the C collation lets the key
+-- index also serve prefix matches (section_path LIKE '12(%') for a provision and
+-- everything under it. start_offset / end_offset are the UTF-8 byte range of the
+-- provision's XML within the stored body. detail_hash is the content_hash of the
+-- bill_details row the provision was read from, so rows of a replaced text can be told apart.
+
+CREATE TABLE bill_sections (
+    bill_number VARCHAR(50) NOT NULL,
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    version_number INTEGER NOT NULL,
+    section_path VARCHAR(255) COLLATE "C" NOT NULL,
+    position INTEGER NOT NULL,
+    heading TEXT,
+    text TEXT,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    detail_hash VARCHAR(40) NOT NULL,
+    PRIMARY KEY (bill_number, parliament_number, session_number, version_number, section_path),
+    FOREIGN KEY (bill_number, parliament_number, session_number, version_number)
+        REFERENCES bill_details (bill_number, parliament_number, session_number, version_number)
+        ON DELETE CASCADE
+);
@@ -0,0 +1,148 @@
+-- bills, bill_details and bill_votes become LIST partitioned by parliament_number:
+-- one partition per parliament from the 35th (the first in LEGISinfo) to the 60th,
+-- plus one for any other parliament already stored, and a _default partition for the
+-- rest. The pipelines' and the dashboard's lookups name the parliament, so they only
+-- read that parliament's partition. Add a partition for a later parliament before
+-- crawling it (rows already in the _default partition have to be moved out first):
+--     CREATE TABLE bills_p61 PARTITION OF bills FOR VALUES IN (61);   -- and likewise
+--
+-- The primary keys include parliament_number, as partitioned unique keys must.
+-- RETURNING cannot read xmax from a partitioned table, so bills and bill_details get
+-- a revision, counted up by the pipelines' upserts (1 = as first inserted).
+-- The redundant idx_bill_number_parliament_session (same columns as the bills unique
+-- key) is dropped, and indexes are added for the lookups the code makes:
+--   bills (sponsor_id)                       bills by sponsor
+--   bills (bill_stage_date)                  bills by stage date range
+--   bill_votes (bill_number, parliament_number, session_number, vote_date)
+--                                            votes of a bill by date, and the foreign key
+--   bill_votes (parliament_number, session_number, division_number)
+--                                            the stored-division checks of the pipelines,
+--                                            replacing idx_vote_parliament_session
+--   bill_votes (vote_date)                   votes by date range
+-- The bill_details foreign key is covered by its (bill, version) unique key.
+-- See benchmarks/bench_queries.py for the plans of these queries before and after.
+
+ALTER TABLE bill_sections DROP CONSTRAINT bill_sections_bill_number_parliament_number_session_number_fkey;
+
+ALTER TABLE bill_votes RENAME TO bill_votes_unpartitioned;
+ALTER TABLE bill_details RENAME TO bill_details_unpartitioned;
+ALTER TABLE bills RENAME TO bills_unpartitioned;
+-- Frees the index names for the new tables
+ALTER INDEX bills_pkey RENAME TO bills_unpartitioned_pkey;
+ALTER INDEX bills_bill_number_parliament_number_session_number_key RENAME TO bills_unpartitioned_key;
+ALTER INDEX bill_details_pkey RENAME TO bill_details_unpartitioned_pkey;
+ALTER INDEX bill_details_bill_version_key RENAME TO bill_details_unpartitioned_key;
+ALTER INDEX bill_votes_pkey RENAME TO bill_votes_unpartitioned_pkey;
+
+CREATE TABLE bills (
+    bill_id INTEGER NOT NULL DEFAULT nextval('bills_bill_id_seq'),
+    bill_number VARCHAR(50) NOT NULL,
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    bill_stage VARCHAR(255),
+    bill_stage_date TIMESTAMP,
+    sponsor_id INTEGER,
+    sponsor_name VARCHAR(255),
+    sponsor_role VARCHAR(255),
+    content_hash VARCHAR(40),
+    revision INTEGER NOT NULL DEFAULT 1,
+    CONSTRAINT bills_pkey PRIMARY KEY (bill_id, parliament_number),
+    CONSTRAINT bills_bill_number_parliament_number_session_number_key
+        UNIQUE (bill_number, parliament_number, session_number)
+) PARTITION BY LIST (parliament_number);
+
+CREATE TABLE bill_details (
+    detail_id INTEGER NOT NULL DEFAULT nextval('bill_details_detail_id_seq'),
+    bill_number VARCHAR(50) NOT NULL,
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    title TEXT,
+    short_title TEXT,
+    sponsor VARCHAR(255),
+    bill_ref_number VARCHAR(50),
+    bill_history TEXT,
+    introduction TEXT,
+    body TEXT,
+    version_number INTEGER NOT NULL,
+    content_hash VARCHAR(40),
+    bill_history_hash VARCHAR(40),
+    introduction_hash VARCHAR(40),
+    body_hash VARCHAR(40),
+    revision INTEGER NOT NULL DEFAULT 1,
+    CONSTRAINT bill_details_pkey PRIMARY KEY (detail_id, parliament_number),
+    CONSTRAINT bill_details_bill_version_key
+        UNIQUE (bill_number, parliament_number, session_number, version_number)
+) PARTITION BY LIST (parliament_number);
+
+CREATE TABLE bill_votes (
+    vote_id INTEGER NOT NULL DEFAULT nextval('bill_votes_vote_id_seq'),
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    description TEXT,
+    decision VARCHAR(50),
+    bill_number VARCHAR(50),
+    total_yeas INTEGER,
+    total_nays INTEGER,
+    total_abstain INTEGER,
+    vote_date DATE,
+    division_number VARCHAR(50),
+    CONSTRAINT bill_votes_pkey PRIMARY KEY (vote_id, parliament_number)
+) PARTITION BY LIST (parliament_number);
+
+DO $$
+DECLARE
+    parliament INTEGER;
+    tbl TEXT;
+BEGIN
+    FOR parliament IN
+        SELECT generate_series(35, 60)
+        UNION SELECT parliament_number FROM bills_unpartitioned
+        UNION SELECT parliament_number FROM bill_details_unpartitioned
+        UNION SELECT parliament_number FROM bill_votes_unpartitioned
+        ORDER BY 1
+    LOOP
+        FOREACH tbl IN ARRAY ARRAY['bills', 'bill_details', 'bill_votes'] LOOP
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%s)', tbl || '_p' || parliament, tbl, parliament);
+        END LOOP;
+    END LOOP;
+END $$;
+CREATE TABLE bills_default PARTITION OF bills DEFAULT;
+CREATE TABLE bill_details_default PARTITION OF bill_details DEFAULT;
+CREATE TABLE bill_votes_default PARTITION OF bill_votes DEFAULT;
+
+INSERT INTO bills SELECT
+    bill_id, bill_number, parliament_number, session_number, bill_stage, bill_stage_date,
+    sponsor_id, sponsor_name, sponsor_role, content_hash
+FROM bills_unpartitioned;
+INSERT INTO bill_details SELECT
+    detail_id, bill_number, parliament_number, session_number, title, short_title, sponsor, bill_ref_number,
+    bill_history, introduction, body, version_number, content_hash, bill_history_hash, introduction_hash, body_hash
+FROM bill_details_unpartitioned;
+INSERT INTO bill_votes SELECT
+    vote_id, parliament_number, session_number, description, decision, bill_number,
+    total_yeas, total_nays, total_abstain, vote_date, division_number
+FROM bill_votes_unpartitioned;
+
+-- The id sequences would otherwise go with the old tables
+ALTER SEQUENCE bills_bill_id_seq OWNED BY bills.bill_id;
+ALTER SEQUENCE bill_details_detail_id_seq OWNED BY bill_details.detail_id;
+ALTER SEQUENCE bill_votes_vote_id_seq OWNED BY bill_votes.vote_id;
+DROP TABLE bill_votes_unpartitioned, bill_details_unpartitioned, bills_unpartitioned;
+
+ALTER TABLE bill_details ADD CONSTRAINT bill_details_bill_number_parliament_number_session_number_fkey
+    FOREIGN KEY (bill_number, parliament_number, session_number)
+    REFERENCES bills (bill_number, parliament_number, session_number) ON DELETE CASCADE;
+ALTER TABLE bill_votes ADD CONSTRAINT bill_votes_bill_number_parliament_number_session_number_fkey
+    FOREIGN KEY (bill_number, parliament_number, session_number)
+    REFERENCES bills (bill_number, parliament_number, session_number) ON DELETE CASCADE;
+ALTER TABLE bill_sections ADD CONSTRAINT bill_sections_bill_number_parliament_number_session_number_fkey
+    FOREIGN KEY (bill_number, parliament_number, session_number, version_number)
+    REFERENCES bill_details (bill_number, parliament_number, session_number, version_number) ON DELETE CASCADE;
+
+CREATE INDEX idx_bills_sponsor_id ON bills (sponsor_id);
+CREATE INDEX idx_bills_stage_date ON bills (bill_stage_date);
+CREATE INDEX idx_bill_votes_bill_date ON bill_votes (bill_number, parliament_number, session_number, vote_date);
+CREATE INDEX idx_bill_votes_division ON bill_votes (parliament_number, session_number, division_number);
+CREATE INDEX idx_bill_votes_vote_date ON bill_votes (vote_date);
+
+ANALYZE bills, bill_details, bill_votes;
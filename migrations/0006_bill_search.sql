@@ -0,0 +1,32 @@
+-- Full-text search over bill versions (the dashboard's /search/ endpoint).
+-- bill_sections.search_vector is generated from each provision's heading and plain text.
+-- bill_details.search_vector, matched through a GIN index, joins the version's title and
+-- short title (weight A) to the vectors of its provisions (D). search_summary holds the
+-- titles plus the provisions' headings and marginal notes (B), and results are ranked on
+-- it: ranking on search_vector would read the whole vector of every matching version.
+-- Neither can be a generated column, since the body is kept in bill_texts under compressed
+-- storage and provisions live in their own table. The pipelines set both when they write a
+-- version (titles first, the rest once its provisions are written), so every text is
+-- parsed for search once. Snippets come from the provisions, never from the body.
+-- Versions stored before this migration (and their provisions, if missing) are indexed by:
+--     python -m legislative_scraper.search index
+
+CREATE FUNCTION bill_title_vector(title TEXT, short_title TEXT) RETURNS tsvector
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT setweight(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(short_title, '')), 'A')
+$$;
+
+-- Concatenates vectors in order, shifting the positions of each past the previous ones
+CREATE AGGREGATE tsvector_agg (tsvector) (
+    SFUNC = tsvector_concat,
+    STYPE = tsvector,
+    INITCOND = ''
+);
+
+ALTER TABLE bill_sections ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    to_tsvector('english', coalesce(heading, '') || ' ' || coalesce(text, ''))
+) STORED;
+
+ALTER TABLE bill_details ADD COLUMN search_vector tsvector, ADD COLUMN search_summary tsvector;
+CREATE INDEX idx_bill_details_search ON bill_details USING GIN (search_vector);
@@ -0,0 +1,57 @@
+-- Summary tables behind the dashboard's /stats/ endpoints, so bills per stage, bills per
+-- sponsor and vote margins per bill are read instead of aggregated on every request.
+-- They are refreshed one (parliament, session) at a time, replacing that session's rows
+-- in one transaction from that parliament's partitions only. The pipelines refresh the
+-- sessions they wrote bills or votes for once a crawl closes; any others with:
+--     python -m legislative_scraper.stats refresh [--all] [--sessions 44-1,44-2]
+--
+--   session_stats          one row per refreshed session, with its refresh time
+--   session_stage_stats    bills per bill_stage
+--   session_sponsor_stats  bills per sponsor
+--   bill_vote_stats        divisions of each bill and their margins (yeas - nays)
+-- Stages and sponsors can be unknown, hence the NULLS NOT DISTINCT unique keys.
+
+CREATE TABLE session_stats (
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    bills INTEGER NOT NULL,
+    sponsors INTEGER NOT NULL,
+    divisions INTEGER NOT NULL,
+    last_stage_date TIMESTAMP,
+    last_vote_date DATE,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (parliament_number, session_number)
+);
+
+CREATE TABLE session_stage_stats (
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    bill_stage VARCHAR(255),
+    bills INTEGER NOT NULL,
+    last_stage_date TIMESTAMP,
+    CONSTRAINT session_stage_stats_key UNIQUE NULLS NOT DISTINCT (parliament_number, session_number, bill_stage)
+);
+
+CREATE TABLE session_sponsor_stats (
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    sponsor_id INTEGER,
+    sponsor_name VARCHAR(255),
+    bills INTEGER NOT NULL,
+    last_stage_date TIMESTAMP,
+    CONSTRAINT session_sponsor_stats_key
+        UNIQUE NULLS NOT DISTINCT (parliament_number, session_number, sponsor_id, sponsor_name)
+);
+
+CREATE TABLE bill_vote_stats (
+    bill_number VARCHAR(50) NOT NULL,
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    divisions INTEGER NOT NULL,
+    min_margin INTEGER,
+    max_margin INTEGER,
+    last_margin INTEGER,
+    last_decision VARCHAR(50),
+    last_vote_date DATE,
+    PRIMARY KEY (parliament_number, session_number, bill_number)
+);
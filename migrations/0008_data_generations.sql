@@ -0,0 +1,18 @@
+-- Data generation of each (parliament, session): counted up in the same transaction as
+-- every write of its rows by the scraper (pipelines, backfill merges, search indexing and
+-- summary refreshes), so a committed change is never visible without its new generation.
+-- The dashboard keys its cached responses on the generations of the slice they cover
+-- (one session, one parliament or all of them; see view_app/cache.py), so a crawl only
+-- invalidates the responses of the sessions it wrote.
+
+CREATE TABLE data_generations (
+    parliament_number INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    generation BIGINT NOT NULL DEFAULT 1,
+    changed_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (parliament_number, session_number)
+);
+
+INSERT INTO data_generations (parliament_number, session_number)
+SELECT parliament_number, session_number FROM bills
+UNION SELECT parliament_number, session_number FROM bill_votes;
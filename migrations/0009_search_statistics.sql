@@ -0,0 +1,16 @@
+-- Statistics for the full-text search of the dashboard's /search/ endpoint (0006_bill_search.sql).
+-- The planner estimates how many versions a query matches from the most common lexemes
+-- ANALYZE samples in search_vector. At the default target only the few hundred most
+-- frequent are kept, so other terms are guessed: a rare term can get a sequential scan,
+-- and a common one a bitmap scan. A larger target keeps enough lexemes to tell them apart,
+-- and the GIN index is used wherever it is cheaper, with no planner settings overridden.
+-- search_summary is what results are ranked on, and gets the same target.
+-- Partitions created later do not inherit it; set it on each new one as well:
+--     ALTER TABLE bill_details_p61 ALTER COLUMN search_vector SET STATISTICS 1000,
+--         ALTER COLUMN search_summary SET STATISTICS 1000;
+
+ALTER TABLE bill_details
+    ALTER COLUMN search_vector SET STATISTICS 1000,
+    ALTER COLUMN search_summary SET STATISTICS 1000;
+
+ANALYZE bill_details;